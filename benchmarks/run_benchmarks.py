@@ -0,0 +1,278 @@
+"""打包/清洗引擎的基准测试，无界面、不联网，结果写成 JSON 并可与基线比较。
+
+用法:
+  python benchmarks/run_benchmarks.py                          # small + medium，写 benchmarks/results/<时间>.json
+  python benchmarks/run_benchmarks.py --sizes small,large --repeat 5
+  python benchmarks/run_benchmarks.py --pack --python /path/to/python   # 额外测端到端打包（需要 PyInstaller）
+  python benchmarks/run_benchmarks.py --baseline benchmarks/baseline.json --threshold 0.15
+
+合成项目由固定随机种子生成，同一规模每次内容完全一致；与基线比较时，
+任何指标比基线差出 threshold 以上即视为回退，进程返回 1。
+"""
+import os
+import sys
+import json
+import time
+import queue
+import random
+import shutil
+import argparse
+import platform
+import statistics
+import tempfile
+import importlib
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(HERE)
+
+# 合成项目规模：模块数、import 深度、单个源文件大小、资源总量
+SIZES = {
+    'small': {'modules': 20, 'depth': 3, 'module_kb': 4, 'resource_mb': 2, 'resource_files': 20},
+    'medium': {'modules': 120, 'depth': 6, 'module_kb': 16, 'resource_mb': 32, 'resource_files': 200},
+    'large': {'modules': 600, 'depth': 12, 'module_kb': 48, 'resource_mb': 256, 'resource_files': 1000},
+}
+
+# 数值越大越好的指标；其余（耗时）越小越好
+HIGHER_IS_BETTER = {'MB/s', 'files/s', 'lines/s'}
+
+
+def load_tool():
+    """导入被测的 pypackagingtool 包（取本仓库中的版本，而不是环境里已安装的）。"""
+    sys.path.insert(0, REPO_ROOT)
+    return importlib.import_module("pypackagingtool")
+
+
+def _module_source(rng, idx, imports, size_kb):
+    """生成一个带注释、文档字符串、多行字符串和空行的模块，大小约 size_kb。"""
+    parts = ["# -*- coding: utf-8 -*-\n", f'"""合成模块 {idx}。"""\n']
+    parts += [f"import {name}  # 依赖\n" for name in imports]
+    parts.append("\n\n")
+    n = 0
+    while sum(len(p) for p in parts) < size_kb * 1024:
+        n += 1
+        parts.append(
+            f"# 函数 {n} 的说明注释 {rng.random():.6f}\n"
+            f"def func_{n}(x, y={n}):\n"
+            f'    """计算一个值。\n\n    # 这不是注释，而是文档字符串的一部分\n    """\n'
+            f"    s = 'text # not a comment'  # 行尾注释\n"
+            f"    total = x * y + {rng.randint(0, 1000)}\n"
+            f"\n\n\n"
+            f"    return total, s\n\n"
+        )
+    return "".join(parts)
+
+
+def make_project(root, modules, depth, module_kb, resource_mb, resource_files, seed=0):
+    """在 root 下生成合成项目，返回入口脚本路径。
+
+    模块分成 depth 层包，每层的模块依次 import 下一层，入口脚本 import 第一层。
+    资源为随机字节（不可压缩），平均分到若干子目录，其中约 10% 是重复内容。
+    """
+    rng = random.Random(seed)
+    os.makedirs(root, exist_ok=True)
+    per_level = max(1, modules // depth)
+    names = []
+    for level in range(depth):
+        pkg = os.path.join(root, "synth", f"level{level}")
+        os.makedirs(pkg, exist_ok=True)
+        for d in (os.path.join(root, "synth"), pkg):
+            open(os.path.join(d, "__init__.py"), 'a').close()
+        names.append([f"synth.level{level}.mod{i}" for i in range(per_level)])
+    for level, level_names in enumerate(names):
+        nxt = names[level + 1] if level + 1 < depth else []
+        for i, name in enumerate(level_names):
+            imports = nxt[i:i + 2] if nxt else []
+            path = os.path.join(root, *name.split(".")) + ".py"
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(_module_source(rng, i, imports, module_kb))
+    main = os.path.join(root, "main.py")
+    with open(main, 'w', encoding='utf-8') as f:
+        f.write("".join(f"import {n}\n" for n in names[0]))
+        f.write("\nif __name__ == '__main__':\n    print('ok')\n")
+
+    res_root = os.path.join(root, "assets")
+    chunk = max(1, resource_mb * (1 << 20) // max(1, resource_files))
+    previous = None
+    for i in range(resource_files):
+        sub = os.path.join(res_root, f"pack{i % 10}")
+        os.makedirs(sub, exist_ok=True)
+        data = previous if previous is not None and rng.random() < 0.1 else rng.randbytes(chunk)
+        with open(os.path.join(sub, f"res{i}.bin"), 'wb') as f:
+            f.write(data)
+        previous = data
+    return main
+
+
+def _timed(fn, repeat):
+    """运行 repeat 次，返回 (每次耗时列表, 最后一次的返回值)。"""
+    times, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return times, result
+
+
+def _record(results, name, size, value, unit, times, **extra):
+    results.append({
+        'name': name, 'size': size, 'value': round(value, 4), 'unit': unit,
+        'median_seconds': round(statistics.median(times), 4), 'min_seconds': round(min(times), 4), **extra,
+    })
+    print(f"  {name:<28} {value:>12.2f} {unit:<8} (中位 {statistics.median(times):.3f}s)")
+
+
+def bench_clean(tool, project, size, repeat, results):
+    files = tool.collect_python_files([project])
+    total_bytes = sum(os.path.getsize(f) for f in files)
+
+    def serial():
+        for f in files:
+            tool.clean_source_file(f)
+
+    def parallel():
+        for _, _, err, _ in tool.clean_files_parallel(files, cache=None):
+            if err: raise err
+
+    for name, fn in (("clean.serial", serial), ("clean.parallel", parallel)):
+        times, _ = _timed(fn, repeat)
+        best = min(times)
+        _record(results, name + ".throughput", size, total_bytes / best / 2**20, "MB/s", times)
+        _record(results, name + ".files", size, len(files) / best, "files/s", times)
+
+    # 缓存全部命中时的开销（只做 stat）
+    cache = tool.CleanCache(os.path.join(project, "bench_clean_cache.json"))
+    list(tool.clean_files_parallel(files, cache=cache))
+    times, _ = _timed(lambda: list(tool.clean_files_parallel(files, cache=cache)), repeat)
+    _record(results, "clean.cached.files", size, len(files) / min(times), "files/s", times)
+
+
+def bench_log_pipeline(tool, size, repeat, results, lines=200000):
+    sample = [
+        "12345 INFO: Analyzing hidden import 'encodings.idna'\n",
+        "12346 WARNING: lib not found: api-ms-win-core.dll\n",
+        "[onedir] 12347 INFO: checking PYZ\n",
+        "普通输出行\n",
+    ]
+
+    def run(min_level):
+        q = queue.Queue()
+        pipeline = tool.LogPipeline(q)
+        for i in range(lines):
+            q.put(sample[i & 3])
+        more = True
+        while more:
+            _, more = pipeline.drain(min_level)
+
+    for label, level in (("all", 0), ("warning", 30)):
+        times, _ = _timed(lambda: run(level), repeat)
+        _record(results, f"log.pipeline.{label}", size, lines / min(times), "lines/s", times)
+
+
+def bench_engine(tool, project, main, size, repeat, results):
+    opts = tool.PackOptions(script=main, resources=[os.path.join(project, "assets")], console=True)
+    times, _ = _timed(lambda: [tool.build_pack_command(opts, m, "w", "d", "s") for m in ('--onefile', '--onedir')
+                               for _ in range(1000)], repeat)
+    _record(results, "command.build_x1000", size, min(times), "s", times)
+
+    times, mods = _timed(lambda: tool.collect_local_modules(main), repeat)
+    _record(results, "fingerprint.import_walk", size, min(times), "s", times, modules=len(mods))
+    times, _ = _timed(lambda: tool.compute_build_fingerprint(main, [], opts.resources), repeat)
+    _record(results, "fingerprint.full", size, min(times), "s", times)
+
+    quiet = lambda msg: None
+    shutil.rmtree(os.path.join(project, tool.STATE_DIR), ignore_errors=True)
+    times, _ = _timed(lambda: tool.stage_resources(opts.resources, project, "bench", quiet), 1)
+    _record(results, "stage.cold", size, times[0], "s", times)
+    times, _ = _timed(lambda: tool.stage_resources(opts.resources, project, "bench", quiet), repeat)
+    _record(results, "stage.warm", size, min(times), "s", times)
+
+
+def bench_pack(tool, main, size, interpreter, results):
+    for mode in ("single_dir", "single_file", "both"):
+        opts = tool.PackOptions(script=main, name=f"bench_{mode}", mode=mode, interpreter=interpreter,
+                                console=True, collect_tkinter=False)
+        times, ok = _timed(lambda: tool.pack(opts, log=lambda msg: None), 1)
+        if not ok:
+            print(f"  pack.{mode} 失败，已跳过")
+            continue
+        _record(results, f"pack.{mode}", size, times[0], "s", times)
+
+
+def compare(results, baseline, threshold):
+    """返回回退项列表：(名称, 规模, 基线值, 当前值, 变化比例)。"""
+    base = {(r['name'], r['size']): r for r in baseline.get('results', [])}
+    regressions = []
+    print("\n与基线比较:")
+    for r in results:
+        b = base.get((r['name'], r['size']))
+        if not b or not b['value']:
+            continue
+        change = (r['value'] - b['value']) / b['value']
+        worse = -change if r['unit'] in HIGHER_IS_BETTER else change
+        flag = "回退" if worse > threshold else ("改善" if worse < -threshold else "")
+        print(f"  {r['name']:<28} {r['size']:<7} {b['value']:>12.3f} -> {r['value']:>12.3f} {r['unit']:<8} {change:+.1%} {flag}")
+        if worse > threshold:
+            regressions.append((r['name'], r['size'], b['value'], r['value'], change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="PyPackagingTool 引擎基准测试")
+    parser.add_argument("--sizes", default="small,medium", help=f"逗号分隔，可选 {', '.join(SIZES)}")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--pack", action="store_true", help="同时测端到端打包耗时（需要 PyInstaller）")
+    parser.add_argument("--python", dest="interpreter", default=sys.executable, help="端到端打包使用的解释器")
+    parser.add_argument("--output", help="结果 JSON 路径，默认 benchmarks/results/<时间>.json")
+    parser.add_argument("--baseline", help="与该 JSON 结果比较")
+    parser.add_argument("--threshold", type=float, default=0.10, help="超过该比例的退化视为回退")
+    parser.add_argument("--keep", action="store_true", help="保留生成的合成项目")
+    args = parser.parse_args(argv)
+
+    tool = load_tool()
+    results = []
+    work = tempfile.mkdtemp(prefix="pypack-bench-")
+    try:
+        for size in args.sizes.split(","):
+            params = SIZES[size]
+            project = os.path.join(work, size)
+            print(f"[{size}] 生成合成项目: {params}")
+            main_script = make_project(project, **params)
+            bench_clean(tool, project, size, args.repeat, results)
+            bench_log_pipeline(tool, size, args.repeat, results)
+            bench_engine(tool, project, main_script, size, args.repeat, results)
+            if args.pack:
+                bench_pack(tool, main_script, size, args.interpreter, results)
+    finally:
+        if args.keep:
+            print(f"合成项目保留在: {work}")
+        else:
+            shutil.rmtree(work, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'repeat': args.repeat,
+            'sizes': {s: SIZES[s] for s in args.sizes.split(",")},
+        },
+        'results': results,
+    }
+    output = args.output or os.path.join(HERE, "results", time.strftime('%Y%m%d-%H%M%S') + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已写入: {output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} 项回退超过 {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
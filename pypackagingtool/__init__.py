@@ -0,0 +1,30 @@
+"""PyPackagingTool 的打包/清洗引擎与命令行入口，不依赖 GUI（图形界面见 pypackagingtool.gui）。
+
+各功能按模块划分，这里汇总导出公共接口。
+"""
+# tokenize/statistics/argparse/multiprocessing/platform/socket/zipfile 只在用到时才导入，缩短界面冷启动
+from .common import IS_FROZEN, STATE_DIR, user_cache_dir, split_args, join_args
+from .fingerprint import collect_local_modules, compute_build_fingerprint
+from .options import (MODE_FLAGS, TKINTER_COLLECT_FLAG, COMPRESSION_CHOICES, OPTIMIZE_CHOICES, PackOptions,
+                      mode_distpath, optimize_flags)
+from .process import (PHASE_RE, PHASE_PROGRESS, PHASE_ORDER, BuildTracker, kill_process_tree, JOB_TIMEOUT_REASON,
+                      JobControl, run_command)
+from .buildenv import build_env_key, ensure_build_env
+from .resources import RESOURCE_WARN_SIZE, stage_resources
+from .bytecode import precompile_modules
+from .compression import UPX_SKIP_PATTERNS, UPX_MIN_SIZE, upx_flags, compress_bundle
+from .history import (HISTORY_DB, HISTORY_SCHEMA, HISTORY_STATUS, SIZE_REGRESSION_PCT, TIME_REGRESSION_PCT,
+                      PHASE_REGRESSION_MIN_SECONDS, history_db, record_build, list_builds, compare_builds,
+                      build_report, compression_history, format_compression_history, format_build_list,
+                      format_build_comparison)
+from .bench import benchmark_executable, BENCH_COLUMNS, record_benchmarks, benchmark_build
+from .build import build_pack_command, clean_build_outputs, pack
+from .jobs import BuildJob, BuildQueue
+from .remote import (WORKER_TOKEN_ENV, WORKER_DENIED_ARGS, WORKER_PATH_ARGS, WORKER_SHORT_ARGS, REMOTE_IGNORES,
+                     BuildWorker, worker_status, pick_worker, remote_pack)
+from .analysis import (HEAVY_OPTIONAL_PACKAGES, Suggestion, scan_imports, analyze_imports, apply_suggestions,
+                       format_import_report)
+from .logs import LOG_LEVEL_RE, LOG_LEVELS, LOG_FILTERS, LOG_MAX_LINES, log_line_level, LogPipeline
+from .clean import (CODING_COOKIE_RE, iter_clean_lines, clean_source_file, CLEANER_VERSION, DEFAULT_CLEAN_IGNORES,
+                    collect_python_files, CleanCache, clean_files_parallel)
+from .cli import MANIFEST_KEYS, load_manifest, build_many, main
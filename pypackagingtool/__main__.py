@@ -0,0 +1,18 @@
+"""python -m pypackagingtool：带参数时为命令行模式，不带参数时打开图形界面。"""
+import time
+# 尽早记录启动时刻，用于统计界面首帧耗时
+_START_TIME = time.perf_counter()
+import sys
+
+def launch(started=None):
+    import multiprocessing
+    multiprocessing.freeze_support()  # 打包后的程序启动清洗子进程需要
+    if len(sys.argv) > 1:
+        from . import main
+        return main()
+    from .gui import run
+    run(started)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(launch(_START_TIME))
@@ -0,0 +1,197 @@
+"""依赖分析：找出可排除的大型包与需要显式收集的动态导入。"""
+import os
+import sys
+import subprocess
+import ast
+import json
+from dataclasses import dataclass
+
+from .common import _fmt_size
+from .fingerprint import _iter_imports, _resolve_local_module, _walk_local_imports
+from .options import TKINTER_COLLECT_FLAG
+
+# 常被其他包的可选 import 顺带拉进来、但应用本身往往用不到的大型包
+HEAVY_OPTIONAL_PACKAGES = [
+    'matplotlib', 'scipy', 'pandas', 'numpy', 'IPython', 'notebook', 'jupyter_client',
+    'PyQt5', 'PyQt6', 'PySide2', 'PySide6', 'torch', 'tensorflow', 'cv2', 'PIL',
+    'sphinx', 'pytest', 'docutils', 'setuptools',
+]
+
+# 在目标解释器中运行：只用 find_spec 定位模块（不导入），统计体积与依赖发行包
+_IMPORT_PROBE = r"""
+import sys, os, re, json, importlib.util
+try:
+    from importlib import metadata
+except ImportError:
+    metadata = None
+names = json.loads(sys.argv[1])
+stdlib_names = set(getattr(sys, "stdlib_module_names", ())) | set(sys.builtin_module_names)
+pkg_dists = {}
+if metadata and hasattr(metadata, "packages_distributions"):
+    pkg_dists = metadata.packages_distributions()
+
+def tree_size(paths):
+    total = 0
+    for p in paths:
+        if os.path.isfile(p):
+            total += os.path.getsize(p)
+            continue
+        for dp, dn, fn in os.walk(p):
+            for f in fn:
+                try: total += os.path.getsize(os.path.join(dp, f))
+                except OSError: pass
+    return total
+
+def norm(name):
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+dist_cache = {}
+def dist_info(dname):
+    key = norm(dname)
+    if key not in dist_cache:
+        dist_cache[key] = (None, [])
+        try:
+            dist = metadata.distribution(dname)
+        except Exception:
+            return dist_cache[key]
+        size = 0
+        for f in dist.files or ():
+            try: size += os.path.getsize(dist.locate_file(f))
+            except OSError: pass
+        reqs = []
+        for req in dist.requires or ():
+            if "extra ==" in req: continue
+            reqs.append(re.split(r"[\s;<>=!~\[(]", req, 1)[0])
+        dist_cache[key] = (size, reqs)
+    return dist_cache[key]
+
+def transitive(dname, out, seen):
+    key = norm(dname)
+    if key in seen: return
+    seen.add(key)
+    size, reqs = dist_info(dname)
+    if size is None: return  # 未安装（例如受环境标记限制的依赖）
+    out[key] = size
+    for r in reqs:
+        transitive(r, out, seen)
+
+result = {}
+for name in names:
+    info = {"found": False, "stdlib": name in stdlib_names, "size": 0, "dists": [], "deps": {}}
+    try:
+        spec = importlib.util.find_spec(name)
+    except Exception:
+        spec = None
+    if spec:
+        info["found"] = True
+        paths = list(spec.submodule_search_locations or [])
+        if not paths and spec.origin and os.path.exists(spec.origin):
+            paths = [spec.origin]
+        info["size"] = tree_size(paths)
+        info["dists"] = [norm(d) for d in pkg_dists.get(name, [])]
+        if metadata:
+            seen = set()
+            for d in pkg_dists.get(name, []):
+                transitive(d, info["deps"], seen)
+            for d in info["dists"]:
+                info["deps"].pop(d, None)
+    result[name] = info
+print(json.dumps(result))
+"""
+
+@dataclass
+class Suggestion:
+    """一条可选的打包参数建议；remove=True 表示从默认命令中去掉该参数。"""
+    flag: str
+    reason: str
+    remove: bool = False
+
+def scan_imports(script):
+    """静态扫描入口脚本及其本地模块，返回 {外部顶层模块名: [引用它的文件]} 与动态导入调用列表。"""
+    script = os.path.abspath(script)
+    root_dir = os.path.dirname(script)
+    imports, dynamic = {}, []
+    for path, tree in _walk_local_imports(script):
+        for base, dotted, level in _iter_imports(tree, path, root_dir):
+            top = dotted.split('.')[0]
+            if level or not top or _resolve_local_module(root_dir, top):
+                continue
+            files = imports.setdefault(top, [])
+            if path not in files: files.append(path)
+        for node in ast.walk(tree):
+            # importlib.import_module(...) / __import__(...) 的第一个参数
+            if isinstance(node, ast.Call) and node.args and (
+                    getattr(node.func, 'attr', None) == 'import_module' or getattr(node.func, 'id', None) == '__import__'):
+                dynamic.append((path, node.args[0]))
+    return imports, dynamic
+
+def analyze_imports(script, interpreter=sys.executable):
+    """分析入口脚本的导入图：统计每个外部包（及其依赖发行包）的体积，并给出打包参数建议。"""
+    imports, dynamic = scan_imports(script)
+    names = sorted(set(imports) | set(HEAVY_OPTIONAL_PACKAGES) | {'tkinter'})
+    proc = subprocess.run([interpreter, "-c", _IMPORT_PROBE, json.dumps(names)],
+                          capture_output=True, text=True, timeout=300)
+    if proc.returncode != 0:
+        raise RuntimeError(f"依赖探测失败: {proc.stderr.strip()[-500:]}")
+    probe = json.loads(proc.stdout)
+
+    packages = {}
+    needed_dists = set()
+    for name, files in imports.items():
+        info = probe.get(name, {})
+        packages[name] = {**info, 'files': files, 'total': info.get('size', 0) + sum(info.get('deps', {}).values())}
+        needed_dists.update(info.get('dists', []))
+        needed_dists.update(info.get('deps', {}))
+
+    suggestions = []
+    if 'tkinter' not in imports:
+        suggestions.append(Suggestion(TKINTER_COLLECT_FLAG, "应用未导入 tkinter，无需收集整个 Tk 运行时", remove=True))
+    for name in HEAVY_OPTIONAL_PACKAGES:
+        info = probe.get(name, {})
+        if name in imports or not info.get('found'):
+            continue
+        if set(info.get('dists', [])) & needed_dists:
+            continue  # 是某个已导入包声明的依赖，不能排除
+        suggestions.append(Suggestion(
+            f"--exclude-module={name}", f"环境中已安装 {name}（{_fmt_size(info['size'])}），但应用及其依赖均未声明使用"))
+    seen = set()
+    for path, arg in dynamic:
+        flag = None
+        if isinstance(arg, ast.Constant) and isinstance(arg.value, str):
+            flag = f"--hidden-import={arg.value}"
+            reason = f"{os.path.basename(path)} 中动态导入了 {arg.value}，静态分析无法发现"
+        elif isinstance(arg, ast.JoinedStr) and arg.values and isinstance(arg.values[0], ast.Constant):
+            prefix = str(arg.values[0].value).rstrip('.')
+            if prefix:
+                flag = f"--collect-submodules={prefix}"
+                reason = f"{os.path.basename(path)} 按名称动态导入 {prefix}.* 下的模块"
+        if flag and flag not in seen:
+            seen.add(flag)
+            suggestions.append(Suggestion(flag, reason))
+    return {'packages': packages, 'suggestions': suggestions}
+
+def apply_suggestions(opts, suggestions):
+    """把选中的建议写入 PackOptions。"""
+    for sg in suggestions:
+        if sg.remove:
+            if sg.flag == TKINTER_COLLECT_FLAG: opts.collect_tkinter = False
+        elif sg.flag not in opts.extra_args:
+            opts.extra_args.append(sg.flag)
+    return opts
+
+def format_import_report(report):
+    lines = ["外部依赖（按打包体积贡献排序）:"]
+    for name, info in sorted(report['packages'].items(), key=lambda kv: -kv[1]['total']):
+        if not info.get('found'):
+            lines.append(f"  {name:<24} 未找到（目标解释器中未安装？）")
+            continue
+        kind = "标准库" if info.get('stdlib') else "第三方"
+        lines.append(f"  {name:<24} {_fmt_size(info['total']):>10}  [{kind}]")
+        for dep, size in sorted(info.get('deps', {}).items(), key=lambda kv: -kv[1])[:5]:
+            lines.append(f"      └ 依赖 {dep:<18} {_fmt_size(size):>10}")
+    lines.append("")
+    lines.append("建议参数:" if report['suggestions'] else "没有可以优化的参数。")
+    for sg in report['suggestions']:
+        action = "移除" if sg.remove else "添加"
+        lines.append(f"  {action} {sg.flag}  — {sg.reason}")
+    return "\n".join(lines) + "\n"
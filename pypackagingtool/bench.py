@@ -0,0 +1,141 @@
+"""构建产物的启动耗时基准。"""
+import time
+import os
+import subprocess
+import json
+
+from .common import _fmt_size, _path_size
+from .options import _artifact_path, mode_distpath, MODE_FLAGS
+from .process import _process_rss
+from .history import history_db
+
+def _time_one_run(cmd, timeout):
+    """运行一次可执行文件直到退出，返回 (耗时秒, 峰值内存字节或 None, 退出码, 是否超时)。"""
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    peak = None
+    while True:
+        # 高频采样；不用 wait4 的 ru_maxrss，因为它会把 fork 时继承的本进程内存也算进去
+        rss = _process_rss(proc.pid)
+        if rss: peak = max(peak or 0, rss)
+        try:
+            proc.wait(timeout=0.005)
+            break
+        except subprocess.TimeoutExpired:
+            if time.perf_counter() - start > timeout:
+                proc.kill()
+                proc.wait()
+                return time.perf_counter() - start, peak, proc.returncode, True
+    return time.perf_counter() - start, peak, proc.returncode, False
+
+def benchmark_executable(path, runs=5, args=(), timeout=30, artifact=None):
+    """连续启动 path 共 runs 次：第一次单独记为首次启动，其余取中位数作为热启动。
+
+    刚构建完的产物通常仍在操作系统页缓存中，首次启动并不是冷启动，只反映首次运行特有的开销
+    （如 onefile 首次解包、.pyc 写入、动态链接缓存等）。
+
+    被测程序需要能自行退出（例如传入 --version 之类的冒烟参数），超时的运行会被强制结束并单独计数。
+    artifact 为实际分发的产物（onedir 时是整个目录），体积按它统计，缺省即 path 本身。
+    """
+    import statistics
+    samples, peaks, timeouts, failures = [], [], 0, 0
+    for _ in range(runs):
+        elapsed, peak, code, timed_out = _time_one_run([path, *args], timeout)
+        if timed_out:
+            timeouts += 1
+            continue
+        if code != 0:
+            failures += 1
+        samples.append(elapsed)
+        if peak: peaks.append(peak)
+    warm = sorted(samples[1:])
+    return {
+        'path': path,
+        'size_bytes': _path_size(artifact or path),
+        'runs': [round(x, 4) for x in samples],
+        'first_run_seconds': round(samples[0], 4) if samples else None,
+        'warm_median_seconds': round(statistics.median(warm), 4) if warm else None,
+        'warm_min_seconds': round(warm[0], 4) if warm else None,
+        'peak_rss_mb': round(max(peaks) / 2**20, 1) if peaks else None,
+        'timeouts': timeouts,
+        'failures': failures,
+    }
+
+def _executable_for(opts, current_mode):
+    """返回 (产物路径, 可执行文件路径)；onefile 两者相同，onedir 的可执行文件在产物目录内。"""
+    distpath = mode_distpath(current_mode, opts.script_dir, len(MODE_FLAGS[opts.mode]) > 1)
+    artifact = _artifact_path(distpath, opts.name, current_mode)
+    if current_mode == '--onedir':
+        return artifact, os.path.join(artifact, opts.name + (".exe" if os.name == 'nt' else ""))
+    return artifact, artifact
+
+BENCH_COLUMNS = ('first_run_seconds', 'warm_median_seconds', 'warm_min_seconds', 'extraction_seconds',
+                 'peak_rss_mb', 'size_bytes', 'timeouts', 'failures')
+
+def _previous_benchmarks(script_dir, name):
+    """各模式最近一次的测速记录（sqlite3.Row），用于与本次对比。"""
+    db = history_db(script_dir, readonly=True)
+    if db is None:
+        return {}
+    try:
+        return {r['mode']: r for r in db.execute(
+            "SELECT * FROM benchmarks WHERE id IN (SELECT MAX(id) FROM benchmarks WHERE name = ? GROUP BY mode)",
+            (name,))}
+    finally:
+        db.close()
+
+def record_benchmarks(script_dir, entries, build_id=None):
+    """把 benchmark_build 的结果写入 history.sqlite 的 benchmarks 表，build_id 为对应的构建记录。"""
+    db = history_db(script_dir)
+    try:
+        with db:
+            db.executemany(
+                f"INSERT INTO benchmarks (build_id, name, mode, started, args, runs, {', '.join(BENCH_COLUMNS)})"
+                f" VALUES (?, ?, ?, ?, ?, ?{', ?' * len(BENCH_COLUMNS)})",
+                [(build_id, e['name'], e['mode'], e['timestamp'], json.dumps(e['args'], ensure_ascii=False),
+                  json.dumps(e['runs']), *(e.get(k) for k in BENCH_COLUMNS)) for e in entries])
+    finally:
+        db.close()
+
+def benchmark_build(opts, log=print, build_id=None):
+    """对本次构建产出的每种形态做启动测速，结果记入 .pypack/history.sqlite 以便跨构建对比。"""
+    import sqlite3
+    log(f"\n>>> 启动测速：每种形态运行 {opts.bench_runs} 次...\n")
+    try:
+        previous = _previous_benchmarks(opts.script_dir, opts.name)
+    except (OSError, sqlite3.Error) as e:
+        log(f"无法读取测速记录: {e}\n")
+        previous = {}
+    entries = []
+    for current_mode in MODE_FLAGS[opts.mode]:
+        artifact, exe = _executable_for(opts, current_mode)
+        mode = current_mode.lstrip('-')
+        if not os.path.isfile(exe):
+            log(f"[{mode}] 未找到可执行文件，跳过: {exe}\n")
+            continue
+        result = benchmark_executable(exe, opts.bench_runs, opts.bench_args, opts.bench_timeout, artifact)
+        entry = {'timestamp': time.time(), 'name': opts.name, 'mode': mode, 'args': opts.bench_args, **result}
+        entries.append(entry)
+        msg = (f"[{mode}] 首次启动 {entry['first_run_seconds']}s，热启动中位数 {entry['warm_median_seconds']}s，"
+               f"峰值内存 {entry['peak_rss_mb']} MB，体积 {_fmt_size(entry['size_bytes'])}")
+        prev = previous.get(mode)
+        if prev and prev['warm_median_seconds'] and entry['warm_median_seconds']:
+            delta = entry['warm_median_seconds'] / prev['warm_median_seconds'] - 1
+            msg += f"（热启动较上次 {delta:+.0%}）"
+        if entry['timeouts'] or entry['failures']:
+            msg += f"，超时 {entry['timeouts']} 次，非零退出 {entry['failures']} 次"
+        log(msg + "\n")
+    by_mode = {e['mode']: e for e in entries}
+    if 'onedir' in by_mode and 'onefile' in by_mode:
+        a, b = by_mode['onedir']['warm_median_seconds'], by_mode['onefile']['warm_median_seconds']
+        if a is not None and b is not None:
+            # onefile 每次启动都要先解包到临时目录，两者热启动之差即解包开销；测量噪声可能使差值为负
+            extraction = max(0.0, b - a)
+            by_mode['onefile']['extraction_seconds'] = round(extraction, 4)
+            log(f"onefile 解包开销约 {extraction:.3f}s\n")
+    if entries:
+        try:
+            record_benchmarks(opts.script_dir, entries, build_id)
+        except (OSError, sqlite3.Error) as e:
+            log(f"无法写入测速记录: {e}\n")
+    return entries
@@ -0,0 +1,295 @@
+"""打包引擎：组装 PyInstaller 命令并完成一次打包（增量跳过、暂存、压缩、记录历史与测速）。"""
+import time
+import os
+import shutil
+import subprocess
+import hashlib
+from dataclasses import replace
+
+from .common import STATE_DIR, user_cache_dir
+from .fingerprint import compute_build_fingerprint
+from .options import _artifact_path, mode_distpath, MODE_FLAGS, optimize_flags, TKINTER_COLLECT_FLAG
+from .process import BuildTracker, _format_timing, run_command
+from .buildenv import ensure_build_env
+from .resources import stage_resources
+from .bytecode import precompile_modules
+from .compression import compress_bundle, upx_flags, _uses_builtin_upx
+from .history import (compare_builds, compression_history, format_build_comparison, format_compression_history,
+                      record_build)
+from .bench import benchmark_build
+
+# "both" 模式：在目标解释器中照常运行 PyInstaller，只是在生成 onedir 的 spec 后追加一个 onefile EXE，
+# 两种产物共用同一次 Analysis/PYZ，在一个进程里完成
+_BOTH_SPEC_SCRIPT = r"""
+import ast, sys
+import PyInstaller.__main__ as pyi
+
+# 本脚本所在的缓存目录不属于被打包项目，别让它出现在模块搜索路径里
+del sys.path[0]
+
+ONEFILE_DISTPATH, ONEFILE_UPX = sys.argv[1], sys.argv[2] == "1"
+# onefile 的 PKG 放到 workpath 的子目录，避免与 onedir 的同名 PKG 互相覆盖
+SUFFIX = "\n".join([
+    "",
+    "# PyPackagingTool: 复用上面的 Analysis/PYZ 再产出 onefile",
+    "import os as _os",
+    "from PyInstaller.config import CONF as _CONF",
+    "_saved = _CONF['distpath'], _CONF['workpath']",
+    "_CONF['distpath'], _CONF['workpath'] = {distpath!r}, _os.path.join(_CONF['workpath'], 'onefile')",
+    "_os.makedirs(_CONF['workpath'], exist_ok=True)",
+    "exe_onefile = EXE({args})",
+    "_CONF['distpath'], _CONF['workpath'] = _saved",
+    "",
+])
+
+def add_onefile(spec):
+    with open(spec, encoding='utf-8') as f:
+        source = f.read()
+    for node in ast.parse(source).body:
+        if (isinstance(node, ast.Assign) and isinstance(node.value, ast.Call)
+                and getattr(node.value.func, 'id', None) == 'EXE'):
+            call = node.value
+            break
+    else:
+        raise SystemExit(f"{spec} 中没有 EXE()，无法追加 onefile")
+    seg = lambda n: ast.get_source_segment(source, n)
+    # onedir 为 EXE(pyz, a.scripts, [], exclude_binaries=True, ...)；onefile 在末尾的 [] 之前并入二进制与数据
+    args = [seg(a) for a in call.args[:-1]]
+    if 'splash' in args:
+        args.append('splash.binaries')
+    args += ['a.binaries', 'a.datas', '[]']
+    args += [f"{k.arg}={seg(k.value)}" for k in call.keywords if k.arg not in ('exclude_binaries', 'upx')]
+    args.append(f"upx={ONEFILE_UPX}")
+    with open(spec, 'a', encoding='utf-8') as f:
+        f.write(SUFFIX.format(distpath=ONEFILE_DISTPATH, args=", ".join(args)))
+
+run_makespec = pyi.run_makespec
+def makespec_both(*args, **kwargs):
+    spec = run_makespec(*args, **kwargs)
+    add_onefile(spec)
+    return spec
+pyi.run_makespec = makespec_both
+pyi.run(sys.argv[3:])
+"""
+
+def _both_spec_script():
+    """把 _BOTH_SPEC_SCRIPT 写到用户缓存目录并返回路径；文件名含内容哈希，命令（进而输入指纹）保持稳定。"""
+    digest = hashlib.sha256(_BOTH_SPEC_SCRIPT.encode('utf-8')).hexdigest()[:12]
+    path = os.path.join(user_cache_dir(), f"pyi_both_{digest}.py")
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(_BOTH_SPEC_SCRIPT)
+        os.replace(tmp, path)
+    return path
+
+def build_pack_command(opts, current_mode, workpath, distpath, specpath, clean=True, staged_dir=None,
+                       precompiled_dir=None, onefile_distpath=None):
+    """返回 PyInstaller 命令；给出 onefile_distpath 时 current_mode 应为 --onedir，同一次分析再产出 onefile。"""
+    # v3.4 核心变动：回归标准 collect-all，但依赖环境隔离
+    # 以 -O/-OO 运行 PyInstaller：目标优化级别与分析时一致，模块只编译一次
+    script = opts.script
+    if precompiled_dir:
+        script = os.path.join(precompiled_dir, os.path.basename(opts.script))
+    launcher = ["-m", "PyInstaller"]
+    if onefile_distpath:
+        launcher = [_both_spec_script(), onefile_distpath, "1" if _uses_builtin_upx(opts, '--onefile') else "0"]
+    cmd = [
+        opts.interpreter, *optimize_flags(opts), *launcher,
+        script,
+        "--noconfirm",
+        f"--name={opts.name}",
+        f"--distpath={distpath}",
+        f"--workpath={workpath}",
+        f"--specpath={specpath}",
+        current_mode,
+    ]
+    if clean: cmd.insert(cmd.index("--noconfirm") + 1, "--clean")
+    # 在纯净环境下，这是最安全的；依赖分析确认未使用 tkinter 时可以关闭
+    if opts.collect_tkinter: cmd.append(TKINTER_COLLECT_FLAG)
+    
+    if not opts.console: cmd.append("--noconsole")
+    if not _uses_builtin_upx(opts, current_mode): cmd.append("--noupx")
+    if opts.icon and os.path.exists(opts.icon): cmd.append(f"--icon={opts.icon}")
+    
+    # 资源文件；已暂存时整个暂存目录按原布局映射到包根目录
+    sep = ";" if os.name == 'nt' else ":"
+    if staged_dir:
+        cmd.append(f"--add-data={staged_dir}{sep}.")
+    else:
+        for r in opts.resources:
+            if os.path.exists(r):
+                dest = "." if os.path.isfile(r) else os.path.basename(r)
+                cmd.append(f"--add-data={r}{sep}{dest}")
+    if precompiled_dir:
+        # 静态分析没找到的本地模块（动态导入等）仍可从源码目录解析
+        cmd.append(f"--paths={opts.script_dir}")
+    cmd.extend(opts.extra_args)
+    return cmd
+
+def clean_build_outputs(script_dir, name):
+    """只清理与 name 相关的构建产物，同目录下的其他目标可以同时构建。"""
+    targets = [os.path.join(script_dir, name + ".spec"), os.path.join(script_dir, 'build', name)]
+    for tag in ('onedir', 'onefile'):
+        targets.append(os.path.join(script_dir, 'build', tag, name))
+        targets.append(os.path.join(script_dir, 'build', tag, name + ".spec"))
+    for distpath in (os.path.join(script_dir, 'dist'), os.path.join(script_dir, 'dist', 'onefile')):
+        targets.append(os.path.join(distpath, name))
+        targets.append(os.path.join(distpath, name + ".exe"))
+    for p in targets:
+        if os.path.isdir(p): shutil.rmtree(p, ignore_errors=True)
+        elif os.path.exists(p): os.remove(p)
+
+def pack(opts, log=print, on_progress=None, purge_cache=True, control=None, history=True):
+    """按 opts 完成一次打包（可能包含多个模式），成功返回 True。
+
+    on_progress 收到 0~100 的整体进度（由各模式的构建阶段换算，在工作线程中调用）；
+    purge_cache=False 时不传 --clean，供多个目标并发构建时共享 PyInstaller 全局缓存；
+    control（JobControl）用于从其他线程取消本次打包或使其超时。
+    history=True 时每次调用（含失败、取消与增量跳过）连同各阶段计时都记入 .pypack/history.sqlite，
+    成功时与上一次成功构建对比，超过阈值则在日志中给出回归明细；
+    opts.bench_runs 非零时成功构建（增量跳过除外）后再做启动测速，结果关联到这条构建记录。
+    """
+    started = time.time()
+    info = {'status': None, 'fingerprint': None, 'artifacts': [], 'compression': None, 'timings': []}
+    ok, build_id = False, None
+    try:
+        ok = _pack(opts, log, on_progress, purge_cache, control, info)
+    finally:
+        if history:
+            build_id = _record_pack(opts, log, control, ok, started, info)
+    # 增量跳过时产物没变，再测一次没有意义
+    if ok and opts.bench_runs and info['status'] != 'skipped':
+        benchmark_build(opts, log, build_id)
+    return ok
+
+def _record_pack(opts, log, control, ok, started, info):
+    import sqlite3
+    status = info['status'] or ('success' if ok else (control and control.stopped_status()) or 'failed')
+    try:
+        build_id = record_build(opts, status, started, time.time() - started, info['fingerprint'], info['artifacts'],
+                                compression=info['compression'], timings=info['timings'])
+        if status == 'success':
+            if info['compression']:
+                log(format_compression_history(compression_history(opts.script_dir, opts.name)))
+            cmp = compare_builds(opts.script_dir, head=build_id)
+            if cmp and cmp['regressions']:
+                log(format_build_comparison(cmp))
+        log(f"构建记录: #{build_id}\n")
+        return build_id
+    except (OSError, sqlite3.Error) as e:
+        log(f"无法写入构建历史: {e}\n")
+
+def _pack(opts, log, on_progress, purge_cache, control, info):
+    """pack 的实际流程；info 收集构建历史需要的指纹、产物路径、跳过状态、压缩记录与计时。"""
+    def cancelled():
+        if control and control.cancelled.is_set():
+            log(f"\n⛔ 任务{control.reason}。\n")
+            return True
+        return False
+
+    script_dir = opts.script_dir
+    if opts.requirements:
+        # 使用按锁文件缓存的隔离 venv 代替全局解释器，分析范围只含声明的依赖
+        try:
+            venv_python = ensure_build_env(opts.requirements, opts.interpreter, opts.wheelhouse, log, control)
+        except Exception as e:
+            if cancelled(): return False
+            log(f"\n❌ 构建环境准备失败: {e}\n")
+            return False
+        opts = replace(opts, interpreter=venv_python)
+    staged_dir = None
+    if opts.stage_resources and opts.resources:
+        try:
+            staged_dir = stage_resources(opts.resources, script_dir, opts.name, log)
+        except OSError as e:
+            log(f"\n❌ 资源暂存失败: {e}\n")
+            return False
+    precompiled_dir = None
+    if opts.precompile:
+        try:
+            precompiled_dir = precompile_modules(opts, log, control=control)
+        except (OSError, RuntimeError, subprocess.SubprocessError) as e:
+            if cancelled(): return False
+            log(f"\n❌ 字节码预编译失败: {e}\n")
+            return False
+    if cancelled():
+        return False
+    if not opts.incremental:
+        log(">>> 正在自动清理旧构建文件...\n")
+        clean_build_outputs(script_dir, opts.name)
+    if opts.icon:
+        log(f"图标: 使用 -> {opts.icon}\n")
+
+    modes_to_run = MODE_FLAGS[opts.mode]
+    # 两种模式共用一份 spec：Analysis/PYZ 只做一次，再分别产出 onedir（EXE+COLLECT）与 onefile EXE
+    both = len(modes_to_run) > 1
+    clean = purge_cache and not opts.incremental
+    distpaths = {m: mode_distpath(m, script_dir, both) for m in modes_to_run}
+    cmd = build_pack_command(opts, modes_to_run[0], os.path.join(script_dir, 'build'), distpaths[modes_to_run[0]],
+                             script_dir, clean=clean, staged_dir=staged_dir, precompiled_dir=precompiled_dir,
+                             onefile_distpath=distpaths['--onefile'] if both else None)
+    info['artifacts'] = [(m.lstrip('-'), _artifact_path(distpaths[m], opts.name, m)) for m in modes_to_run]
+
+    # 每次构建都记录输入指纹，构建历史据此判断两次构建的输入是否相同；
+    # 探测解释器与 PyInstaller 版本要启动子进程，只有增量模式（需要据此跳过构建）才做
+    if opts.incremental:
+        log(">>> 增量模式：正在计算输入指纹...\n")
+    try:
+        # 压缩级别通过环境变量传给 UPX，不体现在命令里，需要单独计入
+        fingerprint = compute_build_fingerprint(
+            opts.script, [cmd, [opts.compression, *upx_flags(opts)]],
+            opts.resources, opts.icon, opts.interpreter if opts.incremental else None)
+    except OSError as e:
+        log(f"⚠️ 无法计算输入指纹: {e}\n")
+        fingerprint = None
+    info['fingerprint'] = fingerprint
+
+    fp_file = None
+    if opts.incremental and fingerprint:
+        # 增量模式：保留 build/ 复用 PyInstaller 的分析缓存；输入完全未变则直接跳过
+        fp_file = os.path.join(script_dir, STATE_DIR, f"{opts.name}.fingerprint")
+        previous = None
+        if os.path.exists(fp_file):
+            with open(fp_file, encoding='utf-8') as f:
+                previous = f.read().strip()
+        if previous == fingerprint and all(os.path.exists(a) for _, a in info['artifacts']):
+            log("\n✅ 输入未变化，跳过构建（沿用上次产物）。\n")
+            info['status'] = 'skipped'
+            if on_progress: on_progress(100)
+            return True
+        if os.path.exists(fp_file): os.remove(fp_file)
+
+    tracker = BuildTracker(opts.mode if both else modes_to_run[0].lstrip('-'))
+    # UPX 从环境变量 UPX 读取默认参数，PyInstaller 内置 UPX 也能用上所选的级别
+    upx_env = {"UPX": " ".join(upx_flags(opts))} if opts.compression != "none" and upx_flags(opts) else None
+
+    def on_line(line):
+        tracker.feed(line)
+        if on_progress: on_progress(tracker.progress)
+
+    log(f"\n>>> 正在启动: {' + '.join(modes_to_run)} ...\n")
+    success = run_command(cmd, log, None, on_line, tracker.attach, control, upx_env)
+    tracker.finish(success)
+    log(_format_timing(tracker))
+    info['timings'] = [tracker.report()]
+
+    if not success:
+        if not cancelled():
+            log("\n❌ 失败终止。\n")
+        return False
+
+    compress_stats = None
+    if opts.compression == "upx-parallel" and '--onedir' in modes_to_run:
+        compress_stats = compress_bundle(dict(info['artifacts'])['onedir'], upx_flags(opts), log)
+    info['compression'] = {'strategy': opts.compression,
+                           'flags': upx_flags(opts) if opts.compression != "none" else [], **(compress_stats or {})}
+
+    if fp_file:
+        os.makedirs(os.path.dirname(fp_file), exist_ok=True)
+        with open(fp_file, 'w', encoding='utf-8') as f:
+            f.write(fingerprint)
+    if on_progress: on_progress(100)
+    log("\n✅ 任务完成！\n")
+    return True
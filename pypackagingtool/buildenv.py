@@ -0,0 +1,86 @@
+"""按依赖锁文件隔离并缓存的构建虚拟环境。"""
+import time
+import os
+import sys
+import shutil
+import threading
+import json
+
+from .common import _hash_file, user_cache_dir
+from .fingerprint import _interpreter_identity
+from .process import run_command
+
+_env_locks = {}
+
+_env_locks_guard = threading.Lock()
+
+def _venv_python(env_dir):
+    if os.name == 'nt':
+        return os.path.join(env_dir, "Scripts", "python.exe")
+    return os.path.join(env_dir, "bin", "python")
+
+def build_env_key(requirements, base_python, wheelhouse=None):
+    """依赖锁文件内容 + 基础解释器（路径与版本）+ wheel 来源共同决定一个构建环境。"""
+    h = _hash_file(requirements)
+    h.update(_interpreter_identity(base_python).encode('utf-8'))
+    h.update(os.path.abspath(wheelhouse).encode('utf-8') if wheelhouse else b"")
+    return h.hexdigest()[:16]
+
+def _acquire_file_lock(path, stale_after=3600):
+    """用 O_EXCL 创建锁文件实现跨进程互斥，超过 stale_after 秒的锁视为残留。"""
+    while True:
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            os.write(fd, str(os.getpid()).encode('ascii'))
+            os.close(fd)
+            return
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) > stale_after:
+                    os.remove(path)
+                    continue
+            except OSError:
+                continue
+            time.sleep(1)
+
+def ensure_build_env(requirements, base_python=sys.executable, wheelhouse=None, log=print, control=None):
+    """返回与 requirements 对应的隔离 venv 中的解释器路径，不存在则创建。
+
+    venv 位于用户缓存目录 envs/<哈希> 下，装好 PyInstaller 与锁文件中的依赖后写入 .ready 标记，
+    之后的构建直接复用；指定 wheelhouse 时只从本地 wheel 目录安装（--no-index），无需联网。
+    """
+    key = build_env_key(requirements, base_python, wheelhouse)
+    env_dir = os.path.join(user_cache_dir(), "envs", key)
+    marker = os.path.join(env_dir, ".ready")
+    python = _venv_python(env_dir)
+    if os.path.exists(marker) and os.path.exists(python):
+        os.utime(marker)  # 记录最近使用时间，便于日后清理
+        log(f"构建环境: 复用 {env_dir}\n")
+        return python
+
+    with _env_locks_guard:
+        lock = _env_locks.setdefault(key, threading.Lock())
+    with lock:
+        os.makedirs(os.path.dirname(env_dir), exist_ok=True)
+        lock_file = env_dir + ".lock"
+        _acquire_file_lock(lock_file)
+        try:
+            if os.path.exists(marker) and os.path.exists(python):
+                return python
+            shutil.rmtree(env_dir, ignore_errors=True)  # 清除上次中断留下的半成品
+            log(f"构建环境: 正在创建 {env_dir}\n")
+            if not run_command([base_python, "-m", "venv", env_dir], log, "venv", control=control):
+                raise RuntimeError("创建虚拟环境失败")
+            pip = [python, "-m", "pip", "install", "--disable-pip-version-check"]
+            if wheelhouse:
+                pip += ["--no-index", "--find-links", wheelhouse]
+            if not run_command(pip + ["pyinstaller", "-r", requirements], log, "pip", control=control):
+                shutil.rmtree(env_dir, ignore_errors=True)
+                raise RuntimeError("安装构建依赖失败")
+            with open(marker, 'w', encoding='utf-8') as f:
+                json.dump({'requirements': os.path.abspath(requirements), 'base_python': base_python,
+                           'wheelhouse': wheelhouse, 'created': time.time()}, f, ensure_ascii=False)
+            return python
+        finally:
+            try: os.remove(lock_file)
+            except OSError: pass
@@ -0,0 +1,117 @@
+"""本地模块的字节码预编译与缓存。"""
+import time
+import os
+import shutil
+import subprocess
+import json
+import hashlib
+
+from .common import _hash_file, _link_or_copy, STATE_DIR
+from .fingerprint import collect_local_modules
+from .process import run_command
+
+_CACHE_TAG_PROBE = "import sys; print(sys.implementation.cache_tag)"
+
+# 在目标解释器中运行：py_compile 按给定的 dfile 写入 co_filename，进程池并行编译
+_COMPILE_SCRIPT = r"""
+import json, py_compile, sys
+from concurrent.futures import ProcessPoolExecutor
+
+def compile_one(src, cfile, dfile, optimize):
+    # PyCompileError 无法跨进程传回，只返回错误信息
+    try:
+        py_compile.compile(src, cfile, dfile, True, optimize, py_compile.PycInvalidationMode.UNCHECKED_HASH)
+    except py_compile.PyCompileError as e:
+        return e.msg
+
+def main():
+    with open(sys.argv[1], encoding='utf-8') as f:
+        jobs, optimize, workers = json.load(f)
+    with ProcessPoolExecutor(max_workers=workers or None) as pool:
+        errors = [e for e in pool.map(compile_one, *zip(*jobs), [optimize] * len(jobs)) if e]
+    for e in errors:
+        print(e, flush=True)
+    return 1 if errors else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
+"""
+
+def _local_module_files(script):
+    """返回 ({相对路径: 源文件}, {相对路径: 包内其他文件})，不含入口脚本本身。
+
+    本地包整个目录一并计入，动态导入的子模块和包内数据文件也在其中。
+    """
+    root = os.path.dirname(script)
+    modules, data = {}, {}
+    for path in collect_local_modules(script):
+        rel = os.path.relpath(path, root)
+        if path == script or rel.startswith(os.pardir):
+            continue
+        modules[rel] = path
+        if os.path.basename(path) != "__init__.py":
+            continue
+        for dirpath, dirnames, filenames in os.walk(os.path.dirname(path)):
+            dirnames[:] = [d for d in dirnames if d != "__pycache__"]
+            for fn in filenames:
+                fp = os.path.join(dirpath, fn)
+                target = modules if fn.endswith(".py") else data
+                target[os.path.relpath(fp, root)] = fp
+    return modules, data
+
+def precompile_modules(opts, log=print, workers=None, control=None):
+    """把入口脚本依赖的本地模块预编译为 .pyc，返回供 PyInstaller 分析的入口目录。
+
+    .pyc 按 (解释器 cache_tag, 优化级别, 相对路径 + 源文件 SHA-256) 存入 .pypack/bytecode，内容未变的模块
+    不再编译，缺失的由目标解释器多进程编译，co_filename 记为模块相对路径。.pypack/pyc/<name> 中只有
+    入口脚本副本和指向缓存的无源码 .pyc，PyInstaller 遇到无源码模块会直接读取字节码，不再自行编译。
+    """
+    import tempfile
+    script_dir = opts.script_dir
+    started = time.time()
+    tag = subprocess.run([opts.interpreter, "-c", _CACHE_TAG_PROBE],
+                         capture_output=True, text=True, timeout=60).stdout.strip()
+    if not tag:
+        raise RuntimeError(f"无法获取解释器的字节码标签: {opts.interpreter}")
+    cache_dir = os.path.join(script_dir, STATE_DIR, "bytecode", tag, f"opt{opts.optimize}")
+    modules, data = _local_module_files(opts.script)
+    # 字节码里带着文件名，内容相同但路径不同的模块不能共用一份
+    keys = {rel: hashlib.sha256(f"{rel}\0{_hash_file(path).hexdigest()}".encode('utf-8')).hexdigest()
+            for rel, path in modules.items()}
+    missing = {key: rel for rel, key in keys.items() if not os.path.exists(os.path.join(cache_dir, key + ".pyc"))}
+
+    if missing:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = tempfile.mkdtemp(prefix=".compile-", dir=cache_dir)
+        try:
+            script, job_file = os.path.join(tmp, "compile.py"), os.path.join(tmp, "jobs.json")
+            with open(script, 'w', encoding='utf-8') as f:
+                f.write(_COMPILE_SCRIPT)
+            with open(job_file, 'w', encoding='utf-8') as f:
+                json.dump([[[modules[rel], os.path.join(tmp, key + ".pyc"), rel] for key, rel in missing.items()],
+                           opts.optimize, workers], f)
+            ok = run_command([opts.interpreter, script, job_file], log, control=control)
+            failed = []
+            for key, rel in missing.items():
+                pyc = os.path.join(tmp, key + ".pyc")
+                if os.path.exists(pyc):
+                    os.replace(pyc, os.path.join(cache_dir, key + ".pyc"))  # 编译成功的先入缓存
+                else:
+                    failed.append(rel)
+            if not ok or failed:
+                raise RuntimeError(f"以下模块编译失败: {', '.join(failed) or '未知'}")
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    stage_dir = os.path.join(script_dir, STATE_DIR, "pyc", opts.name)
+    shutil.rmtree(stage_dir, ignore_errors=True)
+    os.makedirs(stage_dir)
+    shutil.copy2(opts.script, stage_dir)
+    links = [(os.path.join(cache_dir, key + ".pyc"), os.path.splitext(rel)[0] + ".pyc") for rel, key in keys.items()]
+    for src, rel in links + [(src, rel) for rel, src in data.items()]:
+        dst = os.path.join(stage_dir, rel)
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        _link_or_copy(src, dst)
+    log(f"字节码预编译 (优化级别 {opts.optimize}): {len(modules)} 个本地模块，"
+        f"新编译 {len(missing)} 个，其余命中缓存，耗时 {time.time() - started:.2f}s\n")
+    return stage_dir
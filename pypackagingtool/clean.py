@@ -0,0 +1,307 @@
+"""代码清洗引擎：流式删除注释与多余空行，带缓存与多进程批处理（可在子进程中运行）。"""
+import os
+import json
+import itertools
+import re
+import glob
+import fnmatch
+from collections import deque
+from concurrent.futures import as_completed
+
+from .common import _hash_file, _is_ignored, STATE_DIR, user_cache_dir
+
+def _split_eol(line):
+    for eol in ("\r\n", "\n", "\r"):
+        if line.endswith(eol):
+            return line[:-len(eol)], eol
+    return line, ""
+
+# 首行 shebang 与前两行的编码声明属于"功能性注释"，删掉会改变文件的解释方式
+CODING_COOKIE_RE = re.compile(r'^[ \t\f]*#.*?coding[:=][ \t]*[-\w.]+')
+
+def _is_header_comment(tok):
+    row = tok.start[0]
+    return (row == 1 and tok.string.startswith("#!")) or (row <= 2 and CODING_COOKIE_RE.match(tok.line))
+
+def _is_plain_string(tok):
+    """只有普通字符串字面量能充当文档字符串（f-string、bytes 不算）。"""
+    import tokenize
+    if tok.type != tokenize.STRING:
+        return False
+    prefix = tok.string[:min(i for i in (tok.string.find("'"), tok.string.find('"')) if i >= 0)]
+    return not set(prefix.lower()) & {'f', 'b'}
+
+def iter_clean_lines(readline, remove_empty=True, strip_docstrings=False):
+    """流式清洗：逐个消费 token，按物理行产出清洗后的文本。
+
+    第一个产出值是源文件编码。只保留尚未定型的那几行原文，
+    注释按 token 列号从原文中裁掉，其余字符原样保留（不经 untokenize 重排）；
+    多行字符串内部的行受保护，不会被当作空行折叠。
+
+    strip_docstrings 为真时同时删除模块/类/函数的文档字符串：候选字符串在确认之前
+    暂缓输出（最多多看一个 token），删除后函数体为空则在原位置补 pass。
+    """
+    import tokenize
+    encoding, first_lines = tokenize.detect_encoding(readline)
+    raw_lines = itertools.chain(first_lines, iter(readline, b''))
+    pending = deque()  # (行号, 文本)：尚未输出的物理行
+    row_count = 0
+
+    def reader():
+        nonlocal row_count
+        raw = next(raw_lines, b'')
+        if not raw:
+            return ''
+        line = raw.decode(encoding)
+        row_count += 1
+        pending.append((row_count, line))
+        return line
+
+    tokens = tokenize.generate_tokens(reader)
+    yield encoding
+
+    cuts = {}         # 行号 -> 注释起始列
+    protected = set()  # 多行 token 内部的行
+    dropped = set()    # 被删除的文档字符串所在行
+    pass_at = {}       # 行号 -> 改写为 pass 的起始列（文档字符串是唯一语句时）
+    blank_count = 0
+
+    def flush(upto):
+        nonlocal blank_count
+        while pending and pending[0][0] < upto:
+            row, line = pending.popleft()
+            text, eol = _split_eol(line)
+            if row in dropped:
+                dropped.discard(row)
+                cuts.pop(row, None)
+                protected.discard(row)
+                continue
+            if row in pass_at:
+                text = text[:pass_at.pop(row)] + "pass"
+                cuts.pop(row, None)
+            elif row in cuts:
+                text = text[:cuts.pop(row)].rstrip()
+            if row in protected:
+                protected.discard(row)
+                blank_count = 0
+            elif not text.strip():
+                blank_count += 1
+                if remove_empty and blank_count > 1: continue
+                text = ""
+            else:
+                blank_count = 0
+            yield text + eol
+
+    # 文档字符串识别状态：只跟踪语句结构，不建语法树
+    head = None              # 当前逻辑行的首个关键字
+    depth = 0                # 括号嵌套深度
+    block_colon = False      # def/class 头部的冒号已出现，等待函数体
+    expect_doc = strip_docstrings  # 下一条语句可能是文档字符串（模块开头即是）
+    at_module = True
+    doc = None               # 候选文档字符串：[起点, 终点, 是否与头部同行, 是否已确认, 是否模块级]
+
+    def drop_doc(need_pass):
+        (start_row, start_col), (end_row, _) = doc[0], doc[1]
+        if need_pass:
+            pass_at[start_row] = start_col
+            start_row += 1
+        dropped.update(range(start_row, end_row + 1))
+
+    for tok in tokens:
+        typ = tok.type
+        yield from flush(min(tok.start[0], doc[0][0]) if doc else tok.start[0])
+        if typ == tokenize.COMMENT and not _is_header_comment(tok):
+            cuts[tok.start[0]] = tok.start[1]
+        elif tok.end[0] > tok.start[0]:
+            protected.update(range(tok.start[0] + 1, tok.end[0] + 1))
+        if not strip_docstrings:
+            continue
+
+        if doc and not doc[3]:
+            if _is_plain_string(tok):
+                doc[1] = tok.end  # 隐式拼接的字符串
+            elif typ == tokenize.NEWLINE:
+                doc[3] = True
+                if doc[2]:
+                    drop_doc(True)
+                    doc = None
+            elif typ != tokenize.COMMENT:
+                doc = None  # 字符串只是表达式的开头，不是文档字符串
+        elif doc and typ not in (tokenize.NL, tokenize.COMMENT):
+            # 已确认：看下一条语句决定函数体是否会被删空
+            drop_doc(typ == tokenize.DEDENT and not doc[4])
+            doc = None
+
+        if typ in (tokenize.NL, tokenize.COMMENT):
+            continue
+        if typ == tokenize.NEWLINE:
+            expect_doc, head = block_colon, None
+            block_colon = False
+        elif typ == tokenize.INDENT:
+            pass  # 保留 expect_doc：函数体的第一条语句紧随其后
+        elif typ == tokenize.DEDENT:
+            expect_doc = False
+        elif typ != tokenize.ENDMARKER:
+            if (expect_doc or block_colon) and _is_plain_string(tok):
+                doc = [tok.start, tok.end, block_colon, False, at_module]
+            expect_doc = block_colon = at_module = False
+            if head is None and tok.string != 'async':
+                head = tok.string
+            if typ == tokenize.OP:
+                if tok.string in '([{':
+                    depth += 1
+                elif tok.string in ')]}':
+                    depth -= 1
+                elif tok.string == ':' and depth == 0 and head in ('def', 'class'):
+                    block_colon = True
+    yield from flush(float('inf'))
+
+def clean_source_file(source_path, remove_empty=True, strip_docstrings=False):
+    """清洗单个文件，生成 <name>_clean.py 并返回其路径；边读边写，不在内存中保留整份源码。"""
+    base, ext = os.path.splitext(source_path)
+    new_path = f"{base}_clean{ext}"
+    tmp_path = new_path + ".tmp"
+    with open(source_path, 'rb') as src:
+        lines = iter_clean_lines(src.readline, remove_empty, strip_docstrings)
+        src_encoding = next(lines)
+        try:
+            with open(tmp_path, 'w', encoding=src_encoding, newline='') as out:
+                out.writelines(lines)
+        except BaseException:
+            if os.path.exists(tmp_path): os.remove(tmp_path)
+            raise
+    os.replace(tmp_path, new_path)
+    return new_path
+
+# 清洗算法变化时递增，使旧缓存全部失效
+CLEANER_VERSION = 2
+
+DEFAULT_CLEAN_IGNORES = ["*_clean.py", ".git", "__pycache__", ".venv", "venv", ".tox", "build", "dist", STATE_DIR]
+
+def collect_python_files(inputs, pattern="*.py", ignores=DEFAULT_CLEAN_IGNORES):
+    """把文件、目录（递归）和通配符（支持 **）展开为去重排序后的 .py 文件列表。"""
+    found = set()
+    for item in inputs:
+        if glob.has_magic(item):
+            candidates = glob.glob(item, recursive=True)
+        elif os.path.isdir(item):
+            candidates = []
+            for dirpath, dirnames, filenames in os.walk(item):
+                dirnames[:] = [d for d in dirnames if not _is_ignored(d, ignores)]
+                candidates.extend(os.path.join(dirpath, fn) for fn in filenames if fnmatch.fnmatch(fn, pattern))
+        else:
+            candidates = [item]
+        for c in candidates:
+            if os.path.isfile(c) and not _is_ignored(os.path.relpath(c, os.path.dirname(item) or "."), ignores):
+                found.add(os.path.abspath(c))
+    return sorted(found)
+
+class CleanCache:
+    """清洗结果缓存：源文件内容哈希 + 清洗选项 -> 已生成的 _clean 文件。
+
+    记录源文件的大小/mtime，未改动的文件只需一次 stat 即可命中；
+    mtime 变了但内容没变时由子进程比对哈希，同样跳过清洗。
+    """
+    def __init__(self, path=None):
+        self.path = path or os.path.join(user_cache_dir(), "clean_cache.json")
+        self.entries = {}
+        self.hits = 0
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    @staticmethod
+    def options_key(remove_empty, strip_docstrings=False):
+        return f"v{CLEANER_VERSION}|empty={int(bool(remove_empty))}|doc={int(bool(strip_docstrings))}"
+
+    def _output_intact(self, entry):
+        try:
+            st = os.stat(entry['output'])
+        except OSError:
+            return False
+        return st.st_size == entry['out_size'] and st.st_mtime_ns == entry['out_mtime']
+
+    def known_hash(self, src, opts_key):
+        """输出仍完好时返回上次的源文件哈希，否则返回 None（必须重新清洗）。"""
+        entry = self.entries.get(src)
+        if entry and entry['opts'] == opts_key and self._output_intact(entry):
+            return entry['sha']
+        return None
+
+    def is_fresh(self, src, opts_key):
+        if self.known_hash(src, opts_key) is None:
+            return False
+        entry = self.entries[src]
+        try:
+            st = os.stat(src)
+        except OSError:
+            return False  # 源文件已不存在，交给逐个文件的清洗流程报错
+        return st.st_size == entry['size'] and st.st_mtime_ns == entry['mtime']
+
+    def store(self, src, opts_key, sha, output):
+        st, out_st = os.stat(src), os.stat(output)
+        self.entries[src] = {
+            'opts': opts_key, 'sha': sha, 'size': st.st_size, 'mtime': st.st_mtime_ns,
+            'output': output, 'out_size': out_st.st_size, 'out_mtime': out_st.st_mtime_ns,
+        }
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f)
+        os.replace(tmp, self.path)
+
+def _clean_with_hash(source_path, remove_empty, skip_if_sha=None, strip_docstrings=False):
+    """子进程入口：先算源文件哈希，与缓存一致则跳过清洗。返回 (新文件, 哈希, 是否命中缓存)。"""
+    sha = _hash_file(source_path).hexdigest()
+    if sha == skip_if_sha:
+        base, ext = os.path.splitext(source_path)
+        return f"{base}_clean{ext}", sha, True
+    return clean_source_file(source_path, remove_empty, strip_docstrings), sha, False
+
+def clean_files_parallel(files, remove_empty=True, workers=None, cache=None, strip_docstrings=False):
+    """把文件分发到进程池清洗，按完成顺序产出 (源文件, 新文件或 None, 错误或 None, 是否命中缓存)。
+
+    传入 cache 时，大小/mtime 未变的文件直接在主进程命中，不进入进程池。
+    """
+    opts_key = CleanCache.options_key(remove_empty, strip_docstrings)
+    todo = []
+    for fpath in files:
+        fpath = os.path.abspath(fpath)
+        if cache is not None and cache.is_fresh(fpath, opts_key):
+            cache.hits += 1
+            yield fpath, cache.entries[fpath]['output'], None, True
+        else:
+            todo.append((fpath, cache.known_hash(fpath, opts_key) if cache is not None else None))
+
+    def finish(fpath, result):
+        new_path, sha, hit = result
+        if cache is not None:
+            cache.store(fpath, opts_key, sha, new_path)
+            if hit: cache.hits += 1
+        return fpath, new_path, None, hit
+
+    try:
+        if len(todo) <= 1:
+            # 单个文件不值得启动进程池
+            for fpath, known in todo:
+                try:
+                    yield finish(fpath, _clean_with_hash(fpath, remove_empty, known, strip_docstrings))
+                except Exception as e:
+                    yield fpath, None, e, False
+            return
+        workers = min(workers or os.cpu_count() or 1, len(todo))
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(_clean_with_hash, f, remove_empty, known, strip_docstrings): f for f, known in todo}
+            for fut in as_completed(futures):
+                try:
+                    yield finish(futures[fut], fut.result())
+                except Exception as e:
+                    yield futures[fut], None, e, False
+    finally:
+        if cache is not None:
+            cache.save()
@@ -0,0 +1,256 @@
+"""命令行入口与批量构建清单。"""
+import os
+import sys
+import threading
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from .options import COMPRESSION_CHOICES, MODE_FLAGS, OPTIMIZE_CHOICES, PackOptions
+from .buildenv import ensure_build_env
+from .history import (build_report, compare_builds, format_build_comparison, format_build_list, list_builds,
+                      SIZE_REGRESSION_PCT, TIME_REGRESSION_PCT)
+from .bench import benchmark_build
+from .build import pack
+from .remote import BuildWorker, remote_pack, WORKER_TOKEN_ENV
+from .analysis import analyze_imports, format_import_report
+from .clean import clean_files_parallel, CleanCache, collect_python_files, DEFAULT_CLEAN_IGNORES
+
+# python -m pypackagingtool（或带参数运行 PyPackagingTool_v3.0.py）即进入命令行模式：
+#   python -m pypackagingtool build targets.toml -j 8
+#   python -m pypackagingtool pack app.py --mode both
+MANIFEST_KEYS = {'script', 'name', 'mode', 'icon', 'resources', 'console', 'upx', 'incremental', 'interpreter',
+                 'compression', 'compress_level', 'compress_lzma', 'optimize', 'precompile',
+                 'collect_tkinter', 'extra_args', 'bench_runs', 'bench_args', 'bench_timeout',
+                 'requirements', 'wheelhouse', 'stage_resources'}
+
+def load_manifest(path):
+    """读取 TOML/JSON 构建清单，返回 PackOptions 列表。
+
+    清单格式：可选的 [defaults] 表 + [[targets]] 数组；相对路径以清单所在目录为基准。
+    """
+    with open(path, 'rb') as f:
+        raw = f.read()
+    if path.lower().endswith(".toml"):
+        try:
+            import tomllib
+        except ImportError:
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise RuntimeError("读取 TOML 清单需要 Python 3.11+ 或安装 tomli")
+        data = tomllib.loads(raw.decode('utf-8'))
+    else:
+        data = json.loads(raw.decode('utf-8'))
+
+    base = os.path.dirname(os.path.abspath(path))
+    defaults = data.get('defaults', {})
+    targets = []
+    for entry in data.get('targets', []):
+        merged = {**defaults, **entry}
+        unknown = set(merged) - MANIFEST_KEYS
+        if unknown:
+            raise ValueError(f"清单包含未知字段: {', '.join(sorted(unknown))}")
+        if 'script' not in merged:
+            raise ValueError("清单中的每个 target 都必须指定 script")
+        for key in ('script', 'icon', 'requirements', 'wheelhouse'):
+            if merged.get(key):
+                merged[key] = os.path.join(base, merged[key])
+        merged['resources'] = [os.path.join(base, r) for r in merged.get('resources', [])]
+        targets.append(PackOptions(**merged))
+    return targets
+
+def _prefixed_logger(prefix, lock, stream=None):
+    def log(msg):
+        out = stream or sys.stdout
+        with lock:
+            for line in msg.splitlines(keepends=True):
+                out.write(f"[{prefix}] {line}" if line.strip() else line)
+            out.flush()
+    return log
+
+def build_many(targets, jobs=None, log_stream=None, workers=None):
+    """在有界线程池中并发构建多个目标，返回 {目标名: 是否成功}；给出 workers 时分发到构建节点。"""
+    jobs = jobs or os.cpu_count() or 1
+    lock = threading.Lock()
+    # 多个目标并发时不能各自 --clean，否则会互相清掉 PyInstaller 的全局缓存
+    purge_cache = jobs == 1
+    results = {}
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = {
+            (pool.submit(remote_pack, t, workers, _prefixed_logger(t.name, lock, log_stream)) if workers else
+             pool.submit(pack, t, _prefixed_logger(t.name, lock, log_stream), purge_cache=purge_cache)): t.name
+            for t in targets
+        }
+        for fut, name in futures.items():
+            try:
+                results[name] = fut.result()
+            except Exception as e:
+                _prefixed_logger(name, lock, log_stream)(f"Error: {e}\n")
+                results[name] = False
+    return results
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(prog="PyPackagingTool", description="PyInstaller 打包工具（命令行模式）")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_build = sub.add_parser("build", help="按 TOML/JSON 清单批量构建")
+    p_build.add_argument("manifest")
+    p_build.add_argument("-j", "--jobs", type=int, default=None, help="并发构建的目标数，默认等于 CPU 核数")
+    p_build.add_argument("--python", dest="interpreter", help="覆盖清单中的 Python 解释器")
+    p_build.add_argument("--incremental", action="store_true", help="对所有目标启用增量构建")
+    p_build.add_argument("--worker", dest="workers", action="append", help="构建节点地址 host:port 或 unix:/path，可多次指定")
+
+    p_clean = sub.add_parser("clean", help="批量清洗代码（删除 # 注释与多余空行）")
+    p_clean.add_argument("paths", nargs="+", help="文件、目录（递归）或通配符，如 'src/**/*.py'")
+    p_clean.add_argument("--keep-empty", action="store_true", help="保留多余空行")
+    p_clean.add_argument("--strip-docstrings", action="store_true", help="同时删除模块/类/函数的文档字符串")
+    p_clean.add_argument("--ignore", action="append", default=None, help="忽略模式，可多次指定（默认忽略 venv/build/_clean.py 等）")
+    p_clean.add_argument("--no-cache", action="store_true", help="不使用清洗缓存，全部重新生成")
+    p_clean.add_argument("-j", "--jobs", type=int, default=None, help="清洗进程数，默认等于 CPU 核数")
+
+    p_pack = sub.add_parser("pack", help="打包单个脚本")
+    p_pack.add_argument("script")
+    p_pack.add_argument("--name", default="")
+    p_pack.add_argument("--mode", choices=sorted(MODE_FLAGS), default="single_dir")
+    p_pack.add_argument("--icon")
+    p_pack.add_argument("--add-data", dest="resources", action="append", default=[])
+    p_pack.add_argument("--stage-resources", action="store_true", help="按内容哈希暂存资源并去重，未改动的资源不再复制")
+    p_pack.add_argument("--console", action="store_true")
+    p_pack.add_argument("--upx", action="store_true", help="等同于 --compression upx")
+    p_pack.add_argument("--compression", choices=list(COMPRESSION_CHOICES), default="none",
+                        help="upx-parallel: 文件夹模式产物构建后用多个 UPX 进程并行压缩")
+    p_pack.add_argument("--compress-level", type=int, choices=range(0, 10), default=0, help="UPX 压缩级别，0 为 UPX 默认")
+    p_pack.add_argument("--lzma", dest="compress_lzma", action="store_true", help="UPX 使用 LZMA 算法")
+    p_pack.add_argument("--optimize", type=int, choices=list(OPTIMIZE_CHOICES), default=0,
+                        help="字节码优化级别，1/2 分别等同于 python -O/-OO")
+    p_pack.add_argument("--precompile", action="store_true", help="按源码哈希缓存并预编译本地模块的字节码")
+    p_pack.add_argument("--incremental", action="store_true")
+    p_pack.add_argument("--python", dest="interpreter", default=sys.executable)
+    p_pack.add_argument("--no-collect-tkinter", dest="collect_tkinter", action="store_false")
+    p_pack.add_argument("--pyi-arg", dest="extra_args", action="append", default=[], help="原样传给 PyInstaller 的参数，可多次指定")
+
+    p_pack.add_argument("--requirements", help="在按此锁文件缓存的隔离 venv 中构建")
+    p_pack.add_argument("--wheelhouse", help="只从该本地 wheel 目录安装依赖")
+    p_pack.add_argument("--bench", dest="bench_runs", type=int, default=0, help="打包后启动测速的次数")
+    p_pack.add_argument("--bench-arg", dest="bench_args", action="append", default=[], help="测速时传给可执行文件的参数")
+    p_pack.add_argument("--worker", dest="workers", action="append", help="在构建节点上执行，可多次指定以负载均衡")
+
+    p_bench = sub.add_parser("bench", help="对已构建的可执行文件做启动测速")
+    p_bench.add_argument("script")
+    p_bench.add_argument("--name", default="")
+    p_bench.add_argument("--mode", choices=sorted(MODE_FLAGS), default="both")
+    p_bench.add_argument("-n", "--runs", type=int, default=5)
+    p_bench.add_argument("--arg", dest="bench_args", action="append", default=[], help="传给可执行文件的参数，如 --version")
+    p_bench.add_argument("--timeout", type=float, default=30)
+
+    p_env = sub.add_parser("env", help="预先创建/复用某个依赖锁文件对应的隔离构建环境")
+    p_env.add_argument("requirements")
+    p_env.add_argument("--python", dest="interpreter", default=sys.executable, help="创建 venv 所用的基础解释器")
+    p_env.add_argument("--wheelhouse")
+
+    p_serve = sub.add_parser("serve", help="作为构建节点运行，接收 pack/build --worker 发来的任务")
+    p_serve.add_argument("--listen", default="127.0.0.1:8765", help="监听地址 host:port 或 unix:/path（默认只监听本机）")
+    p_serve.add_argument("--slots", type=int, default=1, help="同时执行的任务数")
+    p_serve.add_argument("--python", dest="interpreter", default=sys.executable, help="执行打包所用的解释器")
+    p_serve.add_argument("--wheelhouse", help="任务带依赖锁文件时，只从该本地 wheel 目录安装")
+    p_serve.add_argument("--workdir", help="任务临时目录所在位置，默认在用户缓存目录下")
+
+    p_analyze = sub.add_parser("analyze", help="分析入口脚本的导入图并给出打包参数建议")
+    p_analyze.add_argument("script")
+    p_analyze.add_argument("--python", dest="interpreter", default=sys.executable)
+
+    p_history = sub.add_parser("history", help="查看构建历史，对比两次构建的耗时与产物体积")
+    p_history.add_argument("project", help="项目目录或其中的入口脚本")
+    p_history.add_argument("--name", help="只看该目标名称")
+    p_history.add_argument("-n", "--limit", type=int, default=20)
+    p_history.add_argument("--compare", nargs="*", type=int, metavar="ID",
+                           help="对比 [基准 ID] [目标 ID]，省略时对比最近两次成功构建；发现回归时退出码为 1")
+    p_history.add_argument("--size-threshold", type=float, default=SIZE_REGRESSION_PCT, help="体积增长超过该百分比视为回归")
+    p_history.add_argument("--time-threshold", type=float, default=TIME_REGRESSION_PCT, help="耗时增长超过该百分比视为回归")
+    p_history.add_argument("--json", action="store_true",
+                           help="输出 JSON：列表为每次构建的完整记录（含各阶段耗时），对比为差异明细")
+
+    args = parser.parse_args(argv)
+    if args.command == "clean":
+        files = collect_python_files(args.paths, ignores=DEFAULT_CLEAN_IGNORES + (args.ignore or []))
+        cache = None if args.no_cache else CleanCache()
+        failed = 0
+        for fpath, new_path, error, hit in clean_files_parallel(files, not args.keep_empty, args.jobs, cache,
+                                                                args.strip_docstrings):
+            if error is not None:
+                failed += 1
+                print(f"❌ {fpath}: {error}")
+            elif not hit:
+                print(f"✅ {fpath} -> {new_path}")
+        hits = f"，缓存命中 {cache.hits}" if cache else ""
+        print(f"\n完成: 成功 {len(files) - failed}/{len(files)}{hits}")
+        return 1 if failed else 0
+    if args.command == "bench":
+        opts = PackOptions(script=args.script, name=args.name, mode=args.mode, bench_runs=args.runs,
+                           bench_args=args.bench_args, bench_timeout=args.timeout)
+        return 0 if benchmark_build(opts, log=lambda m: print(m, end="", flush=True)) else 1
+    if args.command == "env":
+        print(ensure_build_env(args.requirements, args.interpreter, args.wheelhouse,
+                               log=lambda m: print(m, end="", file=sys.stderr, flush=True)))
+        return 0
+    if args.command == "serve":
+        # 令牌只从环境变量读取，避免出现在进程列表里；客户端使用同名环境变量
+        worker = BuildWorker(args.listen, args.slots, args.interpreter, args.wheelhouse,
+                             os.environ.get(WORKER_TOKEN_ENV), args.workdir,
+                             log=lambda m: print(m, end="", flush=True))
+        try:
+            worker.bind()
+        except (OSError, ValueError) as e:
+            print(f"❌ 无法启动构建节点: {e}", file=sys.stderr)
+            return 2
+        try:
+            worker.serve_forever()
+        except KeyboardInterrupt:
+            worker.stop()
+        return 0
+    if args.command == "analyze":
+        print(format_import_report(analyze_imports(args.script, args.interpreter)), end="")
+        return 0
+    if args.command == "history":
+        project = args.project if os.path.isdir(args.project) else os.path.dirname(os.path.abspath(args.project))
+        if args.compare is None:
+            rows = list_builds(project, args.name, args.limit)
+            if args.json:
+                print(json.dumps([build_report(project, r['id']) for r in rows], ensure_ascii=False, indent=2))
+            else:
+                print(format_build_list(rows), end="")
+            return 0
+        if len(args.compare) > 2:
+            parser.error("--compare 最多接受两个 ID")
+        # 单个 ID 视为目标，与它之前的上一次成功构建对比
+        base, head = ([None] + args.compare)[-2:] if args.compare else (None, None)
+        cmp = compare_builds(project, head=head, base=base, name=args.name,
+                             size_pct=args.size_threshold, time_pct=args.time_threshold)
+        if args.json:
+            print(json.dumps(cmp, ensure_ascii=False, indent=2))
+        else:
+            print(format_build_comparison(cmp), end="")
+        return 1 if cmp and cmp['regressions'] else 0
+    if args.command == "pack":
+        opts = PackOptions(
+            script=args.script, name=args.name, mode=args.mode, interpreter=args.interpreter,
+            icon=args.icon, resources=args.resources, console=args.console, upx=args.upx,
+            compression=args.compression, compress_level=args.compress_level, compress_lzma=args.compress_lzma,
+            optimize=args.optimize, precompile=args.precompile,
+            incremental=args.incremental, collect_tkinter=args.collect_tkinter, extra_args=args.extra_args,
+            bench_runs=args.bench_runs, bench_args=args.bench_args,
+            requirements=args.requirements, wheelhouse=args.wheelhouse, stage_resources=args.stage_resources)
+        log = lambda m: print(m, end="", flush=True)
+        if args.workers:
+            return 0 if remote_pack(opts, args.workers, log) else 1
+        return 0 if pack(opts, log=log) else 1
+
+    targets = load_manifest(args.manifest)
+    for t in targets:
+        if args.interpreter: t.interpreter = args.interpreter
+        if args.incremental: t.incremental = True
+    results = build_many(targets, args.jobs, workers=args.workers)
+    failed = [n for n, ok in results.items() if not ok]
+    print(f"\n完成: 成功 {len(results) - len(failed)}/{len(results)}" + (f"，失败: {', '.join(failed)}" if failed else ""))
+    return 1 if failed else 0
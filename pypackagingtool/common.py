@@ -0,0 +1,61 @@
+"""项目状态目录、用户缓存目录等各模块共用的小工具。"""
+import os
+import sys
+import shutil
+import subprocess
+import hashlib
+import fnmatch
+import shlex
+
+# 判断是否是打包后的环境
+IS_FROZEN = getattr(sys, 'frozen', False)
+
+# 项目级状态目录（指纹等），不会被"清理临时文件"删除
+STATE_DIR = ".pypack"
+
+def user_cache_dir():
+    """跨项目共享的持久缓存目录。"""
+    if os.name == 'nt':
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "PyPackagingTool")
+
+def _hash_file(path, h=None):
+    h = h or hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h
+
+def _link_or_copy(src, dst):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)  # 跨文件系统或不支持硬链接时退化为复制
+
+def split_args(text):
+    return shlex.split(text, posix=os.name != 'nt')
+
+def join_args(args):
+    return subprocess.list2cmdline(args) if os.name == 'nt' else shlex.join(args)
+
+def _fmt_size(n):
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024 or unit == "GB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+
+def _path_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for fn in filenames:
+            try: total += os.path.getsize(os.path.join(dirpath, fn))
+            except OSError: pass
+    return total
+
+def _is_ignored(path, ignores):
+    parts = os.path.normpath(path).split(os.sep)
+    return any(fnmatch.fnmatch(part, pat) for part in parts for pat in ignores)
@@ -0,0 +1,159 @@
+"""增量构建的输入指纹：本地 import 闭包、解释器身份与资源状态。"""
+import os
+import subprocess
+import threading
+import ast
+import json
+import hashlib
+
+from .common import _hash_file, user_cache_dir
+
+def _resolve_local_module(base_dir, dotted):
+    """把模块名解析为 base_dir 下的 .py 文件，不是本地模块则返回 None。"""
+    parts = [p for p in dotted.split('.') if p]
+    if not parts:
+        return None
+    stem = os.path.join(base_dir, *parts)
+    for candidate in (stem + ".py", os.path.join(stem, "__init__.py")):
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+def _iter_imports(tree, path, root_dir):
+    """产出 (解析基准目录, 模块名, 相对导入层级)；from 导入同时产出 "模块.名称" 以覆盖子模块。"""
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for a in node.names:
+                yield root_dir, a.name, 0
+        elif isinstance(node, ast.ImportFrom):
+            base = root_dir
+            if node.level:
+                base = os.path.dirname(path)
+                for _ in range(node.level - 1):
+                    base = os.path.dirname(base)
+            mod = node.module or ""
+            yield base, mod, node.level
+            for a in node.names:
+                yield base, f"{mod}.{a.name}" if mod else a.name, node.level
+
+def _walk_local_imports(script):
+    """遍历入口脚本的本地 import 闭包，产出 (文件路径, 语法树)。"""
+    script = os.path.abspath(script)
+    root_dir = os.path.dirname(script)
+    seen = {script}
+    pending = [script]
+    while pending:
+        path = pending.pop()
+        try:
+            with open(path, 'rb') as f:
+                tree = ast.parse(f.read(), filename=path)
+        except (SyntaxError, ValueError, OSError):
+            continue
+        yield path, tree
+        for base, dotted, _ in _iter_imports(tree, path, root_dir):
+            # 包内模块需要连同各级 __init__.py 一起计入
+            parts = dotted.split('.')
+            for i in range(1, len(parts) + 1):
+                found = _resolve_local_module(base, '.'.join(parts[:i]))
+                if found and found not in seen:
+                    seen.add(found)
+                    pending.append(found)
+
+def collect_local_modules(script):
+    """静态遍历入口脚本的 import，返回其传递依赖中的所有本地 .py 文件（含入口）。"""
+    return sorted(path for path, _ in _walk_local_imports(script))
+
+# 第一行为版本信息，其后每行一个 site-packages 目录，用于判断缓存的探测结果是否过期
+_INTERPRETER_PROBE = """import sys, sysconfig
+try:
+    import PyInstaller; v = PyInstaller.__version__
+except Exception: v = None
+print(sys.version.replace("\\n", " "), v)
+for key in ("purelib", "platlib"):
+    print(sysconfig.get_paths()[key])
+"""
+
+_interpreter_cache = {}
+
+_interpreter_cache_lock = threading.Lock()
+
+def _interpreter_mtimes(interpreter, dirs):
+    """解释器文件与其 site-packages 目录的 mtime：升级 Python 或 pip 安装/卸载包都会改变其中之一。"""
+    mtimes = []
+    for path in (interpreter, *dirs):
+        try:
+            mtimes.append(os.stat(path).st_mtime_ns)
+        except OSError:
+            mtimes.append(None)
+    return mtimes
+
+def _interpreter_identity(interpreter):
+    """解释器路径 + 版本 + PyInstaller 版本，任何一项变化都应触发重建。
+
+    探测要启动一次解释器，结果按解释器路径缓存在内存与 user_cache_dir() 中，
+    解释器文件及其 site-packages 目录的 mtime 均未变化时直接复用。
+    """
+    path = os.path.abspath(interpreter)
+    cache_file = os.path.join(user_cache_dir(), "interpreters.json")
+    with _interpreter_cache_lock:
+        if not _interpreter_cache:
+            try:
+                with open(cache_file, encoding='utf-8') as f:
+                    _interpreter_cache.update(json.load(f))
+            except (OSError, ValueError):
+                pass
+        entry = _interpreter_cache.get(path)
+        if entry and entry['mtimes'] == _interpreter_mtimes(path, entry['dirs']):
+            return entry['identity']
+    try:
+        out = subprocess.run([interpreter, "-c", _INTERPRETER_PROBE], capture_output=True, text=True,
+                             timeout=60).stdout.splitlines()
+    except Exception:
+        out = []
+    identity = f"{path}|{out[0].strip() if out else ''}"
+    if len(out) < 2:
+        return identity  # 探测失败的结果不缓存，下次重试
+    dirs = sorted({d.strip() for d in out[1:] if d.strip()})
+    with _interpreter_cache_lock:
+        _interpreter_cache[path] = {'identity': identity, 'dirs': dirs, 'mtimes': _interpreter_mtimes(path, dirs)}
+        try:
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+            tmp = f"{cache_file}.{os.getpid()}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(_interpreter_cache, f, ensure_ascii=False)
+            os.replace(tmp, cache_file)
+        except OSError:
+            pass  # 缓存写不进去不影响结果
+    return identity
+
+def compute_build_fingerprint(script, commands, resources=(), icon=None, interpreter=None):
+    """计算一次构建的输入指纹。
+
+    源码与图标按内容哈希；资源文件数量/体积可能很大，按 (路径, 大小, mtime) 计入；
+    commands 是各模式最终的 PyInstaller 命令，已涵盖全部打包选项。
+    """
+    h = hashlib.sha256()
+    h.update(json.dumps(commands, ensure_ascii=False).encode('utf-8'))
+    if interpreter:
+        h.update(_interpreter_identity(interpreter).encode('utf-8'))
+    for path in collect_local_modules(script):
+        h.update(path.encode('utf-8'))
+        _hash_file(path, h)
+    if icon and os.path.isfile(icon):
+        _hash_file(icon, h)
+    def add_stat(path):
+        try:
+            st = os.lstat(path)
+        except OSError:
+            return  # 读取不到的条目（如失效的符号链接）不影响打包，也不计入指纹
+        h.update(f"{path}|{st.st_size}|{st.st_mtime_ns}".encode('utf-8'))
+
+    for r in resources:
+        if os.path.isfile(r):
+            add_stat(r)
+        elif os.path.isdir(r):
+            for dirpath, dirnames, filenames in os.walk(r):
+                dirnames.sort()
+                for fn in sorted(filenames):
+                    add_stat(os.path.join(dirpath, fn))
+    return h.hexdigest()
@@ -0,0 +1,794 @@
+"""PyPackagingTool 的图形界面；打包与清洗均调用 pypackagingtool 中的引擎。"""
+import os
+import sys
+import time
+import queue
+import shutil
+import subprocess
+import threading
+import tkinter as tk
+from tkinter import filedialog, messagebox, ttk
+
+from . import (BuildQueue, COMPRESSION_CHOICES, CleanCache, DEFAULT_CLEAN_IGNORES, HISTORY_STATUS, IS_FROZEN,
+               LOG_FILTERS, LOG_MAX_LINES, LogPipeline, OPTIMIZE_CHOICES, PackOptions, SIZE_REGRESSION_PCT,
+               STATE_DIR, TIME_REGRESSION_PCT, analyze_imports, apply_suggestions,
+               clean_files_parallel, collect_python_files, compare_builds, ensure_build_env,
+               format_build_comparison, format_import_report, join_args, list_builds, split_args)
+from .common import _fmt_size
+
+class PackApp:
+    def __init__(self, root, started=None):
+        self.root = root
+        # 进程启动时刻（由启动脚本尽早记录），用于统计界面首帧耗时
+        self.started = started if started is not None else time.perf_counter()
+        self.root.title("PyPackagingTool_v3.0")
+        self.root.geometry("950x750")
+        
+        # === GUI 美化 ===
+        self._setup_styles()
+
+        # === 变量初始化 ===
+        self.python_interpreter = tk.StringVar()
+        self.requirements_path = tk.StringVar()
+        self.wheelhouse_path = tk.StringVar()
+        self.main_script_path = tk.StringVar()
+        self.icon_path = tk.StringVar()
+        self.output_name = tk.StringVar()
+        self.output_dir = tk.StringVar()
+        
+        # 选项变量
+        self.compression = tk.StringVar(value=COMPRESSION_CHOICES['none'])
+        self.compress_level = tk.IntVar(value=0)
+        self.compress_lzma = tk.BooleanVar(value=False)
+        self.optimize_level = tk.StringVar(value=OPTIMIZE_CHOICES[0])
+        self.precompile = tk.BooleanVar(value=False)
+        self.pack_option_var = tk.StringVar(value="single_dir") 
+        self.console_window = tk.BooleanVar(value=False)
+        self.incremental_build = tk.BooleanVar(value=False)
+        self.stage_resources = tk.BooleanVar(value=False)
+        self.collect_tkinter = tk.BooleanVar(value=True)
+        self.extra_args = tk.StringVar()
+        self.bench_runs = tk.IntVar(value=0)
+        self.bench_args = tk.StringVar(value="--version")
+        self.remote_workers = tk.StringVar()
+        
+        # 图标策略: 1=默认, 2=自定义, 3=无
+        self.icon_mode = tk.IntVar(value=1) 
+        
+        # 自动检测环境
+        self._detect_python_interpreter()
+        
+        # === 默认图标逻辑 ===
+        # 获取资源路径（兼容打包后和开发环境；开发环境下为启动脚本所在目录）
+        self.base_path = sys._MEIPASS if IS_FROZEN else os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.default_icon_path = os.path.join(self.base_path, "default.ico")
+        
+        # 列表与线程
+        self.resource_files = []
+        self.clean_files = []
+        self.log_queue = queue.Queue()
+        self.clean_log_queue = queue.Queue()
+        self.log_pipeline = LogPipeline(self.log_queue)
+        self.clean_log_pipeline = LogPipeline(self.clean_log_queue)
+        self.log_filter = tk.StringVar(value="全部")
+        self.log_spool_path = tk.StringVar()
+        # 构建队列：并发槽位数与单个任务的超时（分钟，0 表示不限）
+        self.job_slots = tk.IntVar(value=1)
+        self.job_timeout = tk.IntVar(value=0)
+        self.build_queue = BuildQueue(1, log_for=self._job_logger,
+                                      on_finish=lambda job: self.root.after(0, self._job_finished, job))
+        self._batch = []
+        # 构建历史对比的回归阈值（百分比）
+        self.size_threshold = tk.IntVar(value=SIZE_REGRESSION_PCT)
+        self.time_threshold = tk.IntVar(value=TIME_REGRESSION_PCT)
+        
+        self.create_widgets()
+        
+        # 启动日志监听
+        self.update_log()
+        self.update_clean_log()
+        self.update_jobs()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        # 首帧画出之后再做启动检测，不阻塞窗口出现
+        self.root.after_idle(self._after_first_frame)
+
+    def _after_first_frame(self):
+        self.root.update_idletasks()
+        first_frame = time.perf_counter() - self.started
+        self.log_queue.put(f"界面就绪: 首帧耗时 {first_frame * 1000:.0f} ms\n")
+        if not IS_FROZEN:
+            self._check_pyinstaller_installed()
+
+    def _setup_styles(self):
+        style = ttk.Style()
+        try:
+            style.theme_use('clam')
+        except: pass
+        
+        BG_COLOR = "#F0F2F5"
+        PRIMARY_COLOR = "#007AFF"
+        TEXT_COLOR = "#333333"
+        WHITE = "#FFFFFF"
+        
+        self.root.configure(bg=BG_COLOR)
+        style.configure("TFrame", background=BG_COLOR)
+        style.configure("TLabelframe", background=BG_COLOR, foreground=TEXT_COLOR)
+        style.configure("TLabelframe.Label", background=BG_COLOR, foreground="#555555", font=("微软雅黑", 10, "bold"))
+        style.configure("TLabel", background=BG_COLOR, foreground=TEXT_COLOR, font=("微软雅黑", 9))
+        style.configure("TButton", font=("微软雅黑", 9), padding=5)
+        style.configure("TRadiobutton", background=BG_COLOR, font=("微软雅黑", 9))
+        style.configure("TCheckbutton", background=BG_COLOR, font=("微软雅黑", 9))
+        style.configure("Accent.TButton", foreground=WHITE, background=PRIMARY_COLOR, font=("微软雅黑", 10, "bold"))
+        style.map("Accent.TButton", background=[('active', "#005BBB")])
+
+    def _detect_python_interpreter(self):
+        if IS_FROZEN:
+            # 共享桌面上 PATH 可能包含网络盘，在后台查找，找到后再回填
+            self.python_interpreter.set("正在检测...")
+            # 后台线程不能直接调用 Tk（mainloop 尚未启动或已退出时会抛异常），结果经队列交给主线程
+            result = queue.Queue()
+            threading.Thread(target=lambda: result.put(shutil.which("python")), daemon=True).start()
+            self._poll_interpreter(result)
+        else:
+            self.python_interpreter.set(sys.executable)
+
+    def _poll_interpreter(self, result):
+        try:
+            path = result.get_nowait()
+        except queue.Empty:
+            self.root.after(100, self._poll_interpreter, result)
+            return
+        self.python_interpreter.set(path if path else "未检测到，请手动选择")
+
+    def _check_pyinstaller_installed(self):
+        # 只查找模块位置，不真正导入整个 PyInstaller 包
+        import importlib.util
+        if importlib.util.find_spec("PyInstaller") is None:
+            if messagebox.askyesno("提示", "未检测到PyInstaller，是否安装？"):
+                try:
+                    subprocess.call([sys.executable, '-m', 'pip', 'install', 'pyinstaller'])
+                    messagebox.showinfo("成功", "安装完成")
+                except Exception as e:
+                    messagebox.showerror("错误", f"安装失败: {e}")
+
+    def create_widgets(self):
+        main_container = ttk.Frame(self.root, padding=10)
+        main_container.pack(fill="both", expand=True)
+        self.tab_control = ttk.Notebook(main_container)
+        self.settings_tab = ttk.Frame(self.tab_control)
+        self.log_tab = ttk.Frame(self.tab_control)
+        self.clean_tab = ttk.Frame(self.tab_control)
+        self.queue_tab = ttk.Frame(self.tab_control)
+        self.history_tab = ttk.Frame(self.tab_control)
+        self.tab_control.add(self.settings_tab, text=" ⚙️ 打包配置 ")
+        self.tab_control.add(self.log_tab, text=" 📝 执行日志 ")
+        self.tab_control.add(self.queue_tab, text=" 📋 任务队列 ")
+        self.tab_control.add(self.history_tab, text=" 📈 构建历史 ")
+        self.tab_control.add(self.clean_tab, text=" 🧹 代码清洗 ")
+        self.tab_control.pack(expand=True, fill="both")
+        self._init_settings_tab()
+        # 其余标签页在首次切换到时才创建
+        self._lazy_tabs = {
+            str(self.log_tab): self._init_log_tab,
+            str(self.queue_tab): self._init_queue_tab,
+            str(self.history_tab): self._init_history_tab,
+            str(self.clean_tab): self._init_clean_tab,
+        }
+        self.tab_control.bind("<<NotebookTabChanged>>", lambda e: self._ensure_tab(self.tab_control.select()))
+
+    def _ensure_tab(self, tab):
+        init = self._lazy_tabs.pop(str(tab), None)
+        if init: init()
+
+    def _tab_ready(self, tab):
+        return str(tab) not in self._lazy_tabs
+
+    def _init_settings_tab(self):
+        # --- 环境区 ---
+        env_frame = ttk.LabelFrame(self.settings_tab, text="核心环境")
+        env_frame.pack(fill="x", padx=10, pady=5)
+        ttk.Label(env_frame, text="Python解释器:").grid(row=0, column=0, padx=5)
+        ttk.Entry(env_frame, textvariable=self.python_interpreter, width=70).grid(row=0, column=1, padx=5)
+        ttk.Button(env_frame, text="选择...", command=self.select_interpreter).grid(row=0, column=2, padx=5, pady=5)
+        ttk.Label(env_frame, text="隔离环境依赖:").grid(row=1, column=0, padx=5)
+        ttk.Entry(env_frame, textvariable=self.requirements_path, width=70).grid(row=1, column=1, padx=5)
+        ttk.Button(env_frame, text="选择...", command=self.select_requirements).grid(row=1, column=2, padx=5, pady=2)
+        ttk.Label(env_frame, text="本地 wheel 目录:").grid(row=2, column=0, padx=5)
+        ttk.Entry(env_frame, textvariable=self.wheelhouse_path, width=70).grid(row=2, column=1, padx=5)
+        ttk.Button(env_frame, text="选择...", command=self.select_wheelhouse).grid(row=2, column=2, padx=5, pady=2)
+        
+        # --- 项目区 ---
+        proj_frame = ttk.LabelFrame(self.settings_tab, text="项目设置")
+        proj_frame.pack(fill="x", padx=10, pady=5)
+        ttk.Label(proj_frame, text="入口脚本(.py):").grid(row=0, column=0, sticky="e", padx=5, pady=5)
+        ttk.Entry(proj_frame, textvariable=self.main_script_path, width=70).grid(row=0, column=1, padx=5)
+        ttk.Button(proj_frame, text="浏览...", command=self.select_main_script).grid(row=0, column=2, padx=5)
+        ttk.Label(proj_frame, text="生成文件名:").grid(row=1, column=0, sticky="e", padx=5, pady=5)
+        ttk.Entry(proj_frame, textvariable=self.output_name, width=30).grid(row=1, column=1, sticky="w", padx=5)
+
+        # 图标设置区域
+        icon_frame = ttk.LabelFrame(self.settings_tab, text="图标设置")
+        icon_frame.pack(fill="x", padx=10, pady=5)
+        has_default = os.path.exists(self.default_icon_path)
+        default_txt = "使用内置默认图标" + (" (✅可用)" if has_default else " (❌未找到)")
+        ttk.Radiobutton(icon_frame, text=default_txt, variable=self.icon_mode, value=1).grid(row=0, column=0, sticky="w", padx=10)
+        ttk.Radiobutton(icon_frame, text="自定义图标:", variable=self.icon_mode, value=2).grid(row=1, column=0, sticky="w", padx=10)
+        ttk.Radiobutton(icon_frame, text="不使用图标", variable=self.icon_mode, value=3).grid(row=2, column=0, sticky="w", padx=10)
+        ttk.Entry(icon_frame, textvariable=self.icon_path, width=50).grid(row=1, column=1, padx=5)
+        ttk.Button(icon_frame, text="浏览", command=self.select_icon).grid(row=1, column=2, padx=5)
+        
+        # --- 资源区 ---
+        res_frame = ttk.LabelFrame(self.settings_tab, text="资源文件 (图片/DLL/配置)")
+        res_frame.pack(fill="both", expand=True, padx=10, pady=5)
+        list_f = ttk.Frame(res_frame)
+        list_f.pack(fill="both", expand=True, padx=5)
+        self.res_list = tk.Listbox(list_f, height=4, relief="flat", bg="white", highlightthickness=1, highlightcolor="#ccc")
+        self.res_list.pack(side="left", fill="both", expand=True)
+        sb = ttk.Scrollbar(list_f, command=self.res_list.yview)
+        sb.pack(side="right", fill="y")
+        self.res_list.config(yscrollcommand=sb.set)
+        btn_f = ttk.Frame(res_frame)
+        btn_f.pack(fill="x", pady=5)
+        ttk.Button(btn_f, text="+ 添加文件", command=self.add_res_file).pack(side="left", padx=5)
+        ttk.Button(btn_f, text="+ 添加文件夹", command=self.add_res_folder).pack(side="left", padx=5)
+        ttk.Button(btn_f, text="- 删除选中", command=lambda: self._remove_sel(self.res_list, self.resource_files)).pack(side="left", padx=5)
+        ttk.Checkbutton(btn_f, text="暂存并去重 (适合大型资源目录)", variable=self.stage_resources).pack(side="right", padx=5)
+
+        # --- 选项区 ---
+        opt_frame = ttk.LabelFrame(self.settings_tab, text="打包参数")
+        opt_frame.pack(fill="x", padx=10, pady=5)
+        ttk.Radiobutton(opt_frame, text="单文件 (.exe)", variable=self.pack_option_var, value="single_file").pack(side="left", padx=10)
+        ttk.Radiobutton(opt_frame, text="文件夹 (推荐排错)", variable=self.pack_option_var, value="single_dir").pack(side="left", padx=10)
+        ttk.Radiobutton(opt_frame, text="同时生成两种 (Both)", variable=self.pack_option_var, value="both").pack(side="left", padx=10)
+        ttk.Separator(opt_frame, orient="vertical").pack(side="left", fill="y", padx=10, pady=5)
+        ttk.Checkbutton(opt_frame, text="显示控制台窗口 (Debug)", variable=self.console_window).pack(side="left", padx=5)
+        ttk.Checkbutton(opt_frame, text="增量构建", variable=self.incremental_build).pack(side="left", padx=5)
+
+        adv_frame = ttk.LabelFrame(self.settings_tab, text="高级参数")
+        adv_frame.pack(fill="x", padx=10, pady=5)
+        adv_row = ttk.Frame(adv_frame)
+        adv_row.pack(fill="x")
+        ttk.Checkbutton(adv_row, text="收集 tkinter", variable=self.collect_tkinter).pack(side="left", padx=5)
+        ttk.Label(adv_row, text="附加参数:").pack(side="left", padx=(10, 0))
+        ttk.Entry(adv_row, textvariable=self.extra_args).pack(side="left", fill="x", expand=True, padx=5, pady=5)
+        comp_row = ttk.Frame(adv_frame)
+        comp_row.pack(fill="x")
+        ttk.Label(comp_row, text="二进制压缩:").pack(side="left", padx=5)
+        ttk.Combobox(comp_row, textvariable=self.compression, values=list(COMPRESSION_CHOICES.values()),
+                     state="readonly", width=22).pack(side="left")
+        ttk.Label(comp_row, text="级别 (0=UPX默认):").pack(side="left", padx=(10, 0))
+        ttk.Spinbox(comp_row, from_=0, to=9, textvariable=self.compress_level, width=4).pack(side="left", padx=5)
+        ttk.Checkbutton(comp_row, text="LZMA (更小、更慢)", variable=self.compress_lzma).pack(side="left", padx=5, pady=5)
+        pyc_row = ttk.Frame(adv_frame)
+        pyc_row.pack(fill="x")
+        ttk.Label(pyc_row, text="字节码优化:").pack(side="left", padx=5)
+        ttk.Combobox(pyc_row, textvariable=self.optimize_level, values=list(OPTIMIZE_CHOICES.values()),
+                     state="readonly", width=22).pack(side="left")
+        ttk.Checkbutton(pyc_row, text="预编译本地模块 (缓存字节码)", variable=self.precompile).pack(side="left", padx=10, pady=5)
+        bench_row = ttk.Frame(adv_frame)
+        bench_row.pack(fill="x")
+        ttk.Label(bench_row, text="打包后启动测速次数 (0=关闭):").pack(side="left", padx=5)
+        ttk.Spinbox(bench_row, from_=0, to=50, textvariable=self.bench_runs, width=5).pack(side="left")
+        ttk.Label(bench_row, text="测速启动参数:").pack(side="left", padx=(10, 0))
+        ttk.Entry(bench_row, textvariable=self.bench_args, width=30).pack(side="left", padx=5, pady=5)
+        remote_row = ttk.Frame(adv_frame)
+        remote_row.pack(fill="x")
+        ttk.Label(remote_row, text="远程构建节点:").pack(side="left", padx=5)
+        ttk.Entry(remote_row, textvariable=self.remote_workers).pack(side="left", fill="x", expand=True, padx=5, pady=5)
+        ttk.Label(remote_row, text="host:port，多个用逗号分隔；留空在本机构建", foreground="#666").pack(side="left", padx=5)
+
+        # --- 底部操作栏 ---
+        act_frame = ttk.Frame(self.settings_tab)
+        act_frame.pack(fill="x", padx=10, pady=15)
+        ttk.Button(act_frame, text="🧹 清理临时文件", command=self.clean_temp).pack(side="left")
+        ttk.Button(act_frame, text="🔍 依赖分析", command=self.start_analysis).pack(side="left", padx=5)
+        ttk.Button(act_frame, text="🚀 开始打包", style="Accent.TButton", command=self.start_pack).pack(side="right", ipadx=20)
+
+    def _init_log_tab(self):
+        bar = ttk.Frame(self.log_tab, padding=(10, 10, 10, 0))
+        bar.pack(fill="x")
+        ttk.Label(bar, text="显示级别:").pack(side="left")
+        ttk.Combobox(bar, textvariable=self.log_filter, values=list(LOG_FILTERS), state="readonly", width=12).pack(side="left", padx=5)
+        ttk.Button(bar, text="打开完整日志", command=self.open_log_file).pack(side="right")
+        ttk.Label(bar, textvariable=self.log_spool_path, foreground="#666").pack(side="right", padx=5)
+        f = ttk.Frame(self.log_tab, padding=10)
+        f.pack(fill="both", expand=True)
+        self.log_text = tk.Text(f, wrap="word", bg="#1E1E1E", fg="#00FF00", font=("Consolas", 10))
+        sb = ttk.Scrollbar(f, command=self.log_text.yview)
+        self.log_text.config(yscrollcommand=sb.set)
+        self.log_text.pack(side="left", fill="both", expand=True)
+        sb.pack(side="right", fill="y")
+        self.progress = ttk.Progressbar(self.log_tab, orient="horizontal", mode="determinate")
+        self.progress.pack(fill="x", padx=10, pady=5)
+
+    def _init_queue_tab(self):
+        bar = ttk.Frame(self.queue_tab, padding=(10, 10, 10, 0))
+        bar.pack(fill="x")
+        ttk.Label(bar, text="并发槽位:").pack(side="left")
+        ttk.Spinbox(bar, from_=1, to=os.cpu_count() or 8, textvariable=self.job_slots, width=4,
+                    command=self._apply_slots).pack(side="left", padx=5)
+        ttk.Label(bar, text="单任务超时 (分钟, 0=不限):").pack(side="left", padx=(10, 0))
+        ttk.Spinbox(bar, from_=0, to=1440, textvariable=self.job_timeout, width=6).pack(side="left", padx=5)
+        ttk.Button(bar, text="清除已结束", command=self.clear_finished_jobs).pack(side="right")
+        ttk.Button(bar, text="取消全部", command=self.build_queue.cancel_all).pack(side="right", padx=5)
+        ttk.Button(bar, text="取消选中", command=self.cancel_selected_jobs).pack(side="right")
+        f = ttk.Frame(self.queue_tab, padding=10)
+        f.pack(fill="both", expand=True)
+        columns = {"id": ("#", 40), "name": ("名称", 160), "mode": ("模式", 90), "status": ("状态", 80),
+                   "progress": ("进度", 70), "elapsed": ("耗时", 80), "script": ("入口脚本", 360)}
+        self.job_tree = ttk.Treeview(f, columns=list(columns), show="headings", selectmode="extended")
+        for col, (title, width) in columns.items():
+            self.job_tree.heading(col, text=title)
+            self.job_tree.column(col, width=width, anchor="w" if col == "script" else "center")
+        sb = ttk.Scrollbar(f, command=self.job_tree.yview)
+        self.job_tree.config(yscrollcommand=sb.set)
+        self.job_tree.pack(side="left", fill="both", expand=True)
+        sb.pack(side="right", fill="y")
+
+    def _init_history_tab(self):
+        bar = ttk.Frame(self.history_tab, padding=(10, 10, 10, 0))
+        bar.pack(fill="x")
+        ttk.Label(bar, text="回归阈值  体积 (%):").pack(side="left")
+        ttk.Spinbox(bar, from_=1, to=1000, textvariable=self.size_threshold, width=5).pack(side="left", padx=5)
+        ttk.Label(bar, text="耗时 (%):").pack(side="left", padx=(10, 0))
+        ttk.Spinbox(bar, from_=1, to=1000, textvariable=self.time_threshold, width=5).pack(side="left", padx=5)
+        ttk.Button(bar, text="对比所选", command=self.compare_selected_builds).pack(side="right")
+        ttk.Button(bar, text="刷新", command=self.refresh_history).pack(side="right", padx=5)
+        ttk.Label(self.history_tab, text="选中一条与其上一次成功构建对比，选中两条则互相对比",
+                  foreground="#666", padding=(10, 5, 10, 0)).pack(anchor="w")
+        pane = ttk.PanedWindow(self.history_tab, orient="vertical")
+        pane.pack(fill="both", expand=True, padx=10, pady=10)
+        f = ttk.Frame(pane)
+        columns = {"id": ("#", 50), "time": ("时间", 130), "name": ("名称", 150), "status": ("状态", 110),
+                   "duration": ("耗时", 80), "size": ("产物体积", 100), "worker": ("节点", 160)}
+        self.history_tree = ttk.Treeview(f, columns=list(columns), show="headings", selectmode="extended", height=8)
+        for col, (title, width) in columns.items():
+            self.history_tree.heading(col, text=title)
+            self.history_tree.column(col, width=width, anchor="center")
+        sb = ttk.Scrollbar(f, command=self.history_tree.yview)
+        self.history_tree.config(yscrollcommand=sb.set)
+        self.history_tree.pack(side="left", fill="both", expand=True)
+        sb.pack(side="right", fill="y")
+        pane.add(f, weight=1)
+        self.history_report = tk.Text(pane, wrap="none", height=12, font=("Consolas", 10))
+        pane.add(self.history_report, weight=1)
+        self.refresh_history()
+
+    def _history_project(self):
+        script = self.main_script_path.get()
+        return os.path.dirname(os.path.abspath(script)) if script else None
+
+    def refresh_history(self):
+        self.history_tree.delete(*self.history_tree.get_children())
+        project = self._history_project()
+        if not project:
+            return
+        try:
+            rows = list_builds(project, limit=200)
+        except Exception as e:
+            self.history_report.delete(1.0, tk.END)
+            self.history_report.insert(tk.END, f"无法读取构建历史: {e}\n")
+            return
+        for r in rows:
+            size = _fmt_size(r['total_size']) if r['total_size'] is not None else "-"
+            self.history_tree.insert("", tk.END, iid=str(r['id']), values=(
+                r['id'], time.strftime('%Y-%m-%d %H:%M', time.localtime(r['started'])), r['name'],
+                HISTORY_STATUS.get(r['status'], r['status']), f"{r['duration']:.1f}s", size, r['worker'] or "本机"))
+
+    def compare_selected_builds(self):
+        project = self._history_project()
+        ids = sorted(int(i) for i in self.history_tree.selection())
+        if not project or len(ids) > 2:
+            return messagebox.showwarning("提示", "请选择一条或两条构建记录")
+        base, head = ([None] + ids)[-2:] if ids else (None, None)
+        try:
+            cmp = compare_builds(project, head=head, base=base,
+                                 size_pct=self.size_threshold.get(), time_pct=self.time_threshold.get())
+            report = format_build_comparison(cmp)
+        except Exception as e:
+            report = f"对比失败: {e}\n"
+        self.history_report.delete(1.0, tk.END)
+        self.history_report.insert(tk.END, report)
+
+    def _init_clean_tab(self):
+        f = ttk.Frame(self.clean_tab, padding=10)
+        f.pack(fill="both", expand=True)
+        info_frame = ttk.Frame(f)
+        info_frame.pack(fill="x", pady=(0, 10))
+        ttk.Label(info_frame, text="ℹ️ 功能说明：安全清洗将生成 '_clean.py' 新文件，删除 '#' 注释和空行，可选删除文档字符串。", foreground="#666").pack(anchor="w")
+        paned = ttk.PanedWindow(f, orient="horizontal")
+        paned.pack(fill="both", expand=True)
+        left = ttk.LabelFrame(paned, text="待处理文件列表")
+        paned.add(left, weight=1)
+        self.clean_list = tk.Listbox(left, relief="flat", highlightthickness=1, highlightcolor="#ccc")
+        self.clean_list.pack(fill="both", expand=True, padx=5, pady=5)
+        g_row = ttk.Frame(left)
+        g_row.pack(fill="x", padx=5)
+        ttk.Label(g_row, text="通配符:").pack(side="left")
+        self.clean_glob = tk.StringVar()
+        ttk.Entry(g_row, textvariable=self.clean_glob).pack(side="left", fill="x", expand=True, padx=5)
+        ttk.Button(g_row, text="添加匹配", command=self.add_clean_glob).pack(side="left")
+        i_row = ttk.Frame(left)
+        i_row.pack(fill="x", padx=5, pady=(5, 0))
+        ttk.Label(i_row, text="忽略:").pack(side="left")
+        self.clean_ignores = tk.StringVar(value=", ".join(DEFAULT_CLEAN_IGNORES))
+        ttk.Entry(i_row, textvariable=self.clean_ignores).pack(side="left", fill="x", expand=True, padx=5)
+        l_btn = ttk.Frame(left)
+        l_btn.pack(fill="x", padx=5, pady=5)
+        ttk.Button(l_btn, text="+ 添加文件", command=self.add_clean_file).pack(side="left")
+        ttk.Button(l_btn, text="+ 添加文件夹", command=self.add_clean_folder).pack(side="left", padx=5)
+        ttk.Button(l_btn, text="清空列表", command=lambda: self._clear_list(self.clean_list, self.clean_files)).pack(side="right")
+        right = ttk.LabelFrame(paned, text="处理日志")
+        paned.add(right, weight=1)
+        self.clean_log = tk.Text(right, height=10, bg="#FFF", font=("Consolas", 9))
+        self.clean_log.pack(fill="both", expand=True, padx=5, pady=5)
+        bot = ttk.Frame(f)
+        bot.pack(fill="x", pady=10)
+        self.clean_option_empty = tk.BooleanVar(value=True)
+        ttk.Checkbutton(bot, text="删除多余空行", variable=self.clean_option_empty).pack(side="left", padx=10)
+        self.clean_strip_docs = tk.BooleanVar(value=False)
+        ttk.Checkbutton(bot, text="删除文档字符串", variable=self.clean_strip_docs).pack(side="left", padx=10)
+        self.clean_use_cache = tk.BooleanVar(value=True)
+        ttk.Checkbutton(bot, text="跳过未改动的文件 (缓存)", variable=self.clean_use_cache).pack(side="left", padx=10)
+        ttk.Button(bot, text="🚀 开始清洗 (批量)", style="Accent.TButton", command=self.start_clean).pack(side="right", ipadx=10)
+
+    # === 功能函数 ===
+    def select_interpreter(self):
+        p = filedialog.askopenfilename(filetypes=[("Python", "python.exe"), ("Exe", "*.exe")])
+        if p: self.python_interpreter.set(p)
+
+    def select_requirements(self):
+        p = filedialog.askopenfilename(filetypes=[("Requirements", "*.txt"), ("All", "*.*")])
+        if p: self.requirements_path.set(p)
+
+    def select_wheelhouse(self):
+        d = filedialog.askdirectory()
+        if d: self.wheelhouse_path.set(d)
+
+    def select_main_script(self):
+        p = filedialog.askopenfilename(filetypes=[("Python", "*.py")])
+        if p:
+            self.main_script_path.set(p)
+            if not self.output_name.get():
+                self.output_name.set(os.path.splitext(os.path.basename(p))[0])
+
+    def select_icon(self):
+        p = filedialog.askopenfilename(filetypes=[("Icon", "*.ico")])
+        if p: 
+            self.icon_path.set(p)
+            self.icon_mode.set(2)
+
+    def add_res_file(self):
+        fs = filedialog.askopenfilenames()
+        for f in fs:
+            if f not in self.resource_files:
+                self.resource_files.append(f)
+                self.res_list.insert(tk.END, f)
+    
+    def add_res_folder(self):
+        d = filedialog.askdirectory()
+        if d and d not in self.resource_files:
+            self.resource_files.append(d)
+            self.res_list.insert(tk.END, d)
+
+    def _remove_sel(self, listbox, data_list):
+        sel = listbox.curselection()
+        for i in reversed(sel):
+            listbox.delete(i)
+            if i < len(data_list): data_list.pop(i)
+
+    def _clear_list(self, listbox, data_list):
+        listbox.delete(0, tk.END)
+        data_list.clear()
+
+    def add_clean_file(self):
+        fs = filedialog.askopenfilenames(filetypes=[("Python", "*.py")])
+        self._add_clean_paths(fs)
+
+    def add_clean_folder(self):
+        d = filedialog.askdirectory()
+        if d:
+            self._add_clean_paths(collect_python_files([d], ignores=self._clean_ignore_patterns()))
+
+    def add_clean_glob(self):
+        pattern = self.clean_glob.get().strip()
+        if not pattern:
+            return
+        fs = collect_python_files([pattern], ignores=self._clean_ignore_patterns())
+        if not fs:
+            return messagebox.showinfo("提示", "没有匹配的文件")
+        self._add_clean_paths(fs)
+
+    def _clean_ignore_patterns(self):
+        return [p.strip() for p in self.clean_ignores.get().split(",") if p.strip()]
+
+    def _add_clean_paths(self, paths):
+        for f in paths:
+            if f not in self.clean_files:
+                self.clean_files.append(f)
+                self.clean_list.insert(tk.END, f)
+
+    def clean_temp(self, silent=False):
+        if not self.main_script_path.get():
+            if not silent: return
+            return
+        if self.build_queue.active():
+            # 正在运行的任务还在写 build/ 与 dist/
+            if not silent: messagebox.showwarning("提示", "队列中还有未结束的任务，请等待完成或取消后再清理")
+            return
+        d = os.path.dirname(self.main_script_path.get())
+        for x in ['build', 'dist', '__pycache__']:
+            p = os.path.join(d, x)
+            if os.path.exists(p): shutil.rmtree(p, ignore_errors=True)
+        name = self.output_name.get()
+        if name:
+            spec = os.path.join(d, name + ".spec")
+            if os.path.exists(spec): os.remove(spec)
+        if not silent:
+            messagebox.showinfo("完成", "临时文件已清理")
+    
+    def _open_output_folder(self, path):
+        import platform
+        try:
+            if platform.system() == "Windows":
+                os.startfile(path)
+            elif platform.system() == "Darwin":
+                subprocess.Popen(["open", path])
+            else:
+                subprocess.Popen(["xdg-open", path])
+        except Exception as e:
+            self.log_queue.put(f"无法自动打开文件夹: {e}\n")
+
+    # === 打包逻辑 ===
+    def start_pack(self):
+        if not self.main_script_path.get():
+            return messagebox.showerror("错误", "未选择入口脚本")
+        # 入队时即固定当前界面上的全部参数，之后修改界面不影响已排队的任务
+        opts = self._collect_pack_options()
+        self._apply_slots()
+        
+        self._ensure_tab(self.log_tab)
+        self.tab_control.select(self.log_tab)
+        if not self.build_queue.active():
+            # 队列空闲时开始新一轮：清空日志并新建日志文件，界面只保留最近 LOG_MAX_LINES 行
+            self.log_text.delete(1.0, tk.END)
+            self.progress['value'] = 0
+            self._batch = []
+            spool = os.path.join(opts.script_dir, STATE_DIR, "logs", f"{opts.name}-{time.strftime('%Y%m%d-%H%M%S')}.log")
+            try:
+                self.log_pipeline.open_spool(spool)
+                self.log_spool_path.set(spool)
+            except OSError as e:
+                self.log_spool_path.set("")
+                self.log_queue.put(f"无法创建日志文件: {e}\n")
+        timeout = max(0, self.job_timeout.get()) * 60 or None
+        workers = [w.strip() for w in self.remote_workers.get().split(",") if w.strip()]
+        job = self.build_queue.submit(opts, timeout, workers or None)
+        self._batch.append(job)
+        if len(self._batch) > 1:
+            self.log_queue.put(f">>> 已加入队列: {opts.name} (#{job.id})\n")
+
+    def _job_logger(self, job):
+        if self.build_queue.slots == 1:
+            return self.log_queue.put
+        prefix = f"[{job.opts.name}#{job.id}] "
+        def log(msg):
+            self.log_queue.put("".join(prefix + line if line.strip() else line
+                                       for line in msg.splitlines(keepends=True)))
+        return log
+
+    def _job_finished(self, job):
+        if self._tab_ready(self.history_tab):
+            self.refresh_history()
+        if self.build_queue.active():
+            return
+        # 整个批次结束后再提示，避免夜间排队时弹出一串对话框
+        batch, self._batch = self._batch, []
+        if len(batch) == 1:
+            if job.status != "成功":
+                return
+            dist_path = os.path.join(job.opts.script_dir, 'dist')
+            messagebox.showinfo("成功", f"打包完成！\n路径: {dist_path}")
+            self._open_output_folder(dist_path)
+        elif batch:
+            failed = [f"{j.opts.name}#{j.id} ({j.status})" for j in batch if j.status != "成功"]
+            summary = f"队列完成: 成功 {len(batch) - len(failed)}/{len(batch)}"
+            if failed:
+                messagebox.showwarning("完成", summary + "\n未成功: " + ", ".join(failed))
+            else:
+                messagebox.showinfo("完成", summary)
+
+    def _apply_slots(self):
+        try:
+            self.build_queue.set_slots(self.job_slots.get())
+        except (tk.TclError, ValueError):
+            pass
+
+    def cancel_selected_jobs(self):
+        ids = {int(i) for i in self.job_tree.selection()}
+        for job in self.build_queue.jobs:
+            if job.id in ids:
+                self.build_queue.cancel(job)
+
+    def clear_finished_jobs(self):
+        self.build_queue.clear_finished()
+        self._refresh_job_tree()
+
+    def on_close(self):
+        if self.build_queue.active():
+            if not messagebox.askyesno("退出", "队列中还有未结束的任务，退出将终止这些构建进程。确定退出？"):
+                return
+            self.build_queue.cancel_all()
+        self.root.destroy()
+
+    def _collect_pack_options(self):
+        return PackOptions(
+            script=self.main_script_path.get(),
+            name=self.output_name.get(),
+            mode=self.pack_option_var.get(),
+            interpreter=self.python_interpreter.get(),
+            icon=self._current_icon(),
+            resources=list(self.resource_files),
+            console=self.console_window.get(),
+            compression=next(k for k, v in COMPRESSION_CHOICES.items() if v == self.compression.get()),
+            compress_level=self.compress_level.get(),
+            compress_lzma=self.compress_lzma.get(),
+            optimize=next(k for k, v in OPTIMIZE_CHOICES.items() if v == self.optimize_level.get()),
+            precompile=self.precompile.get(),
+            incremental=self.incremental_build.get(),
+            collect_tkinter=self.collect_tkinter.get(),
+            extra_args=split_args(self.extra_args.get()),
+            bench_runs=self.bench_runs.get(),
+            bench_args=split_args(self.bench_args.get()),
+            requirements=self.requirements_path.get() or None,
+            wheelhouse=self.wheelhouse_path.get() or None,
+            stage_resources=self.stage_resources.get(),
+        )
+
+    # === 依赖分析 ===
+    def start_analysis(self):
+        if not self.main_script_path.get():
+            return messagebox.showerror("错误", "未选择入口脚本")
+        opts = self._collect_pack_options()
+        threading.Thread(target=self._analysis_thread, args=(opts,), daemon=True).start()
+
+    def _analysis_thread(self, opts):
+        try:
+            interpreter = opts.interpreter
+            if opts.requirements:
+                interpreter = ensure_build_env(opts.requirements, interpreter, opts.wheelhouse, self.log_queue.put)
+            report = analyze_imports(opts.script, interpreter)
+        except Exception as e:
+            # except 结束后 e 会被删除，不能在稍后执行的回调里引用
+            self.root.after(0, messagebox.showerror, "错误", f"依赖分析失败: {e}")
+            return
+        self.root.after(0, self._show_analysis, report)
+
+    def _show_analysis(self, report):
+        win = tk.Toplevel(self.root)
+        win.title("依赖分析")
+        win.geometry("760x560")
+        text = tk.Text(win, wrap="none", font=("Consolas", 9))
+        text.insert(tk.END, format_import_report(report))
+        text.config(state="disabled")
+        text.pack(fill="both", expand=True, padx=10, pady=10)
+        choices = []
+        if report['suggestions']:
+            box = ttk.LabelFrame(win, text="勾选要应用的建议")
+            box.pack(fill="x", padx=10)
+            for sg in report['suggestions']:
+                var = tk.BooleanVar(value=True)
+                action = "移除" if sg.remove else "添加"
+                ttk.Checkbutton(box, text=f"{action} {sg.flag}", variable=var).pack(anchor="w", padx=5)
+                choices.append((var, sg))
+        def apply():
+            opts = apply_suggestions(self._collect_pack_options(), [sg for var, sg in choices if var.get()])
+            self.collect_tkinter.set(opts.collect_tkinter)
+            self.extra_args.set(join_args(opts.extra_args))
+            win.destroy()
+        bar = ttk.Frame(win)
+        bar.pack(fill="x", padx=10, pady=10)
+        ttk.Button(bar, text="关闭", command=win.destroy).pack(side="right")
+        if choices:
+            ttk.Button(bar, text="应用所选", style="Accent.TButton", command=apply).pack(side="right", padx=5)
+
+    def _current_icon(self):
+        imode = self.icon_mode.get()
+        if imode == 2:
+            ipath = self.icon_path.get()
+            if ipath and os.path.exists(ipath):
+                return ipath
+        elif imode == 1:
+            if os.path.exists(self.default_icon_path):
+                return self.default_icon_path
+        return None
+
+    # === 清洗逻辑 ===
+    def start_clean(self):
+        if not self.clean_files:
+            return messagebox.showinfo("提示", "请先添加文件")
+        self.clean_log.delete(1.0, tk.END)
+        threading.Thread(target=self._clean_thread, daemon=True).start()
+
+    def _clean_thread(self):
+        files = list(self.clean_files)
+        total = len(files)
+        success = 0
+        self.clean_log_queue.put(f"开始批量处理 {total} 个文件...\n")
+        output_folder = os.path.dirname(files[0]) if files else None
+        cache = CleanCache() if self.clean_use_cache.get() else None
+        results = clean_files_parallel(files, self.clean_option_empty.get(), cache=cache,
+                                       strip_docstrings=self.clean_strip_docs.get())
+        for idx, (fpath, new_path, error, hit) in enumerate(results, 1):
+            if error is None:
+                status = "⏩ 未改动，已跳过" if hit else "✅ 成功"
+                self.clean_log_queue.put(f"[{idx}/{total}] {os.path.basename(fpath)} {status}\n")
+                success += 1
+            else:
+                self.clean_log_queue.put(f"[{idx}/{total}] {os.path.basename(fpath)} ❌ 失败: {str(error)}\n")
+        hits = f"，缓存命中 {cache.hits}" if cache else ""
+        self.clean_log_queue.put(f"\n完成！成功 {success}/{total}{hits}。\n")
+        messagebox.showinfo("完成", "批量清洗完成！")
+        if output_folder:
+            self._open_output_folder(output_folder)
+
+    # === 日志刷新 ===
+    def update_log(self):
+        if not self._tab_ready(self.log_tab):
+            # 日志页尚未创建，消息留在队列里，切换过去时再一并显示
+            return self.root.after(100, self.update_log)
+        text, more = self.log_pipeline.drain(LOG_FILTERS.get(self.log_filter.get(), 0))
+        self._append_text(self.log_text, text)
+        # 工作线程只更新任务的进度数值，由主线程汇总本批次的整体进度
+        if self._batch:
+            value = sum(100 if j.done else j.progress for j in self._batch) / len(self._batch)
+            if self.progress['value'] != value:
+                self.progress['value'] = value
+        self.root.after(10 if more else 100, self.update_log)
+
+    def update_jobs(self):
+        if self._tab_ready(self.queue_tab):
+            self._refresh_job_tree()
+        self.root.after(500, self.update_jobs)
+
+    def _refresh_job_tree(self):
+        jobs = {str(j.id): j for j in self.build_queue.jobs}
+        for iid in self.job_tree.get_children():
+            if iid not in jobs:
+                self.job_tree.delete(iid)
+        for iid, job in jobs.items():
+            values = (job.id, job.opts.name, job.opts.mode, job.status, f"{job.progress:.0f}%",
+                      f"{job.elapsed:.0f}s" if job.started else "-", job.opts.script)
+            if self.job_tree.exists(iid):
+                if tuple(str(v) for v in self.job_tree.item(iid, "values")) != tuple(str(v) for v in values):
+                    self.job_tree.item(iid, values=values)
+            else:
+                self.job_tree.insert("", tk.END, iid=iid, values=values)
+
+    def update_clean_log(self):
+        if not self._tab_ready(self.clean_tab):
+            return self.root.after(100, self.update_clean_log)
+        text, more = self.clean_log_pipeline.drain()
+        self._append_text(self.clean_log, text)
+        self.root.after(10 if more else 100, self.update_clean_log)
+
+    def _append_text(self, widget, text):
+        """一次插入整批文本，并把控件裁剪到最近 LOG_MAX_LINES 行。"""
+        if not text:
+            return
+        widget.insert(tk.END, text)
+        lines = int(widget.index("end-1c").split(".")[0])
+        if lines > LOG_MAX_LINES:
+            widget.delete("1.0", f"{lines - LOG_MAX_LINES + 1}.0")
+        widget.see(tk.END)
+
+    def open_log_file(self):
+        path = self.log_spool_path.get()
+        if path and os.path.exists(path):
+            self._open_output_folder(path)
+
+def run(started=None):
+    root = tk.Tk()
+    PackApp(root, started)
+    root.mainloop()
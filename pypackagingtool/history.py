@@ -0,0 +1,336 @@
+"""构建历史库（.pypack/history.sqlite）：记录、查询与回归对比。"""
+import time
+import os
+import json
+from dataclasses import asdict
+
+from .common import _fmt_size, STATE_DIR
+from .process import PHASE_ORDER
+
+HISTORY_DB = "history.sqlite"
+
+HISTORY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS builds (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    name        TEXT NOT NULL,
+    started     REAL NOT NULL,
+    duration    REAL NOT NULL,
+    status      TEXT NOT NULL,   -- success / failed / cancelled / timeout / skipped
+    fingerprint TEXT,
+    worker      TEXT,            -- 远程构建节点，本机构建为 NULL
+    options     TEXT NOT NULL,   -- PackOptions 的 JSON
+    total_size  INTEGER
+);
+CREATE INDEX IF NOT EXISTS builds_by_name ON builds (name, id);
+CREATE TABLE IF NOT EXISTS artifacts (
+    build_id INTEGER NOT NULL REFERENCES builds (id) ON DELETE CASCADE,
+    mode     TEXT NOT NULL,
+    path     TEXT NOT NULL,      -- 相对产物根目录；单文件产物即文件名
+    size     INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS artifacts_by_build ON artifacts (build_id);
+CREATE TABLE IF NOT EXISTS compression (
+    build_id     INTEGER PRIMARY KEY REFERENCES builds (id) ON DELETE CASCADE,
+    strategy     TEXT NOT NULL,
+    flags        TEXT NOT NULL,  -- UPX 参数，空格分隔
+    files        INTEGER,        -- 以下为并行压缩的统计，其余策略为 NULL
+    failed       INTEGER,
+    skipped      INTEGER,
+    before_bytes INTEGER,
+    after_bytes  INTEGER,
+    seconds      REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS timings (
+    build_id    INTEGER NOT NULL REFERENCES builds (id) ON DELETE CASCADE,
+    mode        TEXT NOT NULL,
+    success     INTEGER,
+    total       REAL NOT NULL,
+    phases      TEXT NOT NULL,   -- 各构建阶段耗时（秒）的 JSON
+    peak_rss_mb REAL
+);
+CREATE INDEX IF NOT EXISTS timings_by_build ON timings (build_id);
+CREATE TABLE IF NOT EXISTS benchmarks (
+    id                  INTEGER PRIMARY KEY AUTOINCREMENT,
+    build_id            INTEGER REFERENCES builds (id) ON DELETE SET NULL,  -- 单独测速（bench 命令）为 NULL
+    name                TEXT NOT NULL,
+    mode                TEXT NOT NULL,
+    started             REAL NOT NULL,
+    args                TEXT NOT NULL,   -- 启动参数的 JSON
+    runs                TEXT NOT NULL,   -- 每次启动耗时的 JSON
+    first_run_seconds   REAL,            -- 构建后第一次启动（文件多半已在页缓存中，并非真正的冷启动）
+    warm_median_seconds REAL,
+    warm_min_seconds    REAL,
+    extraction_seconds  REAL,            -- onefile 相对 onedir 的解包开销
+    peak_rss_mb         REAL,
+    size_bytes          INTEGER,
+    timeouts            INTEGER NOT NULL,
+    failures            INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS benchmarks_by_name ON benchmarks (name, mode, id);
+"""
+
+HISTORY_STATUS = {'success': "成功", 'failed': "失败", 'cancelled': "已取消", 'timeout': "已超时",
+                  'skipped': "跳过 (输入未变)"}
+
+# 默认回归阈值（百分比）：构建耗时受机器负载影响大，阈值放宽
+SIZE_REGRESSION_PCT = 10
+
+TIME_REGRESSION_PCT = 50
+
+# 单个构建阶段增长不足该秒数时不算回归，短阶段的百分比波动很大
+PHASE_REGRESSION_MIN_SECONDS = 1.0
+
+def history_db(script_dir, readonly=False):
+    """打开（必要时创建）项目的构建历史库；调用方负责关闭。
+
+    readonly=True 用于查询：只读打开、不建表，库还不存在时返回 None 而不是创建它。
+    """
+    import sqlite3
+    path = os.path.join(script_dir, STATE_DIR, HISTORY_DB)
+    if readonly:
+        if not os.path.exists(path):
+            return None
+        from pathlib import Path
+        db = sqlite3.connect(Path(os.path.abspath(path)).as_uri() + "?mode=ro", uri=True, timeout=30)
+        db.row_factory = sqlite3.Row
+        return db
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # 队列中的多个任务可能同时写入，等待锁而不是立即报错
+    db = sqlite3.connect(path, timeout=30)
+    db.row_factory = sqlite3.Row
+    db.execute("PRAGMA foreign_keys = ON")
+    db.executescript(HISTORY_SCHEMA)
+    return db
+
+def _artifact_files(path):
+    """产出 (相对路径, 大小)；目录产物逐个文件列出。"""
+    if os.path.isfile(path):
+        yield os.path.basename(path), os.path.getsize(path)
+        return
+    for dirpath, _, filenames in os.walk(path):
+        for fn in filenames:
+            fp = os.path.join(dirpath, fn)
+            if not os.path.islink(fp):
+                yield os.path.relpath(fp, path).replace(os.sep, "/"), os.path.getsize(fp)
+
+def record_build(opts, status, started, duration, fingerprint=None, artifacts=(), worker=None,
+                 compression=None, timings=()):
+    """把一次构建写入 .pypack/history.sqlite，返回记录编号；成功时逐个文件记录产物体积。
+
+    compression 为本次的压缩策略与并行压缩统计，timings 为各模式的 BuildTracker.report()（见 _pack），
+    分别记入 compression 与 timings 表。
+    """
+    rows = []
+    if status in ('success', 'skipped'):
+        for mode, path in artifacts:
+            if os.path.exists(path):
+                rows.extend((mode, rel, size) for rel, size in _artifact_files(path))
+    db = history_db(opts.script_dir)
+    try:
+        with db:
+            cur = db.execute(
+                "INSERT INTO builds (name, started, duration, status, fingerprint, worker, options, total_size)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (opts.name, started, round(duration, 3), status, fingerprint, worker,
+                 json.dumps(asdict(opts), ensure_ascii=False), sum(r[2] for r in rows) if rows else None))
+            build_id = cur.lastrowid
+            db.executemany("INSERT INTO artifacts (build_id, mode, path, size) VALUES (?, ?, ?, ?)",
+                           [(build_id, *r) for r in rows])
+            if compression:
+                db.execute("INSERT INTO compression (build_id, strategy, flags, files, failed, skipped,"
+                           " before_bytes, after_bytes, seconds) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                           (build_id, compression['strategy'], " ".join(compression['flags']),
+                            *(compression.get(k) for k in ('files', 'failed', 'skipped', 'before_bytes', 'after_bytes')),
+                            compression.get('seconds', 0)))
+            db.executemany("INSERT INTO timings (build_id, mode, success, total, phases, peak_rss_mb)"
+                           " VALUES (?, ?, ?, ?, ?, ?)",
+                           [(build_id, t['mode'], t['success'], t['total_seconds'], json.dumps(t['phases']),
+                             t['peak_rss_mb']) for t in timings])
+        return build_id
+    finally:
+        db.close()
+
+def list_builds(script_dir, name=None, limit=20):
+    """按时间倒序返回构建记录（sqlite3.Row）；项目还没有历史时返回空列表。"""
+    db = history_db(script_dir, readonly=True)
+    if db is None:
+        return []
+    try:
+        sql = "SELECT * FROM builds" + (" WHERE name = ?" if name else "") + " ORDER BY id DESC LIMIT ?"
+        return db.execute(sql, ((name,) if name else ()) + (limit,)).fetchall()
+    finally:
+        db.close()
+
+def _component(path):
+    """把产物内文件归到所属组件（_internal 下的包或顶层目录），便于定位是哪个依赖变大了。"""
+    parts = path.split("/")
+    if parts[0] in ("_internal", "Contents"):
+        return "/".join(parts[:2])
+    return parts[0]
+
+def compare_builds(script_dir, head=None, base=None, name=None,
+                   size_pct=SIZE_REGRESSION_PCT, time_pct=TIME_REGRESSION_PCT):
+    """对比两次成功构建，返回差异字典。
+
+    head 默认取最近一次成功构建，base 默认取 head 之前同名的上一次成功构建；
+    各模式的产物总体积、构建耗时或某个构建阶段的耗时增长超过阈值（百分比）即记为回归。
+    两次记录不足（或还没有历史）时返回 None。
+    """
+    db = history_db(script_dir, readonly=True)
+    if db is None:
+        return None
+    try:
+        def success(where, args):
+            return db.execute(f"SELECT * FROM builds WHERE status = 'success' AND {where} ORDER BY id DESC LIMIT 1",
+                              args).fetchone()
+        if head is None:
+            head = success("(? IS NULL OR name = ?)", (name, name))
+        else:
+            head = db.execute("SELECT * FROM builds WHERE id = ?", (head,)).fetchone()
+        if head is None:
+            return None
+        if base is None:
+            base = success("name = ? AND id < ?", (head['name'], head['id']))
+        else:
+            base = db.execute("SELECT * FROM builds WHERE id = ?", (base,)).fetchone()
+        if base is None:
+            return None
+        files, timings = {}, {}
+        for which, row in (('base', base), ('head', head)):
+            for a in db.execute("SELECT mode, path, size FROM artifacts WHERE build_id = ?", (row['id'],)):
+                files.setdefault((a['mode'], a['path']), {'base': 0, 'head': 0})[which] = a['size']
+            timings[which] = {t['mode']: json.loads(t['phases'])
+                              for t in db.execute("SELECT mode, phases FROM timings WHERE build_id = ?", (row['id'],))}
+    finally:
+        db.close()
+
+    def pct(old, new):
+        return (new - old) * 100 / old if old else (100.0 if new else 0.0)
+
+    modes, components = {}, {}
+    for (mode, path), s in files.items():
+        m = modes.setdefault(mode, {'base': 0, 'head': 0})
+        c = components.setdefault((mode, _component(path)), {'base': 0, 'head': 0})
+        for k in ('base', 'head'):
+            m[k] += s[k]
+            c[k] += s[k]
+    regressions = []
+    for mode, m in sorted(modes.items()):
+        m['pct'] = pct(m['base'], m['head'])
+        if m['pct'] > size_pct:
+            regressions.append(f"[{mode}] 产物体积 {_fmt_size(m['base'])} -> {_fmt_size(m['head'])} (+{m['pct']:.1f}%)")
+    time_change = pct(base['duration'], head['duration'])
+    if time_change > time_pct:
+        regressions.append(f"构建耗时 {base['duration']:.1f}s -> {head['duration']:.1f}s (+{time_change:.1f}%)")
+    phases = {}
+    for mode in sorted(set(timings['base']) & set(timings['head'])):
+        old_phases, new_phases = timings['base'][mode], timings['head'][mode]
+        for phase in PHASE_ORDER:
+            if phase not in old_phases and phase not in new_phases:
+                continue
+            old, new = old_phases.get(phase, 0.0), new_phases.get(phase, 0.0)
+            p = phases.setdefault(mode, {})[phase] = {'base': old, 'head': new, 'pct': pct(old, new)}
+            if p['pct'] > time_pct and new - old >= PHASE_REGRESSION_MIN_SECONDS:
+                regressions.append(f"[{mode}] {phase} 阶段 {old:.1f}s -> {new:.1f}s (+{p['pct']:.1f}%)")
+    changes = sorted(((mode, comp, c['head'] - c['base']) for (mode, comp), c in components.items()
+                      if c['head'] != c['base']), key=lambda x: -abs(x[2]))
+    return {
+        'base': dict(base), 'head': dict(head), 'modes': modes, 'time_pct': time_change, 'phases': phases,
+        'components': changes, 'regressions': regressions,
+        'same_inputs': base['fingerprint'] is not None and base['fingerprint'] == head['fingerprint'],
+        'options_changed': sorted(k for k, v in json.loads(head['options']).items()
+                                  if json.loads(base['options']).get(k) != v),
+    }
+
+def build_report(script_dir, build_id):
+    """一次构建的完整记录：构建信息与选项、各模式产物体积与阶段耗时、压缩统计和启动测速；不存在时返回 None。"""
+    db = history_db(script_dir, readonly=True)
+    if db is None:
+        return None
+    try:
+        row = db.execute("SELECT * FROM builds WHERE id = ?", (build_id,)).fetchone()
+        if row is None:
+            return None
+        report = {**dict(row), 'options': json.loads(row['options'])}
+        report['sizes'] = dict(db.execute("SELECT mode, SUM(size) FROM artifacts WHERE build_id = ? GROUP BY mode",
+                                          (build_id,)).fetchall())
+        report['modes'] = [{'mode': t['mode'], 'success': None if t['success'] is None else bool(t['success']),
+                            'total_seconds': t['total'], 'phases': json.loads(t['phases']),
+                            'peak_rss_mb': t['peak_rss_mb']}
+                           for t in db.execute("SELECT * FROM timings WHERE build_id = ?", (build_id,))]
+        c = db.execute("SELECT * FROM compression WHERE build_id = ?", (build_id,)).fetchone()
+        report['compression'] = dict(c) if c else None
+        report['benchmarks'] = [{**dict(b), 'args': json.loads(b['args']), 'runs': json.loads(b['runs'])}
+                                for b in db.execute("SELECT * FROM benchmarks WHERE build_id = ? ORDER BY id",
+                                                    (build_id,))]
+        return report
+    finally:
+        db.close()
+
+def compression_history(script_dir, name):
+    """每种压缩策略（含级别/lzma）取同名构建中最近一次成功的记录，附各模式产物体积。"""
+    db = history_db(script_dir, readonly=True)
+    if db is None:
+        return []
+    try:
+        latest = {}
+        for row in db.execute("SELECT c.*, b.duration FROM compression c JOIN builds b ON b.id = c.build_id"
+                              " WHERE b.name = ? AND b.status = 'success' ORDER BY b.id", (name,)):
+            latest[(row['strategy'], row['flags'])] = row
+        history = []
+        for row in latest.values():
+            sizes = dict(db.execute("SELECT mode, SUM(size) FROM artifacts WHERE build_id = ? GROUP BY mode",
+                                    (row['build_id'],)).fetchall())
+            history.append({**dict(row), 'sizes': sizes})
+        return history
+    finally:
+        db.close()
+
+def format_compression_history(history):
+    """对比各压缩策略最近一次构建的体积与耗时；不足两种策略时返回空串。"""
+    if len(history) < 2:
+        return ""
+    lines = ["压缩策略对比（各取最近一次）:\n"]
+    for e in sorted(history, key=lambda e: sum(e['sizes'].values())):
+        sizes = " / ".join(f"{m} {_fmt_size(s)}" for m, s in e['sizes'].items())
+        lines.append(f"  {e['strategy']:<13}{e['flags']:<12} {sizes}，构建 {e['duration']:.1f}s"
+                     f"（其中并行压缩 {e['seconds']:.1f}s）\n")
+    return "".join(lines)
+
+def format_build_list(rows):
+    if not rows:
+        return "暂无构建记录。\n"
+    lines = [f"{'ID':>5}  {'时间':<16}  {'名称':<20} {'状态':<14} {'耗时':>8} {'产物体积':>10}  节点\n"]
+    for r in rows:
+        when = time.strftime('%Y-%m-%d %H:%M', time.localtime(r['started']))
+        size = _fmt_size(r['total_size']) if r['total_size'] is not None else "-"
+        lines.append(f"{r['id']:>5}  {when:<16}  {r['name']:<20} {HISTORY_STATUS.get(r['status'], r['status']):<14} "
+                     f"{r['duration']:>7.1f}s {size:>10}  {r['worker'] or '本机'}\n")
+    return "".join(lines)
+
+def format_build_comparison(cmp, top=8):
+    if cmp is None:
+        return "没有可供对比的两次成功构建。\n"
+    base, head = cmp['base'], cmp['head']
+    when = lambda row: time.strftime('%Y-%m-%d %H:%M', time.localtime(row['started']))
+    lines = [f"对比 #{base['id']} ({when(base)}) -> #{head['id']} ({when(head)})  {head['name']}\n",
+             f"  构建耗时: {base['duration']:.1f}s -> {head['duration']:.1f}s ({cmp['time_pct']:+.1f}%)\n"]
+    for mode, phases in sorted(cmp['phases'].items()):
+        parts = [f"{phase} {p['base']:.1f}s -> {p['head']:.1f}s" for phase, p in phases.items()]
+        lines.append(f"  [{mode}] 阶段耗时: {' / '.join(parts)}\n")
+    for mode, m in sorted(cmp['modes'].items()):
+        lines.append(f"  [{mode}] 产物体积: {_fmt_size(m['base'])} -> {_fmt_size(m['head'])} ({m['pct']:+.1f}%)\n")
+    if cmp['same_inputs']:
+        lines.append("  输入指纹相同（源码、依赖与选项均未变化）\n")
+    elif cmp['options_changed']:
+        lines.append(f"  变化的选项: {', '.join(cmp['options_changed'])}\n")
+    if cmp['components']:
+        lines.append("  体积变化最大的组件:\n")
+        for mode, comp, delta in cmp['components'][:top]:
+            sign = "+" if delta > 0 else "-"
+            lines.append(f"    [{mode}] {comp:<40} {sign}{_fmt_size(abs(delta))}\n")
+    if cmp['regressions']:
+        lines.append("⚠️ 发现回归:\n" + "".join(f"  {r}\n" for r in cmp['regressions']))
+    else:
+        lines.append("未发现超过阈值的回归。\n")
+    return "".join(lines)
@@ -0,0 +1,121 @@
+"""有并发槽位的构建队列，支持取消与超时。"""
+import time
+import os
+import threading
+import itertools
+
+from .process import JobControl
+from .build import pack
+from .remote import remote_pack
+
+class BuildJob:
+    """队列中的一个构建任务；状态字段只由队列修改，界面线程只读。"""
+    _ids = itertools.count(1)
+
+    def __init__(self, opts, timeout=None, workers=None):
+        self.id = next(self._ids)
+        self.opts = opts
+        self.workers = workers
+        self.status = "排队中"
+        self.progress = 0.0
+        self.submitted = time.time()
+        self.started = self.finished = None
+        self.control = JobControl(timeout)
+
+    @property
+    def key(self):
+        # 同一目录下的同名目标共用 build/<name>、dist/<name> 与 .spec，只能串行
+        return (os.path.normcase(self.opts.script_dir), self.opts.name)
+
+    @property
+    def done(self):
+        return self.finished is not None
+
+    @property
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+class BuildQueue:
+    """有 N 个并发槽位的先进先出构建队列，产物路径相同的任务自动串行。
+
+    log_for(job) 返回该任务使用的日志函数；on_finish(job) 在任务结束后于工作线程中调用。
+    """
+    def __init__(self, slots=1, log_for=None, on_finish=None):
+        self.slots = max(1, slots)
+        self.jobs = []
+        self._log_for = log_for or (lambda job: print)
+        self._on_finish = on_finish
+        self._lock = threading.Lock()
+
+    def submit(self, opts, timeout=None, workers=None):
+        """加入一个任务；给出 workers（构建节点地址列表）时发往其中负载最低的节点执行。"""
+        job = BuildJob(opts, timeout, workers)
+        with self._lock:
+            self.jobs.append(job)
+            self._dispatch()
+        return job
+
+    def set_slots(self, slots):
+        with self._lock:
+            self.slots = max(1, slots)
+            self._dispatch()
+
+    def active(self):
+        return [j for j in self.jobs if not j.done]
+
+    def cancel(self, job):
+        with self._lock:
+            if job.status == "排队中":
+                job.status = "已取消"
+                job.finished = time.time()
+                queued = True
+            else:
+                queued = False
+        if queued:
+            if self._on_finish: self._on_finish(job)
+        elif not job.done:
+            job.control.cancel()
+
+    def cancel_all(self):
+        for job in list(self.active()):
+            self.cancel(job)
+
+    def clear_finished(self):
+        with self._lock:
+            self.jobs = [j for j in self.jobs if not j.done]
+
+    def _dispatch(self):
+        running = [j for j in self.jobs if j.status == "运行中"]
+        busy = {j.key for j in running}
+        for job in self.jobs:
+            if len(running) >= self.slots:
+                break
+            if job.status == "排队中" and job.key not in busy:
+                job.status = "运行中"
+                job.started = time.time()
+                running.append(job)
+                busy.add(job.key)
+                threading.Thread(target=self._run, args=(job,), daemon=True).start()
+
+    def _run(self, job):
+        log = self._log_for(job)
+        job.control.start()
+        try:
+            on_progress = lambda v: setattr(job, 'progress', v)
+            if job.workers:
+                ok = remote_pack(job.opts, job.workers, log, on_progress, job.control)
+            else:
+                # 多个任务并发时不能各自 --clean，否则会互相清掉 PyInstaller 的全局缓存
+                ok = pack(job.opts, log, on_progress=on_progress, purge_cache=self.slots == 1, control=job.control)
+        except Exception as e:
+            log(f"Error: {e}\n")
+            ok = False
+        finally:
+            job.control.stop()
+        with self._lock:
+            job.status = "成功" if ok else (job.control.reason or "失败")
+            job.finished = time.time()
+            self._dispatch()
+        if self._on_finish: self._on_finish(job)
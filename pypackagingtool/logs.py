@@ -0,0 +1,61 @@
+"""构建日志管线：按批合并、落盘与按级别过滤。"""
+import os
+import queue
+import re
+import glob
+
+# PyInstaller 的日志格式为 "12345 INFO: ..."，前面可能带有 [onedir] 之类的标签
+LOG_LEVEL_RE = re.compile(r'^(?:\[[^\]]+\] )*\d+ (DEBUG|INFO|WARNING|ERROR|CRITICAL):')
+
+LOG_LEVELS = {'DEBUG': 10, 'INFO': 20, 'WARNING': 30, 'ERROR': 40, 'CRITICAL': 50}
+
+LOG_FILTERS = {"全部": 0, "隐藏 INFO": 30, "仅错误": 40}
+
+LOG_MAX_LINES = 5000
+
+def log_line_level(msg):
+    """返回日志行的级别数值；非 PyInstaller 格式的行（本工具自身的提示、异常堆栈）返回 None。"""
+    m = LOG_LEVEL_RE.match(msg)
+    return LOG_LEVELS[m.group(1)] if m else None
+
+class LogPipeline:
+    """把逐行入队的日志按批合并：每次最多取 batch_limit 条，全部写入落盘文件，按级别过滤后合并成一段文本。"""
+    def __init__(self, log_queue, batch_limit=2000):
+        self.queue = log_queue
+        self.batch_limit = batch_limit
+        self.spool = None
+        self.spool_path = None
+
+    def open_spool(self, path, keep=20):
+        """开始把完整日志写到 path；同目录只保留最近 keep 份。"""
+        self.close_spool()
+        log_dir = os.path.dirname(path)
+        os.makedirs(log_dir, exist_ok=True)
+        old = sorted(glob.glob(os.path.join(log_dir, "*.log")), key=os.path.getmtime)
+        for stale in old[:max(0, len(old) - keep + 1)]:
+            try: os.remove(stale)
+            except OSError: pass
+        self.spool = open(path, 'w', encoding='utf-8', errors='replace')
+        self.spool_path = path
+
+    def close_spool(self):
+        if self.spool:
+            self.spool.close()
+            self.spool = None
+
+    def drain(self, min_level=0):
+        """返回 (待显示文本, 队列中是否还有剩余)。"""
+        batch = []
+        try:
+            while len(batch) < self.batch_limit:
+                batch.append(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+        if not batch:
+            return "", False
+        if self.spool:
+            self.spool.write("".join(batch))
+            self.spool.flush()
+        if min_level:
+            batch = [m for m in batch if (log_line_level(m) or min_level) >= min_level]
+        return "".join(batch), not self.queue.empty()
@@ -0,0 +1,84 @@
+"""打包选项（PackOptions）与各模式的产物路径。"""
+import os
+import sys
+from dataclasses import dataclass, field
+
+def _artifact_path(distpath, name, current_mode):
+    if current_mode == '--onefile':
+        return os.path.join(distpath, name + (".exe" if os.name == 'nt' else ""))
+    return os.path.join(distpath, name)
+
+MODE_FLAGS = {
+    'single_file': ['--onefile'],
+    'single_dir': ['--onedir'],
+    'both': ['--onedir', '--onefile'],
+}
+
+TKINTER_COLLECT_FLAG = "--collect-all=tkinter"
+
+COMPRESSION_CHOICES = {
+    'none': "不压缩",
+    'upx': "UPX (PyInstaller 内置)",
+    'upx-parallel': "UPX 多核并行",
+}
+
+# 字节码优化级别，对应解释器的 -O / -OO
+OPTIMIZE_CHOICES = {
+    0: "不优化",
+    1: "-O (去掉 assert)",
+    2: "-OO (再去掉文档字符串)",
+}
+
+@dataclass
+class PackOptions:
+    """一个打包目标的全部参数，GUI、命令行与清单文件共用。"""
+    script: str
+    name: str = ""
+    mode: str = "single_dir"
+    interpreter: str = sys.executable
+    icon: str = None
+    resources: list = field(default_factory=list)
+    console: bool = False
+    upx: bool = False
+    compression: str = "none"
+    compress_level: int = 0
+    compress_lzma: bool = False
+    optimize: int = 0
+    precompile: bool = False
+    incremental: bool = False
+    collect_tkinter: bool = True
+    extra_args: list = field(default_factory=list)
+    bench_runs: int = 0
+    bench_args: list = field(default_factory=list)
+    bench_timeout: float = 30
+    requirements: str = None
+    wheelhouse: str = None
+    stage_resources: bool = False
+
+    def __post_init__(self):
+        self.script = os.path.abspath(self.script)
+        if not self.name:
+            self.name = os.path.splitext(os.path.basename(self.script))[0]
+        if self.mode not in MODE_FLAGS:
+            raise ValueError(f"未知打包模式: {self.mode}")
+        # 旧的 upx 开关等价于 PyInstaller 内置 UPX
+        if self.upx and self.compression == "none":
+            self.compression = "upx"
+        if self.compression not in COMPRESSION_CHOICES:
+            raise ValueError(f"未知压缩策略: {self.compression}")
+        if self.optimize not in OPTIMIZE_CHOICES:
+            raise ValueError(f"未知优化级别: {self.optimize}")
+
+    @property
+    def script_dir(self):
+        return os.path.dirname(self.script)
+
+def mode_distpath(current_mode, script_dir, both):
+    """产物所在目录；两种模式一起构建时，非 Windows 下 onefile 产物 dist/<name> 会与 onedir 目录同名冲突，改放 dist/onefile。"""
+    distpath = os.path.join(script_dir, 'dist')
+    if both and current_mode == '--onefile' and os.name != 'nt':
+        distpath = os.path.join(distpath, 'onefile')
+    return distpath
+
+def optimize_flags(opts):
+    return ["-" + "O" * opts.optimize] if opts.optimize else []
@@ -0,0 +1,236 @@
+"""子进程的运行、取消与超时，以及 PyInstaller 构建阶段的识别与计时。"""
+import time
+import os
+import subprocess
+import threading
+import re
+import signal
+
+# "checking <阶段>" 是 PyInstaller 进入各构建步骤时的固定输出
+PHASE_RE = re.compile(r'INFO: checking (Analysis|PYZ|PKG|EXE|COLLECT)\b')
+
+# 各阶段开始时对应的进度（Analysis 通常占绝大部分耗时）
+PHASE_PROGRESS = {'startup': 0, 'Analysis': 5, 'PYZ': 80, 'PKG': 85, 'EXE': 92, 'COLLECT': 96, 'done': 100}
+
+PHASE_ORDER = list(PHASE_PROGRESS)
+
+_psutil = None
+
+def _import_psutil():
+    """psutil 是可选依赖；采样线程每 0.5s/5ms 调用一次，导入结果（含未安装）只探测一次。"""
+    global _psutil
+    if _psutil is None:
+        try:
+            import psutil
+            _psutil = psutil
+        except ImportError:
+            _psutil = False
+    return _psutil
+
+def _process_rss(pid):
+    """返回进程（含子进程）当前的常驻内存字节数；安装了 psutil 时统计整棵进程树，
+    否则在 Linux 上累加进程及其直接子进程在 /proc 中的峰值 VmHWM，其余平台返回 None。"""
+    psutil = _import_psutil()
+    if psutil:
+        try:
+            proc = psutil.Process(pid)
+            procs = [proc] + proc.children(recursive=True)
+            return sum(p.memory_info().rss for p in procs if p.is_running())
+        except psutil.Error:
+            return None
+    total = None
+    pids = [pid]
+    try:
+        # onefile 的引导进程会再启动一个子进程，一并计入
+        with open(f"/proc/{pid}/task/{pid}/children", encoding='ascii') as f:
+            pids += [int(x) for x in f.read().split()]
+    except (OSError, ValueError):
+        pass
+    for p in pids:
+        try:
+            with open(f"/proc/{p}/status", encoding='ascii') as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        total = (total or 0) + int(line.split()[1]) * 1024
+        except (OSError, ValueError):
+            pass
+    return total
+
+class BuildTracker:
+    """跟踪一次 PyInstaller 构建：从输出识别阶段、记录各阶段耗时与子进程峰值内存，并换算成进度。"""
+    def __init__(self, mode):
+        self.mode = mode
+        self.phase = 'startup'
+        self.started = self.phase_started = time.perf_counter()
+        self.phases = {}
+        self.progress = 0.0
+        self.peak_rss = None
+        self.success = None
+        self.total = None
+        self._stop = threading.Event()
+
+    def feed(self, line):
+        m = PHASE_RE.search(line)
+        if m:
+            self._enter(m.group(1))
+        elif "Build complete!" in line:
+            self._enter('done')
+        else:
+            # 阶段内按行缓慢推进，但不越过下一阶段的起点
+            nxt = PHASE_ORDER[min(PHASE_ORDER.index(self.phase) + 1, len(PHASE_ORDER) - 1)]
+            self.progress = min(self.progress + 0.1, PHASE_PROGRESS[nxt] - 0.5)
+
+    def _enter(self, phase):
+        if phase == self.phase:
+            return
+        now = time.perf_counter()
+        self.phases[self.phase] = self.phases.get(self.phase, 0) + now - self.phase_started
+        self.phase, self.phase_started = phase, now
+        self.progress = max(self.progress, PHASE_PROGRESS[phase])
+
+    def attach(self, process):
+        threading.Thread(target=self._sample_rss, args=(process.pid,), daemon=True).start()
+
+    def _sample_rss(self, pid):
+        while not self._stop.wait(0.5):
+            rss = _process_rss(pid)
+            if rss: self.peak_rss = max(self.peak_rss or 0, rss)
+
+    def finish(self, success):
+        self._stop.set()
+        self._enter('done')
+        self.success = success
+        self.total = time.perf_counter() - self.started
+
+    def report(self):
+        return {
+            'mode': self.mode,
+            'success': self.success,
+            'total_seconds': round(self.total, 3),
+            'phases': {k: round(v, 3) for k, v in self.phases.items()},
+            'peak_rss_mb': round(self.peak_rss / 2**20, 1) if self.peak_rss else None,
+        }
+
+def _format_timing(tracker):
+    parts = [f"{k} {v:.1f}s" for k, v in tracker.phases.items() if k != 'done']
+    rss = f"，峰值内存 {tracker.peak_rss / 2**20:.0f} MB" if tracker.peak_rss else ""
+    return f"[{tracker.mode}] 总计 {tracker.total:.1f}s（{' / '.join(parts)}）{rss}\n"
+
+def kill_process_tree(process):
+    """结束进程及其全部子进程（PyInstaller 会再启动隔离的分析子进程）。"""
+    if process.poll() is not None and os.name == 'nt':
+        return  # 已退出的 pid 在 Windows 上可能被复用，不能再按 pid 结束
+    try:
+        if os.name == 'nt':
+            subprocess.run(["taskkill", "/F", "/T", "/PID", str(process.pid)], capture_output=True)
+        else:
+            # 进程以独立会话启动，进程组号即其 pid
+            os.killpg(process.pid, signal.SIGKILL)
+    except OSError:
+        pass
+
+# 超时由 JobControl 以该原因自行取消，据此与用户取消区分
+JOB_TIMEOUT_REASON = "超时"
+
+class JobControl:
+    """一个构建任务的取消与超时控制：登记任务启动的子进程，取消时连同整棵进程树一并结束。"""
+    def __init__(self, timeout=None):
+        self.timeout = timeout
+        self.cancelled = threading.Event()
+        self.reason = None
+        self._procs = []
+        self._callbacks = []
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def start(self):
+        if self.timeout:
+            self._timer = threading.Timer(self.timeout, self.cancel, args=(JOB_TIMEOUT_REASON,))
+            self._timer.daemon = True
+            self._timer.start()
+
+    def stop(self):
+        if self._timer: self._timer.cancel()
+
+    def register(self, process):
+        with self._lock:
+            self._procs.append(process)
+            if self.cancelled.is_set():
+                kill_process_tree(process)
+
+    def on_cancel(self, callback):
+        """登记取消时要执行的清理（例如关闭远程连接），已取消则立即执行。"""
+        with self._lock:
+            self._callbacks.append(callback)
+            if not self.cancelled.is_set():
+                return
+        callback()
+
+    def stopped_status(self):
+        """已被取消时返回历史记录中的状态（'timeout' 或 'cancelled'），否则返回 None。"""
+        if not self.cancelled.is_set():
+            return None
+        return 'timeout' if self.reason == JOB_TIMEOUT_REASON else 'cancelled'
+
+    def cancel(self, reason="已取消"):
+        with self._lock:
+            if self.cancelled.is_set():
+                return
+            self.reason = reason
+            self.cancelled.set()
+            procs = list(self._procs)
+            callbacks = list(self._callbacks)
+        for p in procs:
+            kill_process_tree(p)
+        for cb in callbacks:
+            cb()
+
+def run_command(cmd, log, tag=None, on_line=None, on_start=None, control=None, env=None):
+    """运行子进程并把输出逐行交给 log；成功返回 True。on_start 在进程启动后收到 Popen 对象。
+
+    传入 control（JobControl）时子进程在独立的进程组/会话中启动，以便取消时结束整棵进程树；
+    env 中的变量会覆盖到子进程环境上。
+    """
+    try:
+        startupinfo = subprocess.STARTUPINFO()
+        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+    except: startupinfo = None
+        
+    sys_encoding = 'gbk' if os.name == 'nt' else 'utf-8'
+    
+    # v3.4 核心修复：创建纯净的环境变量
+    # 复制当前环境变量，但移除可能导致冲突的 TCL/TK 变量
+    clean_env = os.environ.copy()
+    keys_to_remove = ['TCL_LIBRARY', 'TK_LIBRARY', '_MEIPASS2'] # _MEIPASS2 是 PyInstaller 内部使用的
+    for key in keys_to_remove:
+        if key in clean_env:
+            clean_env.pop(key)
+    if env:
+        clean_env.update(env)
+    
+    prefix = f"[{tag}] " if tag else ""
+    try:
+        log(f"{prefix}Cmd: {' '.join(cmd)}\n")
+        process = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            encoding=sys_encoding,
+            errors='replace',
+            startupinfo=startupinfo,
+            env=clean_env, # 传入净化后的环境
+            start_new_session=control is not None and os.name != 'nt',
+        )
+        if control: control.register(process)
+        if on_start: on_start(process)
+        while True:
+            line = process.stdout.readline()
+            if not line and process.poll() is not None: break
+            if line:
+                log(prefix + line)
+                if on_line: on_line(line)
+        return process.poll() == 0
+    except Exception as e:
+        log(f"{prefix}Error: {e}\n")
+        return False
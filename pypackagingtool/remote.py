@@ -0,0 +1,487 @@
+"""远程构建节点与把打包任务发往节点的客户端。"""
+import time
+import os
+import sys
+import shutil
+import threading
+import json
+import re
+from dataclasses import asdict, fields
+
+from .common import _is_ignored, STATE_DIR, user_cache_dir
+from .options import _artifact_path, mode_distpath, MODE_FLAGS, PackOptions
+from .process import JobControl
+from .history import record_build
+from .bench import benchmark_build
+from .build import pack
+
+# 协议：每帧为 4 字节大端长度 + UTF-8 JSON 帧头，帧头带 size 时其后紧跟 size 字节的 zip 数据。
+# 节点地址写作 "host:port" 或 "unix:/path/to.sock"。PyInstaller 不能交叉打包，只会选用与本机平台相同的节点。
+WORKER_TOKEN_ENV = "PYPACK_WORKER_TOKEN"
+
+# 任务等同于在节点上执行代码：这些 PyInstaller 参数会改写输出位置或加载任意钩子/脚本，节点一律拒绝
+WORKER_DENIED_ARGS = ("--distpath", "--workpath", "--specpath", "--runtime-hook", "--additional-hooks-dir",
+                      "--upx-dir", "--version-file")
+
+# 这些参数读取本地文件，只允许指向任务目录内部，防止把节点上的文件打进产物带走
+WORKER_PATH_ARGS = ("--add-data", "--add-binary", "--paths", "--icon", "--splash", "--resource", "--manifest")
+
+# 对应的短参数（-m 是 PyInstaller 已弃用的 --manifest 简写）
+WORKER_SHORT_ARGS = {"-p": "--paths", "-i": "--icon", "-m": "--manifest"}
+
+REMOTE_IGNORES = [".git", "__pycache__", ".venv", "venv", ".tox", "build", "dist", STATE_DIR]
+
+_MAX_FRAME_HEADER = 16 << 20
+
+_worker_reserved = {}
+
+_worker_reserved_lock = threading.Lock()
+
+def _worker_socket(address, timeout=None):
+    import socket
+    if address.startswith("unix:"):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        sock.connect(address[5:])
+    else:
+        host, _, port = address.rpartition(":")
+        sock = socket.create_connection((host or "127.0.0.1", int(port)), timeout=timeout)
+    sock.settimeout(timeout)
+    return sock
+
+def _send_frame(sock, header, payload=None):
+    import struct
+    if payload:
+        header = {**header, 'size': os.path.getsize(payload)}
+    data = json.dumps(header, ensure_ascii=False).encode('utf-8')
+    sock.sendall(struct.pack('>I', len(data)) + data)
+    if payload:
+        with open(payload, 'rb') as f:
+            sock.sendfile(f)
+
+def _recv_exact(sock, n):
+    buf = bytearray(n)
+    view = memoryview(buf)
+    got = 0
+    while got < n:
+        k = sock.recv_into(view[got:])
+        if not k:
+            raise ConnectionError("连接已断开")
+        got += k
+    return bytes(buf)
+
+def _recv_frame(sock, payload_dir=None):
+    """读取一帧，返回 (帧头, 附带 zip 的临时文件路径或 None)；zip 边收边写盘，不占内存。"""
+    import struct
+    import tempfile
+    (n,) = struct.unpack('>I', _recv_exact(sock, 4))
+    if n > _MAX_FRAME_HEADER:
+        raise ConnectionError("帧头过大")
+    header = json.loads(_recv_exact(sock, n).decode('utf-8'))
+    size = header.get('size')
+    if size is None:
+        return header, None
+    fd, path = tempfile.mkstemp(suffix=".zip", dir=payload_dir)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            while size:
+                chunk = sock.recv(min(size, 1 << 20))
+                if not chunk:
+                    raise ConnectionError("连接已断开")
+                f.write(chunk)
+                size -= len(chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    return header, path
+
+def _zip_entries(entries):
+    """把 (本地路径, 包内路径, 忽略模式) 写入临时 zip 并返回其路径，目录递归写入。"""
+    import tempfile
+    import zipfile
+    fd, path = tempfile.mkstemp(suffix=".zip")
+    os.close(fd)
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+        for src, arc, ignores in entries:
+            if os.path.isdir(src):
+                for dirpath, dirnames, filenames in os.walk(src):
+                    dirnames[:] = [d for d in dirnames if not _is_ignored(d, ignores)]
+                    for fn in filenames:
+                        fp = os.path.join(dirpath, fn)
+                        if not os.path.exists(fp):
+                            continue  # 失效的符号链接
+                        zf.write(fp, os.path.join(arc, os.path.relpath(fp, src)))
+            elif os.path.exists(src):
+                zf.write(src, arc)
+    return path
+
+def _safe_extract(zip_path, dest):
+    """解压到 dest 并恢复权限位（zipfile 默认不恢复，可执行文件会丢掉 x 位）；拒绝越出 dest 的路径。"""
+    import zipfile
+    dest = os.path.abspath(dest)
+    with zipfile.ZipFile(zip_path) as zf:
+        for info in zf.infolist():
+            target = os.path.abspath(os.path.join(dest, info.filename))
+            if os.path.commonpath([dest, target]) != dest:
+                raise ValueError(f"压缩包包含非法路径: {info.filename}")
+            zf.extract(info, dest)
+            mode = info.external_attr >> 16
+            if mode and os.name != 'nt' and not info.is_dir():
+                os.chmod(target, mode & 0o7777)
+
+def _job_payload(opts):
+    """把 PackOptions 转成可发送的任务，返回 (选项字典, zip 条目)。
+
+    入口脚本所在目录整体作为 project/ 发送（排除构建产物与虚拟环境），目录外的资源、图标、
+    依赖锁文件放到 ext/<序号>/ 下；选项中的路径都改写为相对任务目录的 "/" 路径。
+    解释器与 wheel 目录由构建节点自己决定，不随任务发送。
+    """
+    root = opts.script_dir
+    entries = [(root, "project", REMOTE_IGNORES)]
+
+    def relocate(path):
+        path = os.path.abspath(path)
+        try:
+            rel = os.path.relpath(path, root)
+        except ValueError:  # Windows 下不同盘符
+            rel = os.pardir
+        if not rel.startswith(os.pardir) and not _is_ignored(rel, REMOTE_IGNORES):
+            return "project/" + rel.replace(os.sep, "/")
+        arc = f"ext/{len(entries)}/{os.path.basename(path)}"
+        entries.append((path, arc, []))
+        return arc
+
+    spec = asdict(opts)
+    del spec['interpreter'], spec['wheelhouse']
+    spec['script'] = relocate(opts.script)
+    spec['icon'] = relocate(opts.icon) if opts.icon and os.path.exists(opts.icon) else None
+    spec['requirements'] = relocate(opts.requirements) if opts.requirements else None
+    spec['resources'] = [relocate(r) for r in opts.resources if os.path.exists(r)]
+    return spec, entries
+
+def _is_loopback(host):
+    import ipaddress
+    if host in ("", "localhost"):
+        return True
+    try:
+        return ipaddress.ip_address(host.strip("[]")).is_loopback
+    except ValueError:
+        return False
+
+def _worker_arg_paths(name, value):
+    """路径类参数的值中引用的本地文件。"""
+    if name == "--paths":
+        return value.split(os.pathsep)
+    if name in ("--add-data", "--add-binary"):
+        return [re.split(r"[;:](?=[^;:]*$)", value)[0]]
+    if name in ("--icon", "--resource"):
+        # --icon FILE.exe,ID 或 "NONE"；--resource FILE[,TYPE[,NAME[,LANGUAGE]]]
+        src = value.split(",")[0]
+        return [] if name == "--icon" and src == "NONE" else [src]
+    if name == "--manifest" and value.lstrip().startswith("<"):
+        return []  # 直接给出的 XML 内容
+    return [value]
+
+def _check_worker_args(args, base_dir, job_dir):
+    """校验随任务发来的 PyInstaller 参数，不允许的参数抛出 ValueError。"""
+    it = iter(args)
+    for arg in it:
+        if arg[:2] in WORKER_SHORT_ARGS:
+            name, value = WORKER_SHORT_ARGS[arg[:2]], arg[2:] or next(it, "")
+        elif arg.startswith("--") and len(arg) > 2:
+            prefix, eq, value = arg.partition("=")
+            # argparse 接受无歧义的前缀缩写，按前缀匹配
+            name = next((o for o in WORKER_DENIED_ARGS + WORKER_PATH_ARGS if o.startswith(prefix)), None)
+            if name in WORKER_PATH_ARGS and not eq:
+                value = next(it, "")
+        else:
+            continue
+        if name in WORKER_DENIED_ARGS:
+            raise ValueError(f"构建节点不接受参数: {arg}")
+        if name in WORKER_PATH_ARGS:
+            for part in _worker_arg_paths(name, value):
+                path = os.path.abspath(os.path.join(base_dir, part))
+                if os.path.commonpath([job_dir, path]) != job_dir:
+                    raise ValueError(f"参数引用了任务目录以外的路径: {arg}")
+
+def _options_from_spec(spec, job_dir, interpreter, wheelhouse):
+    def local(rel):
+        if not rel:
+            return None
+        path = os.path.abspath(os.path.join(job_dir, *rel.split("/")))
+        if os.path.commonpath([job_dir, path]) != job_dir:
+            raise ValueError(f"任务包含非法路径: {rel}")
+        return path
+    known = {f.name for f in fields(PackOptions)}
+    spec = {k: v for k, v in spec.items() if k in known}
+    spec.update(script=local(spec['script']), icon=local(spec.get('icon')),
+                requirements=local(spec.get('requirements')),
+                resources=[local(r) for r in spec.get('resources', [])],
+                interpreter=interpreter, wheelhouse=wheelhouse)
+    # 测速会在节点上运行构建出的程序，不随任务执行
+    spec.update(bench_runs=0, bench_args=[])
+    _check_worker_args(spec.get('extra_args', []), os.path.dirname(spec['script']), job_dir)
+    return PackOptions(**spec)
+
+def _artifact_relpaths(opts):
+    both = len(MODE_FLAGS[opts.mode]) > 1
+    paths = []
+    for current_mode in MODE_FLAGS[opts.mode]:
+        distpath = mode_distpath(current_mode, opts.script_dir, both)
+        paths.append(os.path.relpath(_artifact_path(distpath, opts.name, current_mode), opts.script_dir))
+    return paths
+
+class BuildWorker:
+    """构建节点守护进程：接收打包任务（选项 + 项目 zip），用本机解释器执行 pack()，
+    把日志与进度逐帧回传，最后回传产物 zip。每个任务在独立的临时目录中构建，结束即删除。"""
+    def __init__(self, address, slots=1, interpreter=sys.executable, wheelhouse=None, token=None,
+                 workdir=None, log=print):
+        self.address = address
+        self.slots = max(1, slots)
+        self.interpreter = interpreter
+        self.wheelhouse = wheelhouse
+        self.token = token
+        self.workdir = os.path.abspath(workdir or os.path.join(user_cache_dir(), "worker"))
+        self.log = log
+        self.running = self.queued = 0
+        self._slots = threading.Semaphore(self.slots)
+        self._lock = threading.Lock()
+        self._server = None
+
+    def status(self):
+        with self._lock:
+            return {'type': 'status', 'slots': self.slots, 'running': self.running, 'queued': self.queued,
+                    'platform': sys.platform, 'interpreter': self.interpreter}
+
+    def bind(self):
+        """开始监听并返回实际地址（端口写 0 时由系统分配）。"""
+        import socket
+        os.makedirs(self.workdir, exist_ok=True)
+        if self.address.startswith("unix:"):
+            path = self.address[5:]
+            if os.path.exists(path): os.remove(path)
+            self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._server.bind(path)
+            self._server.listen()
+        else:
+            host, _, port = self.address.rpartition(":")
+            if not self.token and not _is_loopback(host):
+                raise ValueError(f"监听非本机地址 {host} 时必须通过环境变量 {WORKER_TOKEN_ENV} 设置令牌")
+            self._server = socket.create_server((host or "127.0.0.1", int(port)))
+            self.address = f"{host or '127.0.0.1'}:{self._server.getsockname()[1]}"
+        return self.address
+
+    def serve_forever(self):
+        if self._server is None:
+            self.bind()
+        self.log(f"构建节点已启动: {self.address}，并发 {self.slots}，解释器 {self.interpreter}\n")
+        while True:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                break  # stop() 关闭了监听套接字
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def stop(self):
+        if self._server: self._server.close()
+
+    def _handle(self, conn):
+        import hmac
+        payload = None
+        with conn:
+            try:
+                header, payload = _recv_frame(conn, self.workdir)
+                if self.token and not hmac.compare_digest(str(header.get('token') or ""), self.token):
+                    _send_frame(conn, {'type': 'error', 'message': "令牌无效"})
+                elif header.get('op') == 'status':
+                    _send_frame(conn, self.status())
+                elif header.get('op') == 'pack' and payload:
+                    self._run_job(conn, header, payload)
+                else:
+                    _send_frame(conn, {'type': 'error', 'message': f"未知请求: {header.get('op')}"})
+            except (OSError, ValueError, KeyError) as e:
+                self.log(f"连接异常: {e}\n")
+            finally:
+                if payload and os.path.exists(payload): os.remove(payload)
+
+    def _run_job(self, conn, header, payload):
+        import tempfile
+        send_lock = threading.Lock()
+        control = JobControl()
+
+        def send(frame, attachment=None):
+            with send_lock:
+                _send_frame(conn, frame, attachment)
+
+        def log(msg):
+            if control.cancelled.is_set():
+                return
+            try:
+                send({'type': 'log', 'text': msg})
+            except OSError:
+                control.cancel()  # 客户端断开或取消，结束本地构建
+
+        last = [-1]
+        def on_progress(value):
+            if int(value) != last[0] and not control.cancelled.is_set():
+                last[0] = int(value)
+                try: send({'type': 'progress', 'value': value})
+                except OSError: control.cancel()
+
+        with self._lock:
+            self.queued += 1
+        send({'type': 'accepted'})
+        with self._slots:
+            with self._lock:
+                self.queued -= 1
+                self.running += 1
+            job_dir = result = None
+            try:
+                log(f"构建节点: 任务开始（{self.running}/{self.slots} 槽位占用）\n")
+                if control.cancelled.is_set():
+                    return  # 排队期间客户端已经离开
+                job_dir = tempfile.mkdtemp(prefix="job-", dir=self.workdir)
+                try:
+                    _safe_extract(payload, job_dir)
+                    opts = _options_from_spec(header['options'], job_dir, self.interpreter, self.wheelhouse)
+                except ValueError as e:
+                    self.log(f"拒绝任务 (来自 {header.get('client', '?')}): {e}\n")
+                    send({'type': 'error', 'message': str(e)})
+                    return
+                self.log(f"开始任务: {opts.name} (来自 {header.get('client', '?')})\n")
+                # 任务目录用完即删，历史由客户端记录
+                ok = pack(opts, log, on_progress, purge_cache=self.slots == 1, control=control, history=False)
+                artifacts = _artifact_relpaths(opts) if ok else []
+                if ok:
+                    result = _zip_entries([(os.path.join(opts.script_dir, a), a, []) for a in artifacts])
+                self.log(f"任务结束: {opts.name} {'成功' if ok else '失败'}\n")
+                send({'type': 'result', 'ok': ok, 'artifacts': [a.replace(os.sep, "/") for a in artifacts]}, result)
+            finally:
+                with self._lock:
+                    self.running -= 1
+                if job_dir: shutil.rmtree(job_dir, ignore_errors=True)
+                if result and os.path.exists(result): os.remove(result)
+
+def worker_status(address, token=None, timeout=3):
+    with _worker_socket(address, timeout) as sock:
+        _send_frame(sock, {'op': 'status', 'token': token})
+        header, _ = _recv_frame(sock)
+    if header.get('type') == 'error':
+        raise RuntimeError(header['message'])
+    return header
+
+def pick_worker(workers, token=None):
+    """选出负载最低的可用节点并为其预留一个名额，直到节点确认收到任务。
+
+    负载 = (运行中 + 排队中 + 本进程已选定但节点尚未确认的任务) / 槽位数，相同时取列表中靠前的。
+    探测节点走网络，在锁外进行；锁只保护选定与预留这一步。
+    """
+    candidates = []
+    problems = []
+    for address in workers:
+        try:
+            st = worker_status(address, token)
+        except (OSError, ValueError, RuntimeError) as e:
+            problems.append(f"{address}: {e}")
+            continue
+        if st.get('platform') != sys.platform:
+            problems.append(f"{address}: 平台为 {st.get('platform')}")
+            continue
+        candidates.append((address, st))
+    if not candidates:
+        raise RuntimeError("没有可用的构建节点（" + "；".join(problems) + "）")
+    def load(candidate):
+        address, st = candidate
+        return (st['running'] + st['queued'] + _worker_reserved.get(address, 0)) / max(1, st['slots'])
+
+    with _worker_reserved_lock:
+        address, _ = min(candidates, key=load)
+        _worker_reserved[address] = _worker_reserved.get(address, 0) + 1
+        return address
+
+def remote_pack(opts, workers, log=print, on_progress=None, control=None, token=None):
+    """在负载最低的构建节点上执行打包，产物解压回本地对应的 dist/ 路径，成功返回 True。
+
+    节点上每个任务都在全新目录中构建，因此增量模式不会跳过构建。
+    """
+    import socket
+    import sqlite3
+    token = token or os.environ.get(WORKER_TOKEN_ENV)
+    try:
+        address = pick_worker(workers, token)
+    except RuntimeError as e:
+        log(f"\n❌ {e}\n")
+        return False
+    reserved = [True]
+    def release():
+        if reserved[0]:
+            reserved[0] = False
+            with _worker_reserved_lock:
+                _worker_reserved[address] -= 1
+
+    def abort():
+        try: sock.shutdown(socket.SHUT_RDWR)
+        except OSError: pass
+
+    spec, entries = _job_payload(opts)
+    payload = artifacts = sock = None
+    started, status = time.time(), 'failed'
+    try:
+        log(f">>> 远程构建: 节点 {address}，正在打包项目文件...\n")
+        payload = _zip_entries(entries)
+        sock = _worker_socket(address)
+        sock.settimeout(None)
+        if control: control.on_cancel(abort)
+        _send_frame(sock, {'op': 'pack', 'token': token, 'client': socket.gethostname(), 'options': spec}, payload)
+        while True:
+            header, artifacts = _recv_frame(sock)
+            kind = header.get('type')
+            if kind == 'accepted':
+                release()
+            elif kind == 'log':
+                log(header['text'])
+            elif kind == 'progress':
+                if on_progress: on_progress(header['value'])
+            elif kind == 'error':
+                log(f"\n❌ 构建节点拒绝了任务: {header['message']}\n")
+                return False
+            elif kind == 'result':
+                break
+        if not header['ok']:
+            return False
+        root = os.path.abspath(opts.script_dir)
+        for rel in header['artifacts']:
+            # 路径来自节点，删除前确认仍在项目目录之内
+            local = os.path.abspath(os.path.join(root, *rel.split("/")))
+            if local == root or os.path.commonpath([root, local]) != root:
+                raise ValueError(f"构建节点返回了非法产物路径: {rel}")
+        for rel in header['artifacts']:
+            local = os.path.join(root, *rel.split("/"))
+            if os.path.isdir(local): shutil.rmtree(local, ignore_errors=True)
+            elif os.path.exists(local): os.remove(local)
+        _safe_extract(artifacts, opts.script_dir)
+        log(f"产物已取回: {', '.join(header['artifacts'])}\n")
+        status = 'success'
+        return True
+    except (OSError, ValueError) as e:
+        if control and control.cancelled.is_set():
+            log(f"\n⛔ 任务{control.reason}。\n")
+        else:
+            log(f"\n❌ 远程构建失败: {e}\n")
+        return False
+    finally:
+        release()
+        if sock: sock.close()
+        for tmp in (payload, artifacts):
+            if tmp and os.path.exists(tmp): os.remove(tmp)
+        if status != 'success' and control and control.cancelled.is_set():
+            status = control.stopped_status()
+        try:
+            local = [(m.lstrip('-'), os.path.join(opts.script_dir, rel))
+                     for m, rel in zip(MODE_FLAGS[opts.mode], _artifact_relpaths(opts))]
+            build_id = record_build(opts, status, started, time.time() - started, artifacts=local, worker=address)
+        except (OSError, sqlite3.Error) as e:
+            log(f"无法写入构建历史: {e}\n")
+            build_id = None
+        if status == 'success' and opts.bench_runs:
+            benchmark_build(opts, log, build_id)  # 节点不运行构建产物，测速在本机进行
@@ -0,0 +1,127 @@
+"""按内容寻址的资源暂存：去重、变更检测与对象回收。"""
+import time
+import os
+import shutil
+import threading
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from .common import _fmt_size, _hash_file, _link_or_copy, STATE_DIR
+
+# 单个资源超过该体积时给出警告：单文件模式每次启动都要把它解压到临时目录
+RESOURCE_WARN_SIZE = 100 << 20
+
+_stage_lock = threading.Lock()
+
+def _iter_resource_files(resources):
+    """把资源列表展开为 (源文件, 包内相对路径)，映射规则与 --add-data 相同。"""
+    for r in resources:
+        r = os.path.abspath(r)
+        if os.path.isfile(r):
+            yield r, os.path.basename(r)
+        elif os.path.isdir(r):
+            top = os.path.basename(r)
+            for dirpath, dirnames, filenames in os.walk(r):
+                dirnames.sort()
+                for fn in sorted(filenames):
+                    fp = os.path.join(dirpath, fn)
+                    yield fp, os.path.join(top, os.path.relpath(fp, r))
+
+def stage_resources(resources, script_dir, name, log=print, workers=None):
+    """把资源暂存到 .pypack/stage/<name>，返回暂存目录（供一条 --add-data 使用）。
+
+    文件内容按 SHA-256 存入 .pypack/objects，相同内容只存一份，暂存目录里只是指向对象的硬链接；
+    .pypack/resources.json 记录每个源文件的 (大小, mtime, 哈希)，未改动的文件不再读取也不再复制。
+    """
+    state = os.path.join(script_dir, STATE_DIR)
+    objects = os.path.join(state, "objects")
+    stage_dir = os.path.join(state, "stage", name)
+    manifest_path = os.path.join(state, "resources.json")
+    started = time.time()
+
+    with _stage_lock:
+        try:
+            with open(manifest_path, encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {}
+
+        files, stats, to_hash = [], {}, []
+        for src, rel in _iter_resource_files(resources):
+            st = os.stat(src)
+            stats[src] = st
+            files.append((src, rel))
+            entry = manifest.get(src)
+            if not (entry and entry['size'] == st.st_size and entry['mtime'] == st.st_mtime_ns):
+                to_hash.append(src)
+        to_hash = sorted(set(to_hash))
+
+        # 只有新增或改动过的文件需要读取；hashlib 计算大块数据时会释放 GIL，线程池即可并行
+        hashed_bytes = sum(stats[src].st_size for src in to_hash)
+        if to_hash:
+            with ThreadPoolExecutor(max_workers=workers or min(32, (os.cpu_count() or 1) + 4)) as pool:
+                for src, sha in zip(to_hash, pool.map(lambda p: _hash_file(p).hexdigest(), to_hash)):
+                    st = stats[src]
+                    manifest[src] = {'size': st.st_size, 'mtime': st.st_mtime_ns, 'sha': sha}
+
+        wanted, seen = {}, set()
+        copied_bytes = dup_count = dup_bytes = 0
+        for src, rel in files:
+            sha, size = manifest[src]['sha'], stats[src].st_size
+            obj = os.path.join(objects, sha[:2], sha)
+            if sha in seen:
+                dup_count += 1
+                dup_bytes += size
+            elif not os.path.exists(obj):
+                os.makedirs(os.path.dirname(obj), exist_ok=True)
+                tmp = f"{obj}.{os.getpid()}.tmp"
+                shutil.copy2(src, tmp)
+                os.replace(tmp, obj)
+                copied_bytes += size
+            seen.add(sha)
+            if size > RESOURCE_WARN_SIZE:
+                log(f"⚠️ 资源过大 ({_fmt_size(size)}): {src}（单文件模式每次启动都会解压，建议改用文件夹模式或运行时下载）\n")
+            if rel in wanted and wanted[rel] != obj:
+                log(f"⚠️ 资源路径冲突，后者覆盖前者: {rel}\n")
+            wanted[rel] = obj
+
+        # 同步暂存目录：删掉多余或已过期的链接，只补建缺失的
+        linked = 0
+        for dirpath, dirnames, filenames in os.walk(stage_dir, topdown=False):
+            for fn in filenames:
+                fp = os.path.join(dirpath, fn)
+                obj = wanted.get(os.path.relpath(fp, stage_dir))
+                try:
+                    if obj and os.path.samefile(fp, obj):
+                        continue
+                except OSError:
+                    pass
+                os.remove(fp)
+            if dirpath != stage_dir and not os.listdir(dirpath):
+                os.rmdir(dirpath)
+        for rel, obj in wanted.items():
+            dst = os.path.join(stage_dir, rel)
+            if not os.path.exists(dst):
+                os.makedirs(os.path.dirname(dst), exist_ok=True)
+                _link_or_copy(obj, dst)
+                linked += 1
+        os.makedirs(stage_dir, exist_ok=True)
+
+        # 源文件已不存在的记录可以丢弃，不再被任何记录引用的对象随之回收
+        manifest = {src: e for src, e in manifest.items() if os.path.exists(src)}
+        referenced = {e['sha'] for e in manifest.values()}
+        if os.path.isdir(objects):
+            for bucket in os.listdir(objects):
+                for fn in os.listdir(os.path.join(objects, bucket)):
+                    if fn not in referenced:
+                        os.remove(os.path.join(objects, bucket, fn))
+        tmp = f"{manifest_path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(tmp, manifest_path)
+
+    total = sum(st.st_size for st in stats.values())
+    log(f"资源暂存: {len(files)} 个文件 ({_fmt_size(total)})，重新哈希 {len(to_hash)} 个 ({_fmt_size(hashed_bytes)})，"
+        f"新复制 {_fmt_size(copied_bytes)}，重复内容 {dup_count} 个 ({_fmt_size(dup_bytes)})，"
+        f"更新链接 {linked} 个，耗时 {time.time() - started:.2f}s\n")
+    return stage_dir
@@ -0,0 +1,57 @@
+import os
+import sys
+import textwrap
+
+import pytest
+
+# 直接运行 pytest 时也能导入仓库中的 pypackagingtool 包
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 假的 PyInstaller：按 --distpath/--name 写出产物并输出阶段日志，每次调用在 FAKE_PYI_LOG 中记一行；
+# 设置 FAKE_PYI_SLEEP 时在写出产物前等待相应秒数
+FAKE_PYINSTALLER = '''
+import argparse, os, sys, time
+p = argparse.ArgumentParser()
+p.add_argument("script")
+p.add_argument("--name")
+p.add_argument("--distpath")
+p.add_argument("--onefile", action="store_true")
+args, _ = p.parse_known_args()
+with open(os.environ["FAKE_PYI_LOG"], "a") as f:
+    f.write(" ".join(sys.argv[1:]) + "\\n")
+for phase in ("Analysis", "PYZ", "PKG", "EXE"):
+    print(f"100 INFO: checking {phase}", flush=True)
+time.sleep(float(os.environ.get("FAKE_PYI_SLEEP", "0")))
+os.makedirs(args.distpath, exist_ok=True)
+if args.onefile:
+    open(os.path.join(args.distpath, args.name), "w").close()
+else:
+    os.makedirs(os.path.join(args.distpath, args.name), exist_ok=True)
+    open(os.path.join(args.distpath, args.name, args.name), "w").close()
+print("100 INFO: Build complete!", flush=True)
+'''
+
+
+@pytest.fixture
+def fake_pyinstaller(tmp_path, monkeypatch):
+    """让 sys.executable -m PyInstaller 运行假的 PyInstaller，返回记录调用的文件路径。"""
+    pkg = tmp_path / "fake_pyi" / "PyInstaller"
+    pkg.mkdir(parents=True)
+    (pkg / "__init__.py").write_text("")
+    (pkg / "__main__.py").write_text(textwrap.dedent(FAKE_PYINSTALLER))
+    calls = tmp_path / "pyi_calls.txt"
+    calls.write_text("")
+    monkeypatch.setenv("PYTHONPATH", str(tmp_path / "fake_pyi"))
+    monkeypatch.setenv("FAKE_PYI_LOG", str(calls))
+    return calls
+
+
+@pytest.fixture(autouse=True)
+def user_cache(tmp_path, monkeypatch):
+    """每个测试使用独立的用户缓存目录，不读写真实的 ~/.cache，也不沿用上一个测试的内存缓存。"""
+    from pypackagingtool import fingerprint
+    cache = tmp_path / "user_cache"
+    monkeypatch.setenv("XDG_CACHE_HOME", str(cache))
+    monkeypatch.setenv("LOCALAPPDATA", str(cache))
+    monkeypatch.setattr(fingerprint, "_interpreter_cache", {})
+    return cache / "PyPackagingTool"
@@ -0,0 +1,61 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import pypackagingtool as tool
+
+
+@pytest.fixture
+def project(tmp_path):
+    (tmp_path / "app.py").write_text(
+        "import helper\nfrom pkg import mod\n"
+        "print(helper.f.__doc__, helper.checked(), mod.VALUE, mod.data(), helper.f.__code__.co_filename)\n")
+    (tmp_path / "helper.py").write_text(
+        'def f():\n    """doc"""\n\ndef checked():\n    assert False, "asserts kept"\n    return "no-assert"\n')
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "__init__.py").write_text("")
+    (tmp_path / "pkg" / "mod.py").write_text(
+        "import os\nVALUE = 42\n"
+        "def data():\n    return open(os.path.join(os.path.dirname(__file__), 'data.txt')).read()\n")
+    (tmp_path / "pkg" / "data.txt").write_text("payload")
+    return tmp_path
+
+
+def precompile(project, optimize=2):
+    messages = []
+    opts = tool.PackOptions(script=str(project / "app.py"), name="app", optimize=optimize)
+    return tool.precompile_modules(opts, log=messages.append), "".join(messages)
+
+
+def test_sourceless_modules_load(project):
+    stage_dir, msg = precompile(project)
+    assert "新编译 3 个" in msg
+    files = {os.path.relpath(os.path.join(d, f), stage_dir).replace(os.sep, "/")
+             for d, _, fs in os.walk(stage_dir) for f in fs}
+    assert files == {"app.py", "helper.pyc", "pkg/__init__.pyc", "pkg/mod.pyc", "pkg/data.txt"}
+    out = subprocess.run([sys.executable, os.path.join(stage_dir, "app.py")], capture_output=True, text=True,
+                         cwd=stage_dir, timeout=60)
+    assert out.returncode == 0, out.stderr
+    # -OO 编译：文档字符串与 assert 都已去掉；co_filename 记为相对路径，不泄露构建机目录
+    assert out.stdout.split() == ["None", "no-assert", "42", "payload", "helper.py"]
+
+
+def test_bytecode_cache_reused(project):
+    precompile(project)
+    _, msg = precompile(project)
+    assert "新编译 0 个" in msg
+    (project / "helper.py").write_text("def f():\n    pass\n\ndef checked():\n    return 'changed'\n")
+    _, msg = precompile(project)
+    assert "新编译 1 个" in msg
+    # 优化级别不同的字节码分开缓存
+    _, msg = precompile(project, optimize=0)
+    assert "新编译 3 个" in msg
+
+
+def test_compile_error_reported(project):
+    # 包目录整体计入，没被静态导入的子模块也会编译
+    (project / "pkg" / "bad.py").write_text("def f(:\n")
+    with pytest.raises(RuntimeError, match="bad.py"):
+        precompile(project)
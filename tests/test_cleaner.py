@@ -0,0 +1,122 @@
+import io
+import os
+
+import pytest
+
+import pypackagingtool as tool
+
+
+def clean(source, **kwargs):
+    """返回 (编码, 清洗结果)；source 为 bytes，按原样交给分词器。"""
+    lines = tool.iter_clean_lines(io.BytesIO(source).readline, **kwargs)
+    encoding = next(lines)
+    return encoding, "".join(lines)
+
+
+@pytest.mark.parametrize("source, expected", [
+    # 与类头同行的文档字符串：删掉后类体为空，原位补 pass
+    (b'class A: """d"""\n', 'class A: pass\n'),
+    # 函数体只有文档字符串，后面紧跟 DEDENT
+    (b'def f():\n    """d"""\nx = 1\n', 'def f():\n    pass\nx = 1\n'),
+    (b'class A:\n    def f(self):\n        """d"""\n\ny = 2\n', 'class A:\n    def f(self):\n        pass\n\ny = 2\n'),
+    (b'def f():\n    """d"""\n    return 1\n', 'def f():\n    return 1\n'),
+    (b'"""mod"""\nimport os\n', 'import os\n'),
+])
+def test_strip_docstrings(source, expected):
+    _, out = clean(source, strip_docstrings=True)
+    assert out == expected
+    compile(out, "<clean>", "exec")
+
+
+def test_docstring_followed_by_statement_on_same_line_is_kept():
+    # 删掉 """d""" 会留下以 ; 开头的非法语句，这种写法保持原样
+    source = b'"""d"""; x = 1\n'
+    assert clean(source, strip_docstrings=True)[1] == source.decode()
+
+
+def test_docstrings_kept_by_default():
+    source = b'def f():\n    """d"""\n'
+    assert clean(source)[1] == source.decode()
+
+
+def test_crlf_line_endings_preserved():
+    _, out = clean(b'x = 1  # c\r\n\r\n\r\n\r\ny = 2\r\n')
+    assert out == 'x = 1\r\n\r\ny = 2\r\n'
+
+
+def test_coding_cookie_kept_and_used():
+    source = '# -*- coding: latin-1 -*-\n# note\ns = "\xe9"\n'.encode('latin-1')
+    encoding, out = clean(source)
+    assert encoding == 'iso-8859-1'
+    assert out == '# -*- coding: latin-1 -*-\n\ns = "\xe9"\n'
+
+
+def test_shebang_kept():
+    assert clean(b'#!/usr/bin/env python\n# c\nx = 1\n')[1] == '#!/usr/bin/env python\n\nx = 1\n'
+
+
+def test_blank_lines_inside_multiline_string_are_protected():
+    _, out = clean(b's = """a\n\n\n\nb"""  # c\n\n\n\nt = 1\n')
+    assert out == 's = """a\n\n\n\nb"""\n\nt = 1\n'
+
+
+def test_hash_inside_string_is_not_a_comment():
+    assert clean(b"s = 'a # b'  # c\n")[1] == "s = 'a # b'\n"
+
+
+def test_keep_empty_lines():
+    assert clean(b'x = 1\n\n\n\ny = 2\n', remove_empty=False)[1] == 'x = 1\n\n\n\ny = 2\n'
+
+
+def test_clean_source_file_round_trips_encoding(tmp_path):
+    src = tmp_path / "mod.py"
+    src.write_bytes('# -*- coding: latin-1 -*-\ns = "\xe9"  # c\n'.encode('latin-1'))
+    out = tool.clean_source_file(str(src))
+    assert out == str(tmp_path / "mod_clean.py")
+    assert (tmp_path / "mod_clean.py").read_bytes() == '# -*- coding: latin-1 -*-\ns = "\xe9"\n'.encode('latin-1')
+
+
+def test_collect_python_files_skips_ignored(tmp_path):
+    for rel in ["app.py", "pkg/mod.py", "pkg/mod_clean.py", "pkg/data.txt", "venv/lib/site.py",
+                "build/gen.py", "__pycache__/c.py", "tests/test_app.py"]:
+        path = tmp_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("x = 1\n")
+    found = lambda inputs, **kw: [os.path.relpath(p, tmp_path) for p in tool.collect_python_files(inputs, **kw)]
+    expected = ["app.py", os.path.join("pkg", "mod.py"), os.path.join("tests", "test_app.py")]
+    assert found([str(tmp_path)]) == expected
+    assert found([str(tmp_path / "**" / "*.py")]) == expected
+    assert found([str(tmp_path)], ignores=tool.DEFAULT_CLEAN_IGNORES + ["tests"]) == expected[:2]
+    # 直接点名的文件即使位于忽略的目录中也照样处理
+    assert found([str(tmp_path / "venv" / "lib" / "site.py")]) == [os.path.join("venv", "lib", "site.py")]
+
+
+def run_clean(files, cache):
+    return {os.path.basename(src): hit for src, _, err, hit in tool.clean_files_parallel(files, cache=cache)
+            if err is None}
+
+
+def test_clean_cache_hits(tmp_path):
+    src = [tmp_path / "a.py", tmp_path / "b.py"]
+    for p in src:
+        p.write_text("x = 1  # c\n")
+    files = [str(p) for p in src]
+    cache_file = str(tmp_path / "cache.json")
+    cache = tool.CleanCache(cache_file)
+    assert run_clean(files, cache) == {"a.py": False, "b.py": False}
+    cache.save()
+    # 新进程从磁盘载入缓存，未改动的文件直接命中
+    cache = tool.CleanCache(cache_file)
+    assert run_clean(files, cache) == {"a.py": True, "b.py": True}
+    assert cache.hits == 2
+    # 只改 mtime 不改内容：按哈希命中；改了内容或删了输出：重新清洗
+    st = os.stat(src[0])
+    os.utime(src[0], ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    src[1].write_text("y = 2  # c\n")
+    assert run_clean(files, cache) == {"a.py": True, "b.py": False}
+    assert (tmp_path / "b_clean.py").read_text() == "y = 2\n"
+    os.remove(tmp_path / "a_clean.py")
+    assert run_clean(files, cache) == {"a.py": False, "b.py": True}
+    # 清洗选项变化后缓存失效
+    other = tool.CleanCache.options_key(remove_empty=False)
+    assert not cache.is_fresh(files[0], other)
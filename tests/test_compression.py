@@ -0,0 +1,41 @@
+import os
+
+import pytest
+
+import pypackagingtool as tool
+from pypackagingtool.compression import _upx_candidate, _uses_builtin_upx
+
+BIG = tool.UPX_MIN_SIZE
+
+
+@pytest.mark.parametrize("rel, head, size, expected", [
+    ("_internal/libssl.so.3", b"\x7fELF", BIG, True),
+    ("_internal/sqlite3.dll", b"MZ", BIG, True),
+    ("app", b"\x7fELF", BIG - 1, False),                        # 太小
+    ("_internal/base_library.zip", b"PK\x03\x04", BIG, False),  # 数据文件
+    ("_internal/libfoo.dylib", b"\xcf\xfa\xed\xfe", BIG, False),  # Mach-O
+    ("_internal/libz.so", b"\x7fELF" + b"\0" * 100 + b"UPX!", BIG, False),  # 已压缩
+    ("_internal/VCRUNTIME140.dll", b"MZ", BIG, False),          # 跳过列表不区分大小写
+    ("_internal/libpython3.11.so.1.0", b"\x7fELF", BIG, False),
+    (os.path.join("_internal", "PyQt5", "Qt5", "plugins", "platforms", "libqxcb.so"), b"\x7fELF", BIG, False),
+])
+def test_upx_candidate(tmp_path, rel, head, size, expected):
+    path = tmp_path / "f"
+    path.write_bytes(head + b"\0" * (size - len(head)))
+    assert _upx_candidate(str(path), rel) is expected
+
+
+def test_upx_candidate_missing_file(tmp_path):
+    assert _upx_candidate(str(tmp_path / "gone.so"), "gone.so") is False
+
+
+@pytest.mark.parametrize("compression, mode, builtin", [
+    ("none", "--onefile", False),
+    ("upx", "--onedir", True),
+    ("upx-parallel", "--onedir", False),  # 构建后由 compress_bundle 并行压缩
+    ("upx-parallel", "--onefile", True),
+])
+def test_builtin_upx_only_where_needed(compression, mode, builtin):
+    opts = tool.PackOptions(script="app.py", compression=compression, compress_level=9, compress_lzma=True)
+    assert _uses_builtin_upx(opts, mode) is builtin
+    assert tool.upx_flags(opts) == ["-9", "--lzma"]
@@ -0,0 +1,99 @@
+import os
+import shutil
+import stat
+import sys
+from dataclasses import replace
+
+import pytest
+
+import pypackagingtool as tool
+from pypackagingtool import fingerprint
+
+
+@pytest.fixture
+def fake_python(tmp_path):
+    """只会回答探测脚本的假解释器：输出版本行与 site-packages 目录，每次运行在 probes 中记一行。"""
+    site = tmp_path / "site-packages"
+    site.mkdir()
+    probes = tmp_path / "probes.txt"
+    exe = tmp_path / "python"
+    exe.write_text(f"#!/bin/sh\necho x >> '{probes}'\necho '3.11.0 6.0'\necho '{site}'\n")
+    exe.chmod(exe.stat().st_mode | stat.S_IXUSR)
+    return exe, site, probes
+
+
+@pytest.mark.skipif(os.name == 'nt', reason="假解释器是 shell 脚本")
+def test_interpreter_identity_cached_until_site_packages_change(fake_python, monkeypatch):
+    exe, site, probes = fake_python
+    count = lambda: len(probes.read_text().splitlines())
+    identity = fingerprint._interpreter_identity(str(exe))
+    assert identity == f"{exe}|3.11.0 6.0"
+    assert fingerprint._interpreter_identity(str(exe)) == identity
+    assert count() == 1
+    # 新进程：内存缓存为空，从 user_cache_dir 中的记录复用
+    monkeypatch.setattr(fingerprint, "_interpreter_cache", {})
+    assert fingerprint._interpreter_identity(str(exe)) == identity
+    assert count() == 1
+    # pip 安装/卸载会改动 site-packages 目录
+    st = site.stat()
+    os.utime(site, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    fingerprint._interpreter_identity(str(exe))
+    assert count() == 2
+
+
+def test_interpreter_identity_of_real_python():
+    identity = fingerprint._interpreter_identity(sys.executable)
+    assert identity.startswith(os.path.abspath(sys.executable) + "|" + sys.version.split()[0])
+    assert fingerprint._interpreter_cache[os.path.abspath(sys.executable)]['dirs']
+
+
+@pytest.fixture
+def project(tmp_path):
+    (tmp_path / "app.py").write_text("import helper\nhelper.run()\n")
+    (tmp_path / "helper.py").write_text("def run():\n    print(1)\n")
+    (tmp_path / "unused.py").write_text("x = 1\n")
+    return tmp_path
+
+
+def fingerprint_of(project, commands=(["pyinstaller", "app.py"],), resources=()):
+    return tool.compute_build_fingerprint(str(project / "app.py"), list(commands), [str(r) for r in resources])
+
+
+def test_fingerprint_follows_local_imports(project):
+    base = fingerprint_of(project)
+    assert fingerprint_of(project) == base
+    # 入口没有导入的文件不影响指纹
+    (project / "unused.py").write_text("x = 2\n")
+    assert fingerprint_of(project) == base
+    (project / "helper.py").write_text("def run():\n    print(2)\n")
+    assert fingerprint_of(project) != base
+
+
+def test_fingerprint_covers_commands_and_resources(project):
+    data = project / "data"
+    data.mkdir()
+    (data / "a.txt").write_text("a")
+    base = fingerprint_of(project, resources=[data])
+    assert fingerprint_of(project, commands=[["pyinstaller", "app.py", "--onefile"]], resources=[data]) != base
+    (data / "b.txt").write_text("b")
+    assert fingerprint_of(project, resources=[data]) != base
+
+
+def test_incremental_skips_unchanged_inputs(project, fake_pyinstaller):
+    opts = tool.PackOptions(script=str(project / "app.py"), name="app", collect_tkinter=False, incremental=True)
+    calls = lambda: len(fake_pyinstaller.read_text().splitlines())
+    assert tool.pack(opts, log=lambda msg: None)
+    assert tool.pack(opts, log=lambda msg: None)
+    assert calls() == 1
+    assert tool.build_report(str(project), 2)['status'] == 'skipped'
+    # 源码改动后重新构建
+    (project / "helper.py").write_text("def run():\n    print(3)\n")
+    assert tool.pack(opts, log=lambda msg: None)
+    assert calls() == 2
+    # 产物被删除时即使输入未变也要重新构建
+    shutil.rmtree(project / "dist" / "app")
+    assert tool.pack(opts, log=lambda msg: None)
+    assert calls() == 3
+    # 不开增量模式时总是构建
+    assert tool.pack(replace(opts, incremental=False), log=lambda msg: None)
+    assert calls() == 4
@@ -0,0 +1,154 @@
+import json
+import os
+import shutil
+import threading
+
+import pytest
+
+import pypackagingtool as tool
+from pypackagingtool import bench, build
+
+
+@pytest.fixture
+def project(tmp_path):
+    (tmp_path / "app.py").write_text("print(1)\n")
+    return tmp_path
+
+
+def record(project, status='success', duration=10.0, files=None, phases=None):
+    """按 {相对路径: 字节数} 写出一个 onedir 产物并记入历史，返回构建编号；phases 为各阶段耗时。"""
+    artifact = project / "dist" / "app"
+    shutil.rmtree(artifact, ignore_errors=True)
+    for rel, size in (files or {"app": 1000}).items():
+        path = artifact / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"\0" * size)
+    opts = tool.PackOptions(script=str(project / "app.py"), name="app")
+    timings = [{'mode': 'onedir', 'success': True, 'total_seconds': sum(phases.values()), 'phases': phases,
+                'peak_rss_mb': 80.0}] if phases else ()
+    return tool.record_build(opts, status, 0, duration, artifacts=[('onedir', str(artifact))], timings=timings)
+
+
+def test_needs_two_successful_builds(project):
+    record(project)
+    record(project, status='failed')
+    assert tool.compare_builds(str(project)) is None
+
+
+@pytest.mark.parametrize("size, duration, regressions", [
+    (1050, 14.0, 0),   # +5% 体积、+40% 耗时：均在默认阈值内
+    (1200, 10.0, 1),   # 体积 +20% > 10%
+    (1000, 16.0, 1),   # 耗时 +60% > 50%
+    (1200, 16.0, 2),
+])
+def test_default_thresholds(project, size, duration, regressions):
+    record(project, files={"app": 1000}, duration=10.0)
+    record(project, files={"app": size}, duration=duration)
+    cmp = tool.compare_builds(str(project))
+    assert len(cmp['regressions']) == regressions
+
+
+def test_custom_thresholds(project):
+    record(project, files={"app": 1000}, duration=10.0)
+    record(project, files={"app": 1050}, duration=10.5)
+    assert tool.compare_builds(str(project))['regressions'] == []
+    cmp = tool.compare_builds(str(project), size_pct=1, time_pct=1)
+    assert len(cmp['regressions']) == 2
+
+
+def test_base_skips_failed_builds(project):
+    first = record(project, files={"app": 1000})
+    record(project, status='failed', files={"app": 5000})
+    head = record(project, files={"app": 1000})
+    cmp = tool.compare_builds(str(project))
+    assert (cmp['base']['id'], cmp['head']['id']) == (first, head)
+    assert cmp['regressions'] == []
+
+
+def test_explicit_ids_and_component_breakdown(project):
+    base = record(project, files={"app": 1000, "_internal/numpy/core.so": 100})
+    record(project, files={"app": 1000, "_internal/numpy/core.so": 900})
+    head = record(project, files={"app": 1000, "_internal/numpy/core.so": 100, "_internal/libssl.so": 10})
+    cmp = tool.compare_builds(str(project), head=head, base=base)
+    assert cmp['modes']['onedir']['base'] == 1100
+    assert cmp['modes']['onedir']['head'] == 1110
+    assert cmp['components'] == [('onedir', '_internal/libssl.so', 10)]
+    cmp = tool.compare_builds(str(project), head=head - 1, base=base)
+    assert cmp['components'][0] == ('onedir', '_internal/numpy', 800)
+    assert "[onedir]" in cmp['regressions'][0]
+
+
+def test_queries_do_not_create_history(tmp_path):
+    assert tool.compare_builds(str(tmp_path)) is None
+    assert tool.list_builds(str(tmp_path)) == []
+    assert not (tmp_path / tool.STATE_DIR).exists()
+
+
+def test_fingerprint_recorded_without_incremental(project, fake_pyinstaller):
+    opts = tool.PackOptions(script=str(project / "app.py"), name="app", collect_tkinter=False)
+    assert tool.pack(opts, log=lambda msg: None)
+    assert tool.pack(opts, log=lambda msg: None)
+    cmp = tool.compare_builds(str(project))
+    assert cmp['head']['fingerprint'] is not None
+    assert cmp['same_inputs']
+
+
+def test_phase_regressions(project):
+    record(project, phases={'startup': 0.5, 'Analysis': 8.0, 'PKG': 0.2})
+    record(project, phases={'startup': 0.5, 'Analysis': 13.0, 'PKG': 0.6})
+    cmp = tool.compare_builds(str(project))
+    assert cmp['phases']['onedir']['Analysis'] == {'base': 8.0, 'head': 13.0, 'pct': 62.5}
+    # PKG 增长 200%，但不足 PHASE_REGRESSION_MIN_SECONDS，不算回归
+    assert cmp['regressions'] == ["[onedir] Analysis 阶段 8.0s -> 13.0s (+62.5%)"]
+    assert "Analysis 8.0s -> 13.0s" in tool.format_build_comparison(cmp)
+
+
+def test_build_report_and_json_cli(project, capsys):
+    build_id = record(project, files={"app": 1000}, phases={'Analysis': 2.0})
+    report = tool.build_report(str(project), build_id)
+    assert report['sizes'] == {'onedir': 1000}
+    assert report['modes'][0]['phases'] == {'Analysis': 2.0}
+    assert report['options']['name'] == "app"
+    assert tool.main(["history", str(project), "--json"]) == 0
+    assert json.loads(capsys.readouterr().out)[0]['id'] == build_id
+
+
+def test_no_benchmark_after_incremental_skip(project, fake_pyinstaller, monkeypatch):
+    benched = []
+    monkeypatch.setattr(build, "benchmark_build", lambda opts, log, build_id: benched.append(build_id))
+    opts = tool.PackOptions(script=str(project / "app.py"), name="app", collect_tkinter=False,
+                            incremental=True, bench_runs=3)
+    assert tool.pack(opts, log=lambda msg: None)
+    assert tool.pack(opts, log=lambda msg: None)
+    assert benched == [1]
+    assert tool.build_report(str(project), 2)['status'] == 'skipped'
+
+
+def test_extraction_overhead_clamped(project, monkeypatch):
+    opts = tool.PackOptions(script=str(project / "app.py"), name="app", mode="both", bench_runs=3)
+    for mode in ('--onedir', '--onefile'):
+        exe = bench._executable_for(opts, mode)[1]
+        os.makedirs(os.path.dirname(exe), exist_ok=True)
+        open(exe, "w").close()
+    # 噪声下 onefile 的热启动反而比 onedir 快
+    def fake_bench(path, runs, args, timeout, artifact):
+        median = 0.28 if artifact == path else 0.30  # onefile 的产物即可执行文件本身
+        return {'path': path, 'size_bytes': 1, 'runs': [median] * runs, 'first_run_seconds': median,
+                'warm_median_seconds': median, 'warm_min_seconds': median, 'peak_rss_mb': None,
+                'timeouts': 0, 'failures': 0}
+
+    monkeypatch.setattr(bench, "benchmark_executable", fake_bench)
+    entries = {e['mode']: e for e in tool.benchmark_build(opts, log=lambda msg: None)}
+    assert entries['onefile']['extraction_seconds'] == 0
+
+
+@pytest.mark.parametrize("timeout, status", [(0.3, 'timeout'), (None, 'cancelled')])
+def test_stopped_builds_recorded_by_reason(project, fake_pyinstaller, monkeypatch, timeout, status):
+    monkeypatch.setenv("FAKE_PYI_SLEEP", "30")
+    control = tool.JobControl(timeout=timeout)
+    control.start()
+    if timeout is None:
+        threading.Timer(0.3, control.cancel).start()
+    opts = tool.PackOptions(script=str(project / "app.py"), name="app", collect_tkinter=False)
+    assert not tool.pack(opts, log=lambda msg: None, control=control)
+    assert tool.build_report(str(project), 1)['status'] == status
@@ -0,0 +1,101 @@
+import queue
+
+import pytest
+
+import pypackagingtool as tool
+from pypackagingtool import process
+
+LINES = [
+    "12 INFO: checking Analysis\n",
+    "[onefile] 30 WARNING: lib not found\n",
+    "40 ERROR: build failed\n",
+    ">>> 正在启动: --onedir ...\n",  # 本工具自己的提示没有级别，总是显示
+    "Traceback (most recent call last):\n",
+]
+
+
+def pipeline(lines, **kwargs):
+    q = queue.Queue()
+    for line in lines:
+        q.put(line)
+    return tool.LogPipeline(q, **kwargs)
+
+
+@pytest.mark.parametrize("min_level, kept", [
+    (0, [0, 1, 2, 3, 4]),
+    (tool.LOG_LEVELS['INFO'], [0, 1, 2, 3, 4]),
+    (tool.LOG_LEVELS['WARNING'], [1, 2, 3, 4]),
+    (tool.LOG_LEVELS['ERROR'], [2, 3, 4]),
+])
+def test_drain_filters_by_level(min_level, kept):
+    text, more = pipeline(LINES).drain(min_level)
+    assert text == "".join(LINES[i] for i in kept)
+    assert not more
+
+
+def test_drain_batches_and_spools_everything(tmp_path):
+    p = pipeline(LINES, batch_limit=2)
+    p.open_spool(str(tmp_path / "logs" / "build.log"))
+    shown = []
+    while True:
+        text, more = p.drain(tool.LOG_LEVELS['ERROR'])
+        shown.append(text)
+        if not more:
+            break
+    p.close_spool()
+    assert len(shown) == 3
+    assert "".join(shown) == "".join(LINES[2:])
+    # 过滤只影响显示，落盘文件保留全部日志
+    assert (tmp_path / "logs" / "build.log").read_text(encoding="utf-8") == "".join(LINES)
+    assert p.drain() == ("", False)
+
+
+def test_open_spool_keeps_recent_logs(tmp_path):
+    log_dir = tmp_path / "logs"
+    log_dir.mkdir()
+    for i in range(5):
+        (log_dir / f"old{i}.log").write_text("")
+    p = pipeline([])
+    p.open_spool(str(log_dir / "new.log"), keep=3)
+    p.close_spool()
+    assert len(list(log_dir.glob("*.log"))) == 3
+
+
+def feed(tracker, *lines):
+    for line in lines:
+        tracker.feed(line)
+
+
+def test_tracker_follows_pyinstaller_phases(monkeypatch):
+    clock = iter(range(100))
+    monkeypatch.setattr(process.time, "perf_counter", lambda: next(clock))
+    tracker = tool.BuildTracker('onedir')  # t=0
+    feed(tracker, "80 INFO: PyInstaller: 6.0\n")
+    assert 0 < tracker.progress < tool.PHASE_PROGRESS['Analysis']
+    feed(tracker, "500 INFO: checking Analysis\n")  # t=1
+    assert tracker.progress == tool.PHASE_PROGRESS['Analysis']
+    # 阶段内逐行推进，但不越过下一阶段的起点
+    feed(tracker, *["600 INFO: Analyzing hidden import 'x'\n"] * 2000)
+    assert tracker.progress < tool.PHASE_PROGRESS['PYZ']
+    feed(tracker, "[onedir] 900 INFO: checking PYZ\n",  # t=2
+         "950 INFO: checking EXE\n",  # t=3
+         "990 INFO: checking COLLECT\n",  # t=4
+         "999 INFO: Build complete! The results are available in: dist\n")  # t=5
+    assert tracker.progress == 100
+    tracker.finish(True)  # t=6，已在 done 阶段
+    report = tracker.report()
+    assert report['phases'] == {'startup': 1, 'Analysis': 1, 'PYZ': 1, 'EXE': 1, 'COLLECT': 1}
+    assert report['total_seconds'] == 6 and report['success']
+
+
+def test_tracker_accumulates_repeated_phases(monkeypatch):
+    # "both" 模式一次构建里 EXE/PKG 会出现两次，耗时累加，进度不回退
+    clock = iter(range(100))
+    monkeypatch.setattr(process.time, "perf_counter", lambda: next(clock))
+    tracker = tool.BuildTracker('both')
+    feed(tracker, "INFO: checking Analysis\n", "INFO: checking EXE\n", "INFO: checking COLLECT\n",
+         "INFO: checking PKG\n", "INFO: checking EXE\n")
+    assert tracker.progress == tool.PHASE_PROGRESS['COLLECT']
+    tracker.finish(False)
+    assert tracker.phases['EXE'] == 2
+    assert tracker.report()['success'] is False
@@ -0,0 +1,119 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+import pypackagingtool as tool
+from pypackagingtool import jobs
+
+
+@pytest.fixture
+def fake_pack(monkeypatch):
+    """替换 pack：任务一直运行到 release(name) 或被取消/超时，记录各任务的开始顺序。"""
+    started, gates = [], {}
+    lock = threading.Lock()
+
+    def pack(opts, log, on_progress=None, purge_cache=True, control=None):
+        with lock:
+            started.append(opts.name)
+            gate = gates.setdefault(opts.name, threading.Event())
+        while not gate.wait(0.01):
+            if control.cancelled.is_set():
+                return False
+        return True
+
+    def release(name):
+        with lock:
+            gates.setdefault(name, threading.Event()).set()
+
+    monkeypatch.setattr(jobs, "pack", pack)
+    return started, release
+
+
+def wait_for(cond, timeout=5):
+    deadline = time.time() + timeout
+    while not cond():
+        assert time.time() < deadline, "等待超时"
+        time.sleep(0.01)
+
+
+def options(tmp_path, name, subdir=""):
+    return tool.PackOptions(script=str(tmp_path / subdir / "app.py"), name=name)
+
+
+def test_same_target_runs_serially(tmp_path, fake_pack):
+    started, release = fake_pack
+    finished = []
+    q = tool.BuildQueue(slots=3, log_for=lambda job: lambda msg: None, on_finish=finished.append)
+    first = q.submit(options(tmp_path, "app"))
+    second = q.submit(options(tmp_path, "app"))
+    other = q.submit(options(tmp_path, "app", subdir="sub"))  # 同名但不同目录，产物互不冲突
+    wait_for(lambda: len(started) == 2)
+    assert (first.status, second.status, other.status) == ("运行中", "排队中", "运行中")
+    release("app")
+    wait_for(lambda: second.done)
+    assert first.status == second.status == "成功"
+    assert second.started >= first.finished
+    assert started == ["app", "app", "app"]
+    wait_for(lambda: other.done)
+    assert len(finished) == 3
+
+
+def test_slots_limit_concurrency(tmp_path, fake_pack):
+    started, release = fake_pack
+    q = tool.BuildQueue(slots=1, log_for=lambda job: lambda msg: None)
+    a, b = q.submit(options(tmp_path, "a")), q.submit(options(tmp_path, "b"))
+    wait_for(lambda: started == ["a"])
+    q.set_slots(2)
+    wait_for(lambda: started == ["a", "b"])
+    release("a"), release("b")
+    wait_for(lambda: a.done and b.done)
+
+
+def test_cancel_queued_and_running(tmp_path, fake_pack):
+    started, _ = fake_pack
+    finished = []
+    q = tool.BuildQueue(slots=1, log_for=lambda job: lambda msg: None, on_finish=finished.append)
+    running, queued = q.submit(options(tmp_path, "a")), q.submit(options(tmp_path, "b"))
+    wait_for(lambda: started == ["a"])
+    q.cancel(queued)
+    assert queued.status == "已取消" and queued.done and finished == [queued]
+    q.cancel(running)
+    wait_for(lambda: running.done)
+    assert running.status == "已取消"
+    # 取消的排队任务不会再被调度
+    assert started == ["a"]
+
+
+def test_timeout(tmp_path, fake_pack):
+    q = tool.BuildQueue(log_for=lambda job: lambda msg: None)
+    job = q.submit(options(tmp_path, "a"), timeout=0.2)
+    wait_for(lambda: job.done)
+    assert job.status == tool.JOB_TIMEOUT_REASON
+    assert job.control.stopped_status() == 'timeout'
+
+
+def sleeper():
+    # 与 run_command 一样以独立会话启动，取消时按进程组结束
+    return subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"], start_new_session=os.name != 'nt')
+
+
+def test_job_control_kills_registered_processes():
+    control = tool.JobControl()
+    proc = sleeper()
+    control.register(proc)
+    cleaned = []
+    control.on_cancel(lambda: cleaned.append(1))
+    control.cancel()
+    assert proc.wait(timeout=10) is not None
+    assert cleaned == [1]
+    assert control.stopped_status() == 'cancelled'
+    # 取消之后才登记的进程立即结束，回调立即执行
+    late = sleeper()
+    control.register(late)
+    assert late.wait(timeout=10) is not None
+    control.on_cancel(lambda: cleaned.append(2))
+    assert cleaned == [1, 2]
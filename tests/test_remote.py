@@ -0,0 +1,114 @@
+import os
+import stat
+import sys
+import zipfile
+
+import pytest
+
+import pypackagingtool as tool
+from pypackagingtool import remote
+
+
+def make_zip(path, entries):
+    with zipfile.ZipFile(path, "w") as zf:
+        for name, data in entries.items():
+            zf.writestr(name, data)
+    return str(path)
+
+
+@pytest.mark.parametrize("name", ["../evil.txt", "a/../../evil.txt", "/tmp/evil.txt", "dist/../../evil.txt"])
+def test_safe_extract_rejects_paths_outside_dest(tmp_path, name):
+    dest = tmp_path / "dest"
+    dest.mkdir()
+    archive = make_zip(tmp_path / "a.zip", {name: b"x"})
+    with pytest.raises(ValueError):
+        remote._safe_extract(archive, str(dest))
+    assert not (tmp_path / "evil.txt").exists()
+
+
+def test_safe_extract_restores_permissions(tmp_path):
+    archive = tmp_path / "a.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        info = zipfile.ZipInfo("dist/app/app")
+        info.external_attr = (stat.S_IFREG | 0o755) << 16
+        zf.writestr(info, b"#!/bin/sh\n")
+        zf.writestr("dist/app/_internal/data.txt", b"d")
+    remote._safe_extract(str(archive), str(tmp_path / "dest"))
+    assert (tmp_path / "dest/dist/app/_internal/data.txt").read_bytes() == b"d"
+    if os.name != 'nt':
+        assert os.stat(tmp_path / "dest/dist/app/app").st_mode & 0o777 == 0o755
+
+
+@pytest.mark.parametrize("args", [
+    ["--distpath", "/tmp/out"],
+    ["--dist=/tmp/out"],  # argparse 前缀缩写
+    ["--runtime-hook=hook.py"],
+    ["--additional-hooks-dir", "hooks"],
+    ["--add-data", "/etc/passwd:."],
+    ["--add-binary=../lib.so:."],
+    ["-p", "/usr/lib"],
+    ["-p/usr/lib"],
+    [f"--paths=src{os.pathsep}/usr/lib"],
+    ["--icon", "/etc/app.ico"],
+    ["-i", "../app.ico"],
+    ["-i/etc/app.exe,0"],
+    ["--splash=/etc/splash.png"],
+    ["--resource", "/etc/passwd,TEXT,1"],
+    ["--manifest", "/etc/app.manifest"],
+    ["-m", "../app.manifest"],
+])
+def test_worker_rejects_unsafe_args(tmp_path, args):
+    with pytest.raises(ValueError):
+        remote._check_worker_args(args, str(tmp_path), str(tmp_path))
+
+
+def test_worker_accepts_paths_inside_job_dir(tmp_path):
+    args = ["--add-data", "assets:assets", "--add-binary=lib/x.so:.", "-p", "src",
+            "--hidden-import", "pkg", "--noconfirm"]
+    remote._check_worker_args(args, str(tmp_path), str(tmp_path))
+
+
+@pytest.mark.parametrize("args", [
+    ["--icon", "app.ico"],
+    ["-iassets/app.exe,0"],
+    ["--icon=NONE"],
+    ["--splash", "assets/splash.png"],
+    ["--resource=assets/data.bin,TEXT,1"],
+    ["--manifest", "app.manifest"],
+    ["--manifest", "<assembly xmlns='urn:schemas-microsoft-com:asm.v1'/>"],
+])
+def test_worker_accepts_windows_resources_inside_job_dir(tmp_path, args):
+    remote._check_worker_args(args, str(tmp_path), str(tmp_path))
+
+
+def test_pick_worker_probes_outside_lock(monkeypatch):
+    statuses = {"a:1": {'running': 2, 'queued': 0, 'slots': 2}, "b:1": {'running': 0, 'queued': 0, 'slots': 2}}
+
+    def status(address, token=None):
+        # 探测期间锁必须空闲，其它线程才能同时选节点
+        assert not remote._worker_reserved_lock.locked()
+        return dict(statuses[address], platform=sys.platform)
+
+    monkeypatch.setattr(remote, "worker_status", status)
+    monkeypatch.setattr(remote, "_worker_reserved", {})
+    assert tool.pick_worker(["a:1", "b:1"]) == "b:1"
+    # b 已预留一个名额，负载 0.5 仍低于 a 的 1.0
+    assert tool.pick_worker(["a:1", "b:1"]) == "b:1"
+    assert remote._worker_reserved == {"b:1": 2}
+    # 负载相同时取列表中靠前的
+    assert tool.pick_worker(["a:1", "b:1"]) == "a:1"
+
+
+@pytest.mark.parametrize("address", ["0.0.0.0:0", "[::]:0"])
+def test_worker_needs_token_off_loopback(tmp_path, address):
+    worker = tool.BuildWorker(address, workdir=str(tmp_path))
+    with pytest.raises(ValueError):
+        worker.bind()
+
+
+def test_worker_binds_loopback_without_token(tmp_path):
+    worker = tool.BuildWorker("127.0.0.1:0", workdir=str(tmp_path))
+    try:
+        assert worker.bind().startswith("127.0.0.1:")
+    finally:
+        worker.stop()
@@ -0,0 +1,68 @@
+import os
+
+import pytest
+
+import pypackagingtool as tool
+
+
+@pytest.fixture
+def project(tmp_path):
+    assets = tmp_path / "assets"
+    (assets / "img").mkdir(parents=True)
+    (assets / "img" / "a.png").write_bytes(b"same")
+    (assets / "img" / "b.png").write_bytes(b"same")
+    (assets / "readme.txt").write_text("hello")
+    (tmp_path / "config.json").write_text("{}")
+    return tmp_path
+
+
+def stage(project, resources=("assets", "config.json")):
+    messages = []
+    stage_dir = tool.stage_resources([str(project / r) for r in resources], str(project), "app",
+                                     log=messages.append)
+    return stage_dir, "".join(messages)
+
+
+def objects(project):
+    root = project / tool.STATE_DIR / "objects"
+    return sorted(p.name for p in root.rglob("*") if p.is_file())
+
+
+def staged(stage_dir):
+    return {os.path.relpath(os.path.join(d, f), stage_dir).replace(os.sep, "/")
+            for d, _, files in os.walk(stage_dir) for f in files}
+
+
+def test_stage_layout_matches_add_data_and_dedups(project):
+    stage_dir, msg = stage(project)
+    assert staged(stage_dir) == {"assets/img/a.png", "assets/img/b.png", "assets/readme.txt", "config.json"}
+    # a.png 与 b.png 内容相同，只存一份对象
+    assert len(objects(project)) == 3
+    assert "重复内容 1 个" in msg
+    assert os.path.samefile(os.path.join(stage_dir, "assets/img/a.png"), os.path.join(stage_dir, "assets/img/b.png"))
+
+
+def test_unchanged_files_are_not_rehashed(project):
+    stage(project)
+    _, msg = stage(project)
+    assert "重新哈希 0 个" in msg and "更新链接 0 个" in msg
+    (project / "assets" / "readme.txt").write_text("changed")
+    stage_dir, msg = stage(project)
+    assert "重新哈希 1 个" in msg and "更新链接 1 个" in msg
+    assert (project / tool.STATE_DIR / "stage" / "app" / "assets" / "readme.txt").read_text() == "changed"
+
+
+def test_removed_resources_are_collected(project):
+    stage(project)
+    before = set(objects(project))
+    os.remove(project / "assets" / "readme.txt")
+    (project / "assets" / "img" / "b.png").write_bytes(b"other")
+    stage_dir, _ = stage(project)
+    assert staged(stage_dir) == {"assets/img/a.png", "assets/img/b.png", "config.json"}
+    after = set(objects(project))
+    # readme.txt 的对象已不被引用而被回收；"same" 仍被 a.png 引用
+    assert len(after) == 3 and len(before & after) == 2
+    # 去掉整个目录后，暂存目录中的链接与空目录一并清理
+    stage_dir, _ = stage(project, resources=("config.json",))
+    assert staged(stage_dir) == {"config.json"}
+    assert not os.path.exists(os.path.join(stage_dir, "assets"))